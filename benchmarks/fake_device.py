@@ -0,0 +1,129 @@
+import random
+import threading
+import time
+import zlib
+
+SHOW_VERSION = """Cisco IOS Software, C3560CX Software (C3560CX-UNIVERSALK9-M), Version 15.2(7)E10, RELEASE SOFTWARE (fc3)
+Technical Support: http://www.cisco.com/techsupport
+Copyright (c) 1986-2024 by Cisco Systems, Inc.
+Compiled Tue 12-Mar-24 09:25 by mcpre
+
+ROM: Bootstrap program is C3560CX boot loader
+BOOTLDR: C3560CX Boot Loader (C3560CX-HBOOT-M) Version 15.2(6r)E, RELEASE SOFTWARE (fc1)
+
+{hostname} uptime is 8 weeks, 1 day, 5 hours, 56 minutes
+System returned to ROM by power-on
+System restarted at 20:31:43 UTC Sat Jan 1 2000
+System image file is "flash:Cisco_3560CX_E10.bin"
+Last reload reason: power-on
+
+License Level: ipbase
+License Type: Default. No valid license found.
+Next reload license Level: ipbase
+
+cisco WS-C3560CX-12PC-S (APM86XXX) processor (revision L0) with 524288K bytes of memory.
+Processor board ID {serial}
+Last reset from power-on
+2 Virtual Ethernet interfaces
+16 Gigabit Ethernet interfaces
+The password-recovery mechanism is enabled.
+
+512K bytes of flash-simulated non-volatile configuration memory.
+Base ethernet MAC Address       : C0:64:E4:9B:70:80
+Motherboard assembly number     : 73-100864-04
+Power supply part number        : 341-0675-02
+Motherboard serial number       : FOC23223REZ
+Power supply serial number      : LIT230533SP
+Model revision number           : L0
+Motherboard revision number     : C0
+Model number                    : WS-C3560CX-12PC-S
+System serial number            : {serial}
+Top Assembly Part Number        : 68-100571-01
+Top Assembly Revision Number    : E0
+Version ID                      : V03
+CLEI Code Number                : CMM1L10DRB
+Hardware Board Revision Number  : 0x09
+
+
+Switch Ports Model                     SW Version            SW Image
+------ ----- -----                     ----------            ----------
+*    1 16    WS-C3560CX-12PC-S         15.2(7)E10            C3560CX-UNIVERSALK9-M
+
+
+Configuration register is 0xF
+"""
+
+SHOW_INVENTORY = """NAME: "1", DESCR: "WS-C3560CX-12PC-S"
+PID: WS-C3560CX-12PC-S , VID: V03  , SN: {serial}
+
+NAME: "GigabitEthernet1/0/15", DESCR: "1000BaseSX SFP"
+PID: GLC-SX-MMD        , VID: V01  , SN: AGM1234567
+"""
+
+
+def fake_serial(host):
+    return f"FOC{zlib.crc32(host.encode()):08X}"
+
+
+def make_fake_device(latency=0.0, jitter=0.0, failure_rate=0.0, outputs=None, seed=0):
+    """
+    Build a netmiko-like device class (same constructor and methods as NetDevice)
+    answering canned show version / show inventory outputs.
+
+    Args:
+        latency: seconds added to connect and to every command
+        jitter: random extra delay, up to this many seconds
+        failure_rate: share of hosts (0 to 1) that always fail to connect
+        outputs: {command: text} overriding the canned outputs, {hostname}/{serial} are filled in
+        seed: makes the jitter reproducible
+    """
+    canned = {"show version": SHOW_VERSION, "show inventory": SHOW_INVENTORY}
+    canned.update(outputs or {})
+    rng = random.Random(seed)
+    rng_lock = threading.Lock()
+
+    def wait():
+        delay = latency
+        if jitter:
+            with rng_lock:
+                delay += rng.uniform(0, jitter)
+        if delay:
+            time.sleep(delay)
+
+    class FakeNetDevice:
+        def __init__(self, host, username, password, device_type):
+            self.host = host
+            self.username = username
+            self.password = password
+            self.device_type = device_type
+            self.session = None
+            self.status = None
+            self.error = None
+            self.error_type = None
+
+        def connect(self):
+            wait()
+            # Same hosts fail on every run, so runs can be compared
+            if failure_rate and (zlib.crc32(self.host.encode()) % 10000) < failure_rate * 10000:
+                self.status = "failed"
+                self.error = f"Connection to device {self.host} timed out"
+                self.error_type = "timeout"
+                return False
+            self.session = True
+            self.status = "success"
+            return True
+
+        def is_alive(self):
+            return self.session is not None
+
+        def send_command(self, command):
+            if not self.session:
+                return "Not connected to the device"
+            wait()
+            text = canned.get(command, f"% Invalid input detected: {command}")
+            return text.replace("{hostname}", f"SW-{self.host}").replace("{serial}", fake_serial(self.host))
+
+        def disconnect(self):
+            self.session = None
+
+    return FakeNetDevice
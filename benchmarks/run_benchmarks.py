@@ -0,0 +1,169 @@
+"""
+Throughput benchmarks for the scanner, the parser, the storage writers and logging.
+
+    python -m benchmarks.run_benchmarks                       # compare with baselines.json
+    python -m benchmarks.run_benchmarks --sizes 100 1000      # only some sizes
+    python -m benchmarks.run_benchmarks --update-baseline     # save the results as new baseline
+
+Each result is the best of --repeat runs after a warm-up run, which keeps scheduling noise
+out of the comparison. Exits with status 1 when a result is slower than its baseline by more
+than --tolerance. Baselines depend on the machine and on the work done per device: update them
+when the benchmark host changes or when a change adds work on purpose.
+"""
+import argparse
+import json
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+from benchmarks.fake_device import make_fake_device, SHOW_VERSION, fake_serial
+from src.models.device import Device
+from src.parsers.cisco_ios_parser import parse_show_version
+from src.scanners.device_scanner import DeviceScanner
+from src.storage.file_storage import InventoryStreamWriter, save_inventory_to_json
+from src.utils.logger import configure_logging, shutdown_logging, log_context
+
+BASELINE_PATH = Path(__file__).parent / "baselines.json"
+DEFAULT_SIZES = (100, 1000, 10000, 50000)
+# Devices of the discarded first run
+WARMUP_SIZE = 100
+
+
+def make_devices(count):
+    return [
+        Device(hostname=f"SW-{i:05d}", mgmt_ip=f"10.{i // 65536}.{(i // 256) % 256}.{i % 256}",
+               site=f"site{i % 20}", role="access", os_type="cisco_ios")
+        for i in range(count)
+    ]
+
+
+def bench_scanner(size, workers, latency, jitter, failure_rate):
+    devices = make_devices(size)
+    device_class = make_fake_device(latency=latency, jitter=jitter, failure_rate=failure_rate)
+    scanner = DeviceScanner(workers=workers, device_factory=device_class)
+    start = time.perf_counter()
+    scanner.scan_all_devices(devices)
+    return size / (time.perf_counter() - start)
+
+
+def bench_parser(size):
+    outputs = [SHOW_VERSION.replace("{hostname}", f"SW-{i}").replace("{serial}", fake_serial(str(i)))
+               for i in range(size)]
+    start = time.perf_counter()
+    for each in outputs:
+        parse_show_version(each)
+    return size / (time.perf_counter() - start)
+
+
+def bench_storage(size):
+    devices = make_devices(size)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        start = time.perf_counter()
+        with InventoryStreamWriter(Path(tmp_dir) / "inventory.jsonl", batch_size=500) as writer:
+            for each in devices:
+                writer.write(each)
+        stream_rate = size / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        save_inventory_to_json(devices, size, output_dir=tmp_dir)
+        json_rate = size / (time.perf_counter() - start)
+    return stream_rate, json_rate
+
+
+def bench_logging(size):
+    """Log lines per second seen by the caller (writes happen in the listener thread)."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        configure_logging(log_file=Path(tmp_dir) / "bench.log", console=False)
+        logger = logging.getLogger("src.benchmarks")
+        start = time.perf_counter()
+        for i in range(size):
+            with log_context(device=f"SW-{i:05d}", site="bench"):
+                logger.info("scanned %s", i)
+        rate = size / (time.perf_counter() - start)
+        shutdown_logging()
+    return rate
+
+
+def _run_size(size, workers, latency, jitter, failure_rate):
+    stream_rate, json_rate = bench_storage(size)
+    return {
+        "scanner_devices_per_sec": bench_scanner(size, workers, latency, jitter, failure_rate),
+        "parser_parses_per_sec": bench_parser(size),
+        "storage_stream_devices_per_sec": stream_rate,
+        "storage_json_devices_per_sec": json_rate,
+        "logging_lines_per_sec": bench_logging(size),
+    }
+
+
+def run(sizes, workers, latency, jitter, failure_rate, repeat=1, warmup=WARMUP_SIZE):
+    """
+    Best rate of repeat runs for each benchmark and size, after one discarded warm-up run
+    of warmup devices (template compilation, first imports, thread start up).
+    """
+    if warmup:
+        _run_size(warmup, workers, latency, jitter, failure_rate)
+    results = {}
+    for size in sizes:
+        key = str(size)
+        print(f"--- {size} devices")
+        for _ in range(max(1, repeat)):
+            for name, value in _run_size(size, workers, latency, jitter, failure_rate).items():
+                best = results.setdefault(name, {})
+                best[key] = max(best.get(key, 0.0), value)
+        for name in results:
+            print(f"{name:35} {results[name][key]:12.1f}")
+    return results
+
+
+def compare(results, baselines, tolerance):
+    """Returns the list of regressions: results below baseline * (1 - tolerance)."""
+    regressions = []
+    for name, by_size in results.items():
+        for size, value in by_size.items():
+            baseline = baselines.get(name, {}).get(size)
+            if baseline and value < baseline * (1 - tolerance):
+                regressions.append(f"{name} at {size} devices: {value:.1f}/s, baseline {baseline:.1f}/s "
+                                   f"({(1 - value / baseline) * 100:.0f}% slower)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scanner, parser and storage throughput benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--workers", type=int, default=50, help="scanner workers (default: 50)")
+    parser.add_argument("--latency", type=float, default=0.001, help="fake device latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.001, help="fake device random extra latency in seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.02, help="share of fake devices failing to connect")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="runs of each benchmark, the best one is kept (default: 3)")
+    parser.add_argument("--tolerance", type=float, default=0.3,
+                        help="allowed slow down before failing, 0.3 = 30%% (default)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.workers, args.latency, args.jitter, args.failure_rate, repeat=args.repeat)
+
+    if args.update_baseline:
+        baselines = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+        for name, by_size in results.items():
+            baselines.setdefault(name, {}).update({size: round(value, 1) for size, value in by_size.items()})
+        args.baseline.write_text(json.dumps(baselines, indent=2) + "\n")
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"\nNo baseline in {args.baseline}, run with --update-baseline first")
+        return 0
+    regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+    for each in regressions:
+        print(f"REGRESSION: {each}")
+    if regressions:
+        return 1
+    print("\nNo regression")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
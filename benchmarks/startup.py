@@ -0,0 +1,85 @@
+"""
+Cold start time of the CLI commands, each run in a fresh interpreter.
+
+    python -m benchmarks.startup                  # check every command against its budget
+    python -m benchmarks.startup --repeat 10
+
+Exits with status 1 when a command starts slower than its budget (best of --repeat runs)
+or imports a module it should not need.
+"""
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+# Heavy packages only some commands need
+HEAVY_MODULES = ("netmiko", "paramiko", "textfsm", "pyarrow", "pandas", "tenacity")
+
+# command line -> (seconds budget, heavy modules it may import)
+COMMANDS = {
+    "--help": (0.25, ()),
+    "list --help": (0.25, ()),
+    "scan --help": (0.25, ()),
+    "diff --help": (0.25, ()),
+    "export --help": (0.25, ()),
+    "exec --help": (0.25, ()),
+    "list": (0.5, ()),
+}
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+sys.argv = ["main.py"] + sys.argv[1:]
+import main
+try:
+    main.main()
+except SystemExit:
+    pass
+print(json.dumps({"seconds": time.perf_counter() - start,
+                  "modules": [name for name in %r if name in sys.modules]}))
+"""
+
+
+def measure(command, repeat=5):
+    """
+    Returns:
+        tuple: (best time in seconds over repeat runs, heavy modules imported)
+    """
+    best = None
+    modules = []
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, "-c", _PROBE % (HEAVY_MODULES,)] + command.split(),
+            cwd=ROOT, capture_output=True, text=True, check=True
+        )
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        best = result["seconds"] if best is None else min(best, result["seconds"])
+        modules = result["modules"]
+    return best, modules
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CLI cold start benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per command, the best one counts (default: 5)")
+    args = parser.parse_args(argv)
+
+    failures = []
+    for command, (budget, allowed) in COMMANDS.items():
+        seconds, modules = measure(command, args.repeat)
+        unexpected = [name for name in modules if name not in allowed]
+        print(f"{command:20} {seconds * 1000:8.1f} ms  (budget {budget * 1000:.0f} ms)"
+              + (f"  imports {', '.join(unexpected)}" if unexpected else ""))
+        if seconds > budget:
+            failures.append(f"{command}: {seconds * 1000:.1f} ms, budget {budget * 1000:.0f} ms")
+        if unexpected:
+            failures.append(f"{command}: imports {', '.join(unexpected)}")
+    for each in failures:
+        print(f"REGRESSION: {each}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+import yaml
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USERNAME_REF = "DEFAULT_USERNAME"
+DEFAULT_PASSWORD_REF = "DEFAULT_PASSWORD"
+
+_environment_loaded = False
+
+
+def load_environment():
+    """Load .env into os.environ the first time secrets are needed, not when the module is imported."""
+    global _environment_loaded
+    if not _environment_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _environment_loaded = True
+
+
+@dataclass(frozen=True)
+class CredentialProfile:
+    """
+    Names of the secrets holding a username and a password (e.g. env var names).
+    Profiles are interned by CredentialProvider.profile(): every device using the same
+    secrets points to the same object.
+    """
+    username_ref: str = DEFAULT_USERNAME_REF
+    password_ref: str = DEFAULT_PASSWORD_REF
+
+
+class EnvBackend:
+    """Secrets from environment variables (and .env, loaded on first use)."""
+    def fetch_many(self, names):
+        load_environment()
+        return {name: os.environ.get(name) for name in names}
+
+
+class FileBackend:
+    """Secrets from a YAML or JSON file mapping secret names to values, read once."""
+    def __init__(self, path):
+        self.path = Path(path)
+        self._secrets = None
+
+    def fetch_many(self, names):
+        if self._secrets is None:
+            with open(self.path) as f:
+                self._secrets = yaml.safe_load(f) or {}
+        return {name: self._secrets.get(name) for name in names}
+
+
+class LocalVaultBackend:
+    """
+    Stand-in for a secrets vault, backed by a JSON file {"secrets": {name: value}}.
+    Like a real vault it is asked for a batch of secrets at once; requests counts the round trips.
+    """
+    def __init__(self, path):
+        self.path = Path(path)
+        self.requests = 0
+
+    def fetch_many(self, names):
+        self.requests += 1
+        with open(self.path) as f:
+            secrets = json.load(f).get("secrets", {})
+        return {name: secrets.get(name) for name in names}
+
+
+class CredentialProvider:
+    """
+    Resolve credential profiles once per run and keep the result.
+
+    Args:
+        backends: backends asked in order, the first one having a secret wins
+    """
+    def __init__(self, backends=None):
+        self.backends = backends if backends is not None else [EnvBackend()]
+        self._profiles = {}
+        self._secrets = {}
+        self._resolved = {}
+        self._lock = threading.Lock()
+
+    def profile(self, username_ref=None, password_ref=None):
+        key = (username_ref or DEFAULT_USERNAME_REF, password_ref or DEFAULT_PASSWORD_REF)
+        with self._lock:
+            if key not in self._profiles:
+                self._profiles[key] = CredentialProfile(*key)
+            return self._profiles[key]
+
+    def profile_for(self, device):
+        """Profile of a device dict (from YAML) or Device object."""
+        if isinstance(device, dict):
+            return self.profile(device.get("username"), device.get("password"))
+        profile = getattr(device, "credential_profile", None)
+        if profile is not None:
+            return profile
+        return self.profile(getattr(device, "username", None), getattr(device, "password", None))
+
+    def _fetch(self, names):
+        # Called with the lock held
+        missing = [name for name in names if name not in self._secrets]
+        for backend in self.backends:
+            if not missing:
+                break
+            found = backend.fetch_many(missing)
+            for name in missing:
+                if found.get(name):
+                    self._secrets[name] = found[name]
+            missing = [name for name in missing if name not in self._secrets]
+        for name in missing:
+            self._secrets[name] = None
+
+    def prefetch(self, profiles):
+        """Fetch the secrets of many profiles in one batch per backend."""
+        names = set()
+        for profile in profiles:
+            names.add(profile.username_ref)
+            names.add(profile.password_ref)
+        with self._lock:
+            self._fetch(sorted(names))
+
+    def resolve(self, profile):
+        """
+        Returns:
+            tuple: (username, password), None for a secret no backend has
+        """
+        credentials = self._resolved.get(profile)
+        if credentials is not None:
+            return credentials
+        with self._lock:
+            if profile not in self._resolved:
+                self._fetch([profile.username_ref, profile.password_ref])
+                for name in (profile.username_ref, profile.password_ref):
+                    if self._secrets[name] is None:
+                        logger.warning("No secret matching %s", name)
+                self._resolved[profile] = (self._secrets[profile.username_ref], self._secrets[profile.password_ref])
+            return self._resolved[profile]
+
+    def clear(self):
+        with self._lock:
+            self._secrets.clear()
+            self._resolved.clear()
+
+
+default_provider = CredentialProvider()
+
+
+def configure_backends(backends):
+    """Replace the backends of the default provider (drops what was already resolved)."""
+    default_provider.backends = backends
+    default_provider.clear()
@@ -1,11 +1,18 @@
+import hashlib
+import logging
+import pickle
 import yaml
 import os
 from pathlib import Path
-from dotenv import load_dotenv
+from config.credentials import default_provider, load_environment
 
-load_dotenv()
+# LibYAML (C) loader when PyYAML was built with it, many times faster than the pure Python one
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+CACHE_DIR = Path(__file__).parent.parent / "data" / "cache"
 
-def load_yaml_inventory(path=None):
+logger = logging.getLogger(__name__)
+
+def _inventory_path(path):
     if path is None:
         # Default behavior - user config/devices.yaml
         config_dir = Path(__file__).parent
@@ -13,13 +20,104 @@ def load_yaml_inventory(path=None):
     else:
         yaml_path = Path(path)
     if not yaml_path.exists():
-        print("File does not exist")
+        logger.warning("Inventory file %s does not exist", yaml_path)
         raise FileNotFoundError(f"Cannot find {yaml_path}")
-    with open(yaml_path, "r") as f:
-        raw_data = yaml.safe_load(f)
-        return raw_data.get("devices", [])
+    return yaml_path
+
+def load_yaml_inventory(path=None, use_cache=False, cache_dir=CACHE_DIR):
+    """
+    Load the devices list of a YAML inventory.
+
+    Args:
+        use_cache: keep the parsed devices in cache_dir and reuse them while the
+            file modification time and size don't change
+    """
+    yaml_path = _inventory_path(path)
+    if not use_cache:
+        try:
+            # Building objects straight from the parser events skips the node graph
+            return list(iter_yaml_inventory(yaml_path))
+        except yaml.YAMLError:
+            # Anchors/aliases: let PyYAML build the whole document
+            with open(yaml_path, "rb") as f:
+                raw_data = yaml.load(f, Loader=YAML_LOADER)
+                return raw_data.get("devices", [])
+
+    stat = yaml_path.stat()
+    key = (stat.st_mtime_ns, stat.st_size)
+    cache_dir = Path(cache_dir)
+    cache_path = cache_dir / f"inventory_{hashlib.sha1(str(yaml_path.resolve()).encode()).hexdigest()}.pickle"
+    if cache_path.exists():
+        try:
+            with open(cache_path, "rb") as f:
+                cached = pickle.load(f)
+            if cached["key"] == key:
+                return cached["devices"]
+        except Exception as e:
+            logger.warning("Ignoring unreadable inventory cache %s: %s", cache_path, e)
+
+    devices = load_yaml_inventory(yaml_path)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        pickle.dump({"key": key, "devices": devices}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, cache_path)
+    return devices
+
+def _build_from_events(loader, event):
+    # Build a Python object from parser events, resolving scalars like safe_load does
+    if isinstance(event, yaml.ScalarEvent):
+        tag = event.tag
+        if tag is None or tag == "!":
+            tag = loader.resolve(yaml.ScalarNode, event.value, event.implicit)
+        node = yaml.ScalarNode(tag, event.value, style=event.style)
+        constructor = loader.yaml_constructors.get(tag, loader.yaml_constructors[None])
+        return constructor(loader, node)
+    if isinstance(event, yaml.SequenceStartEvent):
+        items = []
+        while not loader.check_event(yaml.SequenceEndEvent):
+            items.append(_build_from_events(loader, loader.get_event()))
+        loader.get_event()
+        return items
+    if isinstance(event, yaml.MappingStartEvent):
+        mapping = {}
+        while not loader.check_event(yaml.MappingEndEvent):
+            key = _build_from_events(loader, loader.get_event())
+            mapping[key] = _build_from_events(loader, loader.get_event())
+        loader.get_event()
+        return mapping
+    raise yaml.YAMLError(f"Unsupported YAML construct in inventory: {event}")
+
+def iter_yaml_inventory(path=None):
+    """
+    Yield the devices of a YAML inventory one by one, without loading the whole file.
+    Anchors and aliases are not supported in this mode.
+    """
+    yaml_path = _inventory_path(path)
+    with open(yaml_path, "rb") as f:
+        loader = YAML_LOADER(f)
+        try:
+            loader.get_event()  # StreamStart
+            if loader.check_event(yaml.StreamEndEvent):
+                return
+            loader.get_event()  # DocumentStart
+            if not loader.check_event(yaml.MappingStartEvent):
+                return
+            loader.get_event()
+            while not loader.check_event(yaml.MappingEndEvent):
+                key = _build_from_events(loader, loader.get_event())
+                if key == "devices" and loader.check_event(yaml.SequenceStartEvent):
+                    loader.get_event()
+                    while not loader.check_event(yaml.SequenceEndEvent):
+                        yield _build_from_events(loader, loader.get_event())
+                    return
+                # Other top level keys (meta...) are read and dropped
+                _build_from_events(loader, loader.get_event())
+        finally:
+            loader.dispose()
 
 def load_dotenv_values():
+    load_environment()
     username = os.environ.get("DEFAULT_USERNAME")
     password = os.environ.get("DEFAULT_PASSWORD")
     return username, password
@@ -28,50 +126,14 @@ def get_device_credentials(device):
     """
     Get credentials for a device.
     Works with both dictionaries (from YAML) and Device objects.
-    
+
+    Secrets are resolved once per credential profile by config.credentials.default_provider,
+    so devices sharing the same username/password references cost a dict lookup.
+
     Args:
         device: Either a dict or Device object
-        
+
     Returns:
         tuple: (username, password)
     """
-    username = None
-    password = None
-    
-    # Check if it's a dictionary or an object
-    if isinstance(device, dict):
-        # Dictionary from YAML
-        device_username = device.get("username")
-        device_password = device.get("password")
-        device_hostname = device.get("hostname")
-    else:
-        # Device object
-        device_username = getattr(device, 'username', None)
-        device_password = getattr(device, 'password', None)
-        device_hostname = device.hostname
-    
-    # Get username (device-specific or default)
-    if not device_username:
-        username = os.environ.get("DEFAULT_USERNAME")
-    else:
-        # Device has custom username env var reference
-        value = os.environ.get(device_username)
-        if not value:
-            print(f"No environment variable matching {device_username} for {device_hostname}")
-            username = None
-        else:
-            username = value
-    
-    # Get password (device-specific or default)
-    if not device_password:
-        password = os.environ.get("DEFAULT_PASSWORD")
-    else:
-        # Device has custom password env var reference
-        value = os.environ.get(device_password)
-        if not value:
-            print(f"No environment variable matching {device_password} for {device_hostname}")
-            password = None
-        else:
-            password = value
-    
-    return username, password
+    return default_provider.resolve(default_provider.profile_for(device))
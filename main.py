@@ -1,32 +1,470 @@
+"""
+Network inventory tool.
+
+    python main.py list                     # devices of the inventory
+    python main.py scan --workers 20        # scan them (also: python main.py --workers 20)
+    python main.py diff OLD NEW             # what changed between two snapshots
+    python main.py export SNAPSHOT --parquet
+    python main.py exec "show ip int brief" --role core   # run commands on a selection of devices
+
+Each command only imports what it needs: netmiko, textfsm and pyarrow are loaded by the
+commands using them, so list, diff and --help start fast.
+"""
 import argparse
-from src.collectors.inventory_manager import InventoryManager
-from src.scanners.device_scanner import DeviceScanner
+import sys
+
+COMMANDS = ("list", "scan", "diff", "export", "exec")
+# Options of every command (add_logging_args), all followed by a value
+LOGGING_OPTIONS = ("--log-level", "--log-file", "--log-module")
+
+def add_logging_args(parser):
+    parser.add_argument("--log-level", default="INFO",
+                        help="level of the tool logs: DEBUG, INFO, WARNING... (default: INFO)")
+    parser.add_argument("--log-file", default="logs/inventory.log",
+                        help="JSON lines log file, rotated at 10 MB (default: logs/inventory.log)")
+    parser.add_argument("--log-module", action="append", default=[], metavar="MODULE=LEVEL",
+                        help="level of one module, e.g. src.network=DEBUG (can be repeated)")
+
+def build_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    add_logging_args(common)
+    parser = argparse.ArgumentParser(description="Network inventory scanner")
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+
+    list_parser = commands.add_parser("list", parents=[common], help="show the devices of the inventory")
+    list_parser.add_argument("--site", default=None, help="only the devices of this site")
+    list_parser.add_argument("--db", nargs="?", const="data/inventory.db", default=None, metavar="FILE",
+                             help="list the devices saved in a SQLite database instead of the YAML inventory")
+
+    scan_parser = commands.add_parser("scan", parents=[common], help="scan the devices of the inventory (default)")
+    scan_parser.add_argument("--workers", type=int, default=1,
+                             help="number of devices scanned at the same time (default: 1)")
+    scan_parser.add_argument("--site-limit", type=int, default=None,
+                             help="maximum number of devices scanned at the same time per site")
+    scan_parser.add_argument("--connect-rate", type=float, default=None,
+                             help="maximum number of new SSH connections per second")
+    scan_parser.add_argument("--async", dest="use_async", action="store_true",
+                             help="use the asyncio scanner, --workers is then the number of devices in flight")
+    scan_parser.add_argument("--timeout", type=float, default=120,
+                             help="seconds allowed to scan one device with --async (default: 120)")
+    scan_parser.add_argument("--no-raw-store", action="store_true",
+                             help="don't keep the raw command outputs in data/raw")
+    scan_parser.add_argument("--history", action="store_true",
+                             help="record uptime, CPU, memory and interface counters in data/timeseries")
+    scan_parser.add_argument("--resume", metavar="FILE", default=None,
+                             help="carry on an interrupted run, devices already in FILE are not scanned again")
+    scan_parser.add_argument("--batch-size", type=int, default=50,
+                             help="number of scanned devices written to the output file at once (default: 50)")
+    scan_parser.add_argument("--parquet", action="store_true",
+                             help="also save the snapshot as Parquet in output/parquet for reporting")
+    scan_parser.add_argument("--db", nargs="?", const="data/inventory.db", default=None, metavar="FILE",
+                             help="also save devices and scan history in a SQLite database (default: data/inventory.db)")
+    scan_parser.add_argument("--incremental", action="store_true",
+                             help="only fully scan devices whose uptime probe shows a change (needs --previous or --db)")
+    scan_parser.add_argument("--previous", metavar="FILE", default=None,
+                             help="snapshot (.json/.jsonl) holding the last scan results, used by --incremental")
+    scan_parser.add_argument("--max-age", type=float, default=24,
+                             help="with --incremental, hours after which a device is fully scanned anyway (default: 24)")
+    scan_parser.add_argument("--max-sessions", type=int, default=None,
+                             help="keep up to this many SSH sessions open and reuse them between commands")
+    scan_parser.add_argument("--profile", metavar="FILE", default=None,
+                             help="time each scan phase and save the run profile (JSON) to FILE")
+    scan_parser.add_argument("--prometheus", metavar="FILE", default=None,
+                             help="also write the scan phase timings in Prometheus text format to FILE")
+    scan_parser.add_argument("--credentials-file", metavar="FILE", default=None,
+                             help="YAML/JSON file of secrets, looked up before the environment")
+    scan_parser.add_argument("--vault", metavar="FILE", default=None,
+                             help="local vault file ({\"secrets\": {...}}), looked up before the environment")
+    scan_parser.add_argument("--retries", type=int, default=0,
+                             help="extra connection attempts after a timeout, with exponential backoff (default: 0)")
+    scan_parser.add_argument("--circuit-breaker", action="store_true",
+                             help="skip devices and sites that keep failing, state kept in data/circuit_state.json")
+    scan_parser.add_argument("--daemon", action="store_true",
+                             help="keep running and scan every device once per --interval, spread over the interval")
+    scan_parser.add_argument("--interval", type=float, default=60,
+                             help="with --daemon, minutes between two scans of the same device (default: 60)")
+    scan_parser.add_argument("--processes", type=int, default=None,
+                             help="split the inventory into shards scanned by this many worker processes")
+    scan_parser.add_argument("--shard-by", choices=("hash", "site"), default="hash",
+                             help="with --processes, shard on a hash of the hostname or keep each site together")
+
+    diff_parser = commands.add_parser("diff", parents=[common], help="show what changed between two snapshots")
+    diff_parser.add_argument("old", metavar="OLD", help="older snapshot (.json/.jsonl)")
+    diff_parser.add_argument("new", metavar="NEW", help="newer snapshot (.json/.jsonl)")
+    diff_parser.add_argument("--save", action="store_true", help="also save the change set in output/")
+
+    export_parser = commands.add_parser("export", parents=[common], help="copy a snapshot to Parquet or SQLite")
+    export_parser.add_argument("snapshot", metavar="SNAPSHOT", help="snapshot to export (.json/.jsonl)")
+    export_parser.add_argument("--parquet", action="store_true", help="add it to the Parquet dataset in output/parquet")
+    export_parser.add_argument("--db", nargs="?", const="data/inventory.db", default=None, metavar="FILE",
+                               help="save devices and scan history in a SQLite database (default: data/inventory.db)")
+
+    exec_parser = commands.add_parser("exec", parents=[common], help="run commands on a selection of devices")
+    exec_parser.add_argument("commands", nargs="+", metavar="COMMAND", help="commands run in order on each device")
+    for name in ("site", "role", "vendor", "os-type", "model", "hostname"):
+        exec_parser.add_argument(f"--{name}", action="append", default=None,
+                                 help=f"only the devices with this {name.replace('-', '_')} (can be repeated)")
+    exec_parser.add_argument("--serial-prefix", default=None, help="only the devices whose serial number starts with it")
+    exec_parser.add_argument("--db", nargs="?", const="data/inventory.db", default=None, metavar="FILE",
+                             help="select among the devices saved in a SQLite database, with their scanned "
+                                  "model and serial number, instead of the YAML inventory")
+    exec_parser.add_argument("--workers", type=int, default=10,
+                             help="number of devices worked on at the same time (default: 10)")
+    exec_parser.add_argument("--site-limit", type=int, default=None,
+                             help="maximum number of devices worked on at the same time per site")
+    exec_parser.add_argument("--connect-rate", type=float, default=None,
+                             help="maximum number of new SSH connections per second")
+    exec_parser.add_argument("--timeout", type=float, default=60,
+                             help="seconds allowed for each command (default: 60)")
+    exec_parser.add_argument("--output-dir", default=None, metavar="DIR",
+                             help="write one file per device in DIR instead of printing the outputs")
+    return parser
+
+# Scan options each scan mode can't apply, rejected instead of silently ignored
+UNSUPPORTED_OPTIONS = {
+    ("processes", "--processes"): (
+        ("circuit_breaker", "--circuit-breaker"), ("profile", "--profile"), ("prometheus", "--prometheus"),
+        ("resume", "--resume"), ("use_async", "--async"), ("daemon", "--daemon"),
+    ),
+    # The asyncio scanner only has the connection timeout and the raw store
+    ("use_async", "--async"): (
+        ("incremental", "--incremental"), ("circuit_breaker", "--circuit-breaker"),
+        ("max_sessions", "--max-sessions"), ("profile", "--profile"), ("prometheus", "--prometheus"),
+        ("history", "--history"), ("site_limit", "--site-limit"), ("connect_rate", "--connect-rate"),
+        ("retries", "--retries"), ("daemon", "--daemon"),
+    ),
+    # The daemon saves a JSON snapshot per cycle and --db after each scan, nothing else
+    ("daemon", "--daemon"): (
+        ("profile", "--profile"), ("prometheus", "--prometheus"), ("resume", "--resume"),
+        ("parquet", "--parquet"), ("batch_size", "--batch-size"),
+    ),
+}
+
+def check_scan_args(parser, args):
+    # An option counts as given when its value isn't the default one (e.g. --batch-size 50)
+    defaults = vars(parser.parse_args(["scan"]))
+    for (mode, mode_flag), options in UNSUPPORTED_OPTIONS.items():
+        if not getattr(args, mode):
+            continue
+        given = [flag for name, flag in options if getattr(args, name) not in (None, False, defaults[name])]
+        if given:
+            parser.error(f"{', '.join(given)} can't be used with {mode_flag}")
 
-def main():
+def _command_first(argv):
+    """
+    argv with the command first: logging options given before it ("--log-level DEBUG list")
+    are moved after it, and scan is added when there is no command.
+    """
+    position = 0
+    while position < len(argv):
+        token = argv[position]
+        if token in LOGGING_OPTIONS:
+            position += 2
+        elif token.split("=", 1)[0] in LOGGING_OPTIONS:
+            position += 1
+        else:
+            break
+    if position < len(argv) and argv[position] in COMMANDS:
+        return [argv[position]] + argv[:position] + argv[position + 1:]
+    if argv[:1] in (["-h"], ["--help"]):
+        return argv
+    # No command: scan, so "python main.py --workers 20" works as before
+    return ["scan"] + argv
+
+def parse_args(argv=None):
+    argv = _command_first(list(sys.argv[1:] if argv is None else argv))
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "scan":
+        check_scan_args(parser, args)
+    return args
+
+def setup_logging(args):
+    from src.utils.logger import configure_logging
+    module_levels = {}
+    for each in args.log_module:
+        name, _, level = each.partition("=")
+        module_levels[name] = level.upper()
+    configure_logging(level=args.log_level.upper(), log_file=args.log_file, module_levels=module_levels)
+
+def run_list(args):
+    from src.collectors.inventory_manager import InventoryManager
     manager = InventoryManager()
-    manager.load_from_yaml()
+    if args.db:
+        manager.load_from_db(args.db, site=args.site)
+    else:
+        manager.load_from_yaml(use_cache=True)
+        if args.site:
+            manager.devices = manager.find(site=args.site)
     manager.display_inventory()
-    
-    scanner = DeviceScanner()
-    scan_results = scanner.scan_all_devices(manager.devices)
+
+def run_diff(args):
+    from src.collectors.inventory_diff import diff_snapshots, save_changeset
+    changeset = diff_snapshots(args.old, args.new)
+    print(changeset)
+    if args.save:
+        save_changeset(changeset)
+
+def run_export(args):
+    from src.storage.file_storage import load_inventory_file
+    if not args.parquet and not args.db:
+        print("Nothing to do, give --parquet and/or --db")
+        return
+    if args.parquet:
+        # pyarrow is slow to import, only load it when asked
+        from src.storage.parquet_storage import convert_json_snapshot
+        convert_json_snapshot(args.snapshot)
+    if args.db:
+        from src.models.device import Device
+        from src.storage.sqlite_storage import InventoryDatabase
+        records, _ = load_inventory_file(args.snapshot)
+        devices = [Device.from_dict(each) for each in records]
+        with InventoryDatabase(args.db) as database:
+            database.save_devices(devices)
+        print(f"\n {len(devices)} devices saved to : {args.db}")
+
+def run_daemon(args, manager):
+    from src.scanners.device_scanner import DeviceScanner
+    from src.scanners.scan_daemon import ScanDaemon
+    from src.network.session_pool import SessionPool
+    from src.network.circuit_breaker import CircuitBreaker
+    from src.storage.raw_store import RawOutputStore
+    from src.storage.file_storage import save_inventory_to_json
+    from src.storage.sqlite_storage import InventoryDatabase
+    from src.storage.timeseries import TimeSeriesStore
+    session_pool = SessionPool(max_sessions=args.max_sessions) if args.max_sessions else None
+    circuit_breaker = CircuitBreaker() if args.circuit_breaker else None
+    database = InventoryDatabase(args.db) if args.db else None
+    scanner = DeviceScanner(
+        workers=args.workers,
+        site_limit=args.site_limit,
+        connect_rate=args.connect_rate,
+        raw_store=None if args.no_raw_store else RawOutputStore(),
+        incremental=args.incremental,
+        max_age=args.max_age * 3600,
+        session_pool=session_pool,
+        circuit_breaker=circuit_breaker,
+        retries=args.retries,
+        timeseries=TimeSeriesStore() if args.history else None
+    )
+
+    def on_result(device, output):
+        if database is not None:
+            database.save_devices([device])
+
+    def on_cycle(devices):
+        save_inventory_to_json(devices, len(devices))
+        if circuit_breaker is not None:
+            circuit_breaker.save()
+
+    daemon = ScanDaemon(scanner, manager, interval=args.interval * 60, on_result=on_result, on_cycle=on_cycle)
+    try:
+        daemon.run()
+    finally:
+        if session_pool is not None:
+            session_pool.close_all()
+        if circuit_breaker is not None:
+            circuit_breaker.save()
+        if database is not None:
+            database.close()
+
+def run_processes(args, manager):
+    from src.scanners.coordinator import run_sharded
+    from src.storage.file_storage import InventoryStreamWriter
+    # Plain values only: the worker processes build their own stores and session pool
+    scanner_options = {
+        "workers": args.workers,
+        "site_limit": args.site_limit,
+        "connect_rate": args.connect_rate,
+        "retries": args.retries,
+        "incremental": args.incremental,
+        "max_age": args.max_age * 3600,
+        "max_sessions": args.max_sessions,
+        "raw_store_dir": None if args.no_raw_store else "data/raw",
+        "timeseries_dir": "data/timeseries" if args.history else None,
+    }
+    manager.devices = run_sharded(manager.devices, processes=args.processes, by=args.shard_by,
+                                  scanner_options=scanner_options)
+    with InventoryStreamWriter(batch_size=args.batch_size) as writer:
+        for each in manager.devices:
+            writer.write(each)
+    failed = sum(1 for each in manager.devices if each.scan_status == "failed")
+    print("\nScan results:")
+    print(f"Success on : {len(manager.devices) - failed} devices")
+    print(f"Failed on : {failed} devices")
+    save_extra_outputs(args, manager)
+
+def run_scan(args):
+    from src.collectors.inventory_manager import InventoryManager
+    from src.storage.file_storage import InventoryStreamWriter, load_inventory_file
+    from config.credentials import EnvBackend, FileBackend, LocalVaultBackend, configure_backends
+
+    manager = InventoryManager()
+    manager.load_from_yaml(use_cache=True)
+    if args.incremental:
+        if args.previous:
+            previous_devices, _ = load_inventory_file(args.previous)
+        elif args.db:
+            from src.storage.sqlite_storage import InventoryDatabase
+            with InventoryDatabase(args.db) as database:
+                previous_devices = database.load_devices()
+        else:
+            previous_devices = []
+            print("No --previous snapshot or --db given, every device will be fully scanned")
+        print(f"Previous state found for {manager.apply_previous_state(previous_devices)} devices")
+    manager.display_inventory()
+
+    backends = []
+    if args.vault:
+        backends.append(LocalVaultBackend(args.vault))
+    if args.credentials_file:
+        backends.append(FileBackend(args.credentials_file))
+    if backends:
+        configure_backends(backends + [EnvBackend()])
+    # One batch per backend for the whole run instead of one lookup per device
+    manager.prefetch_credentials()
+
+    if args.daemon:
+        run_daemon(args, manager)
+        return
+
+    if args.processes:
+        run_processes(args, manager)
+        return
+
+    from src.storage.raw_store import RawOutputStore
+    from src.network.session_pool import SessionPool
+    from src.network.circuit_breaker import CircuitBreaker
+    from src.utils.metrics import ScanMetrics
+
+    # Each device is written as soon as its scan is done
+    writer = InventoryStreamWriter(path=args.resume, batch_size=args.batch_size, resume=args.resume is not None)
+    devices = [each for each in manager.devices if each.hostname not in writer.completed]
+    if len(devices) < manager.get_device_count():
+        print(f"Resuming {writer.path}: {manager.get_device_count() - len(devices)} devices already scanned")
+
+    def on_result(device, output):
+        writer.write(device)
+
+    raw_store = None if args.no_raw_store else RawOutputStore()
+    session_pool = SessionPool(max_sessions=args.max_sessions) if args.max_sessions else None
+    metrics = ScanMetrics() if args.profile or args.prometheus else None
+    circuit_breaker = CircuitBreaker() if args.circuit_breaker else None
+    timeseries = None
+    if args.history:
+        from src.storage.timeseries import TimeSeriesStore
+        timeseries = TimeSeriesStore()
+    with writer:
+        if args.use_async:
+            import asyncio
+            from src.scanners.async_device_scanner import AsyncDeviceScanner
+            scanner = AsyncDeviceScanner(max_concurrency=args.workers, timeout=args.timeout, raw_store=raw_store)
+            scan_results = asyncio.run(scanner.scan_all_devices_list(devices, on_result=on_result))
+        else:
+            from src.scanners.device_scanner import DeviceScanner
+            scanner = DeviceScanner(
+                workers=args.workers,
+                site_limit=args.site_limit,
+                connect_rate=args.connect_rate,
+                raw_store=raw_store,
+                incremental=args.incremental,
+                max_age=args.max_age * 3600,
+                session_pool=session_pool,
+                metrics=metrics,
+                circuit_breaker=circuit_breaker,
+                retries=args.retries,
+                timeseries=timeseries
+            )
+            scan_results = scanner.scan_all_devices(devices, on_result=on_result)
+    if session_pool is not None:
+        session_pool.close_all()
+    if circuit_breaker is not None:
+        circuit_breaker.save()
     success_device = []
+    skipped_device = []
     print(scan_results)
     for result in scan_results:
         device = result['device']
         output = result['output']
-        if output.get('success') == True:
+        if output.get('skipped'):
+            success_device.append(device.hostname)
+            skipped_device.append(device.hostname)
+            print(f"\nUnchanged {device.hostname}, full scan skipped")
+        elif output.get('success') == True:
             success_device.append(device.hostname)
             print(f"\nScanned {device.hostname}:")
             print(f"    Version output: {output['version']}")
-            print(f"    Inventory output: {len(output['inventory'])} characters")
+            print(f"    Inventory output: {len(output['modules'])} modules")
         else:
             print(f"Failed to scan device {device.hostname}: {output.get('error', 'Unknown error')}")
-    
+
     print("\nScan results:")
     print(f"Success on : {len(success_device)} devices")
+    if args.incremental:
+        print(f"Unchanged (full scan skipped) : {len(skipped_device)} devices")
     print(f"Failed on : {len(scan_results) - len(success_device)} devices")
 
-    manager.save_to_json()
-    
+    if metrics is not None:
+        if args.profile:
+            metrics.write_report(args.profile)
+        if args.prometheus:
+            metrics.write_prometheus(args.prometheus)
+
+    if args.resume:
+        # The devices scanned before the resume are only in the snapshot, the manager still
+        # holds what the inventory file says about them: export the snapshot instead
+        from src.models.device import Device
+        records, _ = load_inventory_file(writer.path)
+        manager.devices = [Device.from_dict(each) for each in records]
+    save_extra_outputs(args, manager)
+
+def save_extra_outputs(args, manager):
+    if args.parquet:
+        # pyarrow is slow to import, only load it when asked
+        from src.storage.parquet_storage import save_inventory_to_parquet
+        save_inventory_to_parquet(manager.devices)
+
+    if args.db:
+        manager.save_to_db(args.db)
+
+def run_exec(args):
+    from src.collectors.inventory_manager import InventoryManager
+    from src.scanners.bulk_runner import BulkRunner, FileSink, StdoutSink
+    manager = InventoryManager()
+    if args.db:
+        manager.load_from_db(args.db)
+    else:
+        manager.load_from_yaml(use_cache=True)
+    conditions = {name: getattr(args, name) for name in ("site", "role", "vendor", "os_type", "model", "hostname")
+                  if getattr(args, name)}
+    devices = manager.find(serial_prefix=args.serial_prefix, **conditions)
+    if not devices:
+        print("No device matches the selection")
+        return
+    manager.prefetch_credentials()
+    sink = FileSink(args.output_dir) if args.output_dir else StdoutSink()
+    runner = BulkRunner(workers=args.workers, command_timeout=args.timeout, site_limit=args.site_limit,
+                        connect_rate=args.connect_rate)
+    results = runner.run(devices, args.commands, sink)
+    failed = [each["device"].hostname for each in results if not each["output"]["success"]]
+    print(f"\nCommands run on {len(results) - len(failed)} of {len(results)} devices")
+    if failed:
+        print(f"Failed on : {', '.join(failed)}")
+    if args.output_dir:
+        print(f"Outputs saved in : {sink.output_dir}")
+
+COMMAND_FUNCTIONS = {
+    "list": run_list,
+    "scan": run_scan,
+    "diff": run_diff,
+    "export": run_export,
+    "exec": run_exec,
+}
+
+def main(argv=None):
+    args = parse_args(argv)
+    setup_logging(args)
+    COMMAND_FUNCTIONS[args.command](args)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,180 @@
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from src.storage.file_storage import load_inventory_file
+from src.utils.uptime import parse_uptime
+
+# Fields compared between two runs (uptime is handled separately: it changes on every scan)
+TRACKED_FIELDS = ("mgmt_ip", "site", "role", "vendor", "os_type", "os_version", "model",
+                  "serial_number", "collected_os_version", "scan_status", "modules")
+
+# Field change -> event name
+FIELD_EVENTS = {
+    "serial_number": "serial_changed",
+    "collected_os_version": "os_changed",
+    "scan_status": "status_changed",
+    "mgmt_ip": "ip_changed",
+    "model": "model_changed",
+    "modules": "modules_changed",
+}
+
+
+@dataclass
+class DeviceChange:
+    hostname: str
+    events: list
+    changes: dict
+    previous_hostname: str = None
+
+    def to_dict(self):
+        data = {"hostname": self.hostname, "events": self.events, "changes": self.changes}
+        if self.previous_hostname:
+            data["previous_hostname"] = self.previous_hostname
+        return data
+
+
+@dataclass
+class ChangeSet:
+    added: list = field(default_factory=list)
+    removed: list = field(default_factory=list)
+    changed: list = field(default_factory=list)
+    unchanged_count: int = 0
+
+    def is_empty(self):
+        return not (self.added or self.removed or self.changed)
+
+    def to_dict(self):
+        return {
+            "added": self.added,
+            "removed": self.removed,
+            "changed": [each.to_dict() for each in self.changed],
+            "unchanged_count": self.unchanged_count
+        }
+
+    def __str__(self):
+        lines = [f"Added: {len(self.added)} - Removed: {len(self.removed)} - "
+                 f"Changed: {len(self.changed)} - Unchanged: {self.unchanged_count}"]
+        for hostname in self.added:
+            lines.append(f"  + {hostname}")
+        for hostname in self.removed:
+            lines.append(f"  - {hostname}")
+        for each in self.changed:
+            name = each.hostname
+            if each.previous_hostname:
+                name = f"{each.previous_hostname} -> {each.hostname}"
+            details = ", ".join(f"{key}: {old} -> {new}" for key, (old, new) in each.changes.items())
+            lines.append(f"  ~ {name} [{', '.join(each.events)}] {details}")
+        return "\n".join(lines)
+
+
+def _as_dict(device):
+    return device if isinstance(device, dict) else device.to_dict()
+
+
+def _canonical_modules(modules):
+    # Same modules listed in another order or with keys in another order compare equal
+    return tuple(sorted(json.dumps(each, sort_keys=True) for each in modules or ()))
+
+
+def fingerprint(record):
+    """
+    Tuple of the tracked fields, modules in a canonical sorted JSON form: two records with
+    the same fingerprint have nothing to compare.
+    """
+    return tuple(_canonical_modules(record.get(name)) if name == "modules" else record.get(name)
+                 for name in TRACKED_FIELDS)
+
+
+def _compare(old, new, old_fingerprint, new_fingerprint):
+    changes = {}
+    events = []
+    if old_fingerprint != new_fingerprint:
+        for name, old_value, new_value in zip(TRACKED_FIELDS, old_fingerprint, new_fingerprint):
+            if old_value != new_value:
+                changes[name] = [old.get(name), new.get(name)]
+                if name in FIELD_EVENTS:
+                    events.append(FIELD_EVENTS[name])
+    if old.get("uptime") != new.get("uptime"):
+        old_uptime = parse_uptime(old.get("uptime"))
+        new_uptime = parse_uptime(new.get("uptime"))
+        # Uptime went down between the two scans: the device restarted
+        if old_uptime is not None and new_uptime is not None and new_uptime < old_uptime:
+            changes["uptime"] = [old.get("uptime"), new.get("uptime")]
+            events.append("rebooted")
+    return events, changes
+
+
+def diff_inventories(old_devices, new_devices):
+    """
+    Compare two runs. Devices are matched on hostname with a dict (hash join),
+    then the leftovers on serial number to catch renamed devices. Each record is
+    fingerprinted once while the dicts are built, fields are only compared one by one
+    when the fingerprints differ.
+
+    Args:
+        old_devices, new_devices: Device objects or device dicts
+
+    Returns:
+        ChangeSet
+    """
+    # hostname -> (record, fingerprint)
+    old_by_host = {}
+    for each in old_devices:
+        record = _as_dict(each)
+        old_by_host[record["hostname"]] = (record, fingerprint(record))
+    new_by_host = {}
+    for each in new_devices:
+        record = _as_dict(each)
+        new_by_host[record["hostname"]] = (record, fingerprint(record))
+
+    changeset = ChangeSet()
+    new_only = []
+    for hostname, (new, new_fingerprint) in new_by_host.items():
+        found = old_by_host.pop(hostname, None)
+        if found is None:
+            new_only.append((new, new_fingerprint))
+            continue
+        old, old_fingerprint = found
+        events, changes = _compare(old, new, old_fingerprint, new_fingerprint)
+        if changes:
+            changeset.changed.append(DeviceChange(hostname, events, changes))
+        else:
+            changeset.unchanged_count += 1
+
+    # old_by_host now only holds devices missing from the new run
+    old_by_serial = {record["serial_number"]: (record, digest)
+                     for record, digest in old_by_host.values() if record.get("serial_number")}
+    for new, new_fingerprint in new_only:
+        found = old_by_serial.pop(new.get("serial_number"), None) if new.get("serial_number") else None
+        if found is None:
+            changeset.added.append(new["hostname"])
+            continue
+        old, old_fingerprint = found
+        del old_by_host[old["hostname"]]
+        events, changes = _compare(old, new, old_fingerprint, new_fingerprint)
+        changeset.changed.append(DeviceChange(new["hostname"], ["renamed"] + events, changes, old["hostname"]))
+
+    changeset.removed.extend(old_by_host)
+    return changeset
+
+
+def diff_snapshots(old_path, new_path):
+    """Compare two snapshot files (.json or .jsonl)."""
+    old_devices, _ = load_inventory_file(old_path)
+    new_devices, _ = load_inventory_file(new_path)
+    return diff_inventories(old_devices, new_devices)
+
+
+def save_changeset(changeset, output_dir="output"):
+    timestamp = datetime.now()
+    output_path = Path(output_dir)
+    if not output_path.is_absolute():
+        output_path = Path(__file__).parent.parent.parent / output_path
+    output_path.mkdir(parents=True, exist_ok=True)
+    filepath = output_path / f"diff_{timestamp.strftime('%Y%m%d_%H%M%S')}.json"
+    data = {"metadata": {"generated_at": timestamp.isoformat()}, **changeset.to_dict()}
+    with open(filepath, "w") as f:
+        json.dump(data, f, indent=2)
+    print(f"\n Changes saved to : {filepath}")
+    return filepath
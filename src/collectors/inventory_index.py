@@ -0,0 +1,245 @@
+import bisect
+import threading
+
+# Fields with an exact match index
+INDEXED_FIELDS = ("hostname", "mgmt_ip", "site", "role", "vendor", "os_type", "model")
+
+
+class InventoryIndex:
+    """
+    Secondary indexes over a device list, kept up to date while the devices change.
+
+    The index registers on_change() as a listener of each device it holds, every change
+    of a field moves the device to its new index entry. Serial numbers are kept in
+    a sorted list so find(serial_prefix=...) is a binary search.
+    """
+    def __init__(self, devices=()):
+        self._lock = threading.RLock()
+        self._devices = {}
+        self._positions = {}
+        self._next_position = 0
+        self._by_field = {name: {} for name in INDEXED_FIELDS}
+        self._serials = []
+        self.rebuild(devices)
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __contains__(self, device):
+        return id(device) in self._positions
+
+    def _index(self, device, name, value):
+        self._by_field[name].setdefault(value, {})[id(device)] = device
+
+    def _unindex(self, device, name, value):
+        bucket = self._by_field[name].get(value)
+        if bucket is not None:
+            bucket.pop(id(device), None)
+            if not bucket:
+                del self._by_field[name][value]
+
+    def _index_serial(self, device, serial):
+        if serial:
+            bisect.insort(self._serials, (serial, id(device), device))
+
+    def _unindex_serial(self, device, serial):
+        if serial:
+            index = bisect.bisect_left(self._serials, (serial, id(device)))
+            if index < len(self._serials) and self._serials[index][1] == id(device):
+                del self._serials[index]
+
+    def _add(self, device):
+        if id(device) in self._positions:
+            return False
+        self._devices[id(device)] = device
+        self._positions[id(device)] = self._next_position
+        self._next_position += 1
+        device_id = id(device)
+        for name, index in self._by_field.items():
+            index.setdefault(getattr(device, name), {})[device_id] = device
+        device.add_listener(self.on_change)
+        return True
+
+    def add(self, device):
+        with self._lock:
+            if self._add(device):
+                self._index_serial(device, device.serial_number)
+
+    def rebuild(self, devices):
+        """Index devices instead of the current ones, the serial list is sorted once at the end."""
+        with self._lock:
+            self.clear()
+            for device in devices:
+                self._add(device)
+            self._serials = sorted((device.serial_number, device_id, device)
+                                   for device_id, device in self._devices.items() if device.serial_number)
+
+    def remove(self, device):
+        with self._lock:
+            if self._devices.pop(id(device), None) is None:
+                return
+            del self._positions[id(device)]
+            for name in INDEXED_FIELDS:
+                self._unindex(device, name, getattr(device, name))
+            self._unindex_serial(device, device.serial_number)
+            device.remove_listener(self.on_change)
+
+    def clear(self):
+        with self._lock:
+            for device in self._devices.values():
+                device.remove_listener(self.on_change)
+            self._devices.clear()
+            self._positions.clear()
+            self._by_field = {name: {} for name in INDEXED_FIELDS}
+            self._serials = []
+
+    def on_change(self, device, name, old, new):
+        if name in self._by_field:
+            with self._lock:
+                self._unindex(device, name, old)
+                self._index(device, name, new)
+        elif name == "serial_number":
+            with self._lock:
+                self._unindex_serial(device, old)
+                self._index_serial(device, new)
+
+    def _serial_prefix(self, prefix):
+        # Serials starting with prefix sort between prefix and prefix + the highest character
+        start = bisect.bisect_left(self._serials, (prefix,))
+        end = bisect.bisect_left(self._serials, (prefix + "\U0010ffff",))
+        return {device_id: device for _, device_id, device in self._serials[start:end]}
+
+    def _matches(self, name, value):
+        # One value or a list/tuple/set of accepted values
+        index = self._by_field[name]
+        if isinstance(value, (list, tuple, set, frozenset)):
+            found = {}
+            for each in value:
+                found.update(index.get(each, {}))
+            return found
+        return index.get(value, {})
+
+    def find(self, serial_prefix=None, **conditions):
+        """
+        Devices matching every condition, in the order they were added.
+
+        Args:
+            serial_prefix: only devices whose serial number starts with it
+            conditions: field=value (or field=[values...]), indexed fields are looked up
+                in their index, the others are checked on the remaining devices
+
+        Example:
+            find(site="PAR-01", role="access"), find(mgmt_ip="10.0.0.1"), find(serial_prefix="FOC")
+        """
+        with self._lock:
+            candidates = []
+            if serial_prefix is not None:
+                candidates.append(self._serial_prefix(serial_prefix))
+            others = {}
+            for name, value in conditions.items():
+                if name in self._by_field:
+                    candidates.append(self._matches(name, value))
+                else:
+                    others[name] = value
+            if candidates:
+                candidates.sort(key=len)
+                smallest, rest = candidates[0], candidates[1:]
+                found = [device for device_id, device in smallest.items()
+                         if all(device_id in each for each in rest)]
+            else:
+                found = list(self._devices.values())
+            for name, value in others.items():
+                accepted = value if isinstance(value, (list, tuple, set, frozenset)) else (value,)
+                found = [device for device in found if getattr(device, name) in accepted]
+            found.sort(key=lambda device: self._positions[id(device)])
+            return found
+
+    def get(self, hostname):
+        """Device with this hostname, None if there is none."""
+        bucket = self._by_field["hostname"].get(hostname)
+        if not bucket:
+            return None
+        return next(iter(bucket.values()))
+
+
+class IndexedDeviceList(list):
+    """
+    Device list keeping an InventoryIndex in step with it: devices appended, inserted,
+    removed or replaced are added to or removed from the index. Operations moving devices
+    around (insert, sort, slices...) rebuild it, so find() keeps returning the list order.
+
+    Pickled and copied as a plain list.
+    """
+    def __init__(self, devices=(), index=None):
+        super().__init__(devices)
+        self._index = InventoryIndex() if index is None else index
+        self._index.rebuild(self)
+
+    def __reduce_ex__(self, protocol):
+        return list, (list(self),)
+
+    def __copy__(self):
+        return list(self)
+
+    def _rebuild(self):
+        self._index.rebuild(self)
+
+    def _forget(self, devices):
+        # The same object can be in the list twice: it stays indexed while one copy is left
+        for device in devices:
+            if not any(each is device for each in self):
+                self._index.remove(device)
+
+    def append(self, device):
+        super().append(device)
+        self._index.add(device)
+
+    def extend(self, devices):
+        devices = list(devices)
+        super().extend(devices)
+        for device in devices:
+            self._index.add(device)
+
+    def __iadd__(self, devices):
+        self.extend(devices)
+        return self
+
+    def insert(self, position, device):
+        super().insert(position, device)
+        self._rebuild()
+
+    def remove(self, device):
+        removed = self[self.index(device)]
+        super().remove(device)
+        self._forget([removed])
+
+    def pop(self, position=-1):
+        device = super().pop(position)
+        self._forget([device])
+        return device
+
+    def clear(self):
+        super().clear()
+        self._index.clear()
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._rebuild()
+
+    def __delitem__(self, key):
+        removed = self[key] if isinstance(key, slice) else [self[key]]
+        super().__delitem__(key)
+        self._forget(removed)
+
+    def __imul__(self, count):
+        super().__imul__(count)
+        self._rebuild()
+        return self
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self._rebuild()
+
+    def reverse(self):
+        super().reverse()
+        self._rebuild()
@@ -1,32 +1,126 @@
+import logging
 from src.models.device import Device
 from src.storage.file_storage import save_inventory_to_json
-from config.settings import load_yaml_inventory, get_device_credentials
+from src.collectors.validation import validate_device, validate_devices
+from src.collectors.inventory_index import InventoryIndex, IndexedDeviceList
+from config.settings import load_yaml_inventory, iter_yaml_inventory
+from config.credentials import default_provider
+
+logger = logging.getLogger(__name__)
+
+# Fields filled by a scan, as opposed to the ones coming from the YAML inventory
+COLLECTED_FIELDS = ("model", "serial_number", "collected_os_version", "uptime", "last_scanned", "scan_status")
 
 class InventoryManager:
     def __init__(self):
-        self.devices = []
+        self._index = InventoryIndex()
+        self._devices = IndexedDeviceList(index=self._index)
+        self.invalid_devices = []
+
+    @property
+    def devices(self):
+        # A list telling the indexes about devices added or removed through it
+        # (append, remove, del...), see IndexedDeviceList
+        return self._devices
+
+    @devices.setter
+    def devices(self, devices):
+        # Every assignment rebuilds the indexes, changes made to the devices afterwards
+        # (scan results, apply_previous_state...) update them one field at a time
+        self._devices = IndexedDeviceList(devices, index=self._index)
+
+    def add_device(self, device):
+        self._devices.append(device)
+
+    def remove_device(self, device):
+        # By identity: another device can be equal to it (same fields)
+        for position, each in enumerate(self._devices):
+            if each is device:
+                del self._devices[position]
+                return
+        raise ValueError(f"{device.hostname} is not in the inventory")
+
+    def find(self, serial_prefix=None, **conditions):
+        """
+        Devices matching every condition, in inventory order, looked up in the indexes
+        (hostname, mgmt_ip, site, role, vendor, os_type, model, serial number prefix).
+
+        Example:
+            manager.find(site="PAR-01", role=["core", "distribution"])
+            manager.find(serial_prefix="FOC23")
+        """
+        return self._index.find(serial_prefix=serial_prefix, **conditions)
+
+    def get_device(self, hostname):
+        return self._index.get(hostname)
     
-    def load_from_yaml(self, path=None):
-        raw_devices = load_yaml_inventory(path)
+    def load_from_yaml(self, path=None, validate=True, use_cache=False):
+        """
+        Load the YAML inventory. With validate, devices breaking the rules of notes.md
+        are left out and kept with their errors in self.invalid_devices.
+        """
+        raw_devices = load_yaml_inventory(path, use_cache=use_cache)
+        if validate:
+            raw_devices, self.invalid_devices = validate_devices(raw_devices)
+            self._report_invalid(self.invalid_devices)
         self.devices = self._convert_to_devices(raw_devices)
         return self.devices
-    
+
+    def iter_from_yaml(self, path=None, validate=True):
+        """Yield Device objects one at a time while the YAML file is read (self.devices is not filled)."""
+        for raw in iter_yaml_inventory(path):
+            if validate:
+                errors = validate_device(raw)
+                if errors:
+                    self.invalid_devices.append((raw, errors))
+                    self._report_invalid([(raw, errors)])
+                    continue
+            yield self._convert_device(raw)
+
+    def _report_invalid(self, invalid_devices):
+        for raw, errors in invalid_devices:
+            logger.warning("Skipping invalid device %s: %s", raw.get('hostname'), '; '.join(errors))
+
+    def _convert_device(self, each):
+        return Device(
+            hostname=str(each.get("hostname")).strip(),
+            mgmt_ip=str(each.get("mgmt_ip")).strip(),
+            site=str(each.get("site")).strip(),
+            role=str(each.get("role")).strip(),
+            vendor=each.get("vendor") or None,
+            os_type=each.get("os_type") or None,
+            os_version=each.get("os_version") or None,
+            credential_profile=default_provider.profile(each.get("username"), each.get("password"))
+        )
+
     def _convert_to_devices(self, raw_devices):
-        devices = []
-        for each in raw_devices:
-            usern, passw = get_device_credentials(each)
-            device = Device(
-                hostname=each.get("hostname").strip(),
-                mgmt_ip=each.get("mgmt_ip").strip(),
-                site=each.get("site").strip(),
-                role=each.get("role").strip(),
-                vendor=each.get("vendor") or None,
-                os_type=each.get("os_type") or None,
-                os_version=each.get("os_version") or None
-            )
-            devices.append(device)
-        return devices
+        return [self._convert_device(each) for each in raw_devices]
     
+    def apply_previous_state(self, previous_devices):
+        """
+        Copy what the last run collected (model, serial, uptime...) onto the loaded devices,
+        matched on hostname. previous_devices can be Device objects or device dicts.
+        """
+        previous_by_host = {}
+        for each in previous_devices:
+            record = each if isinstance(each, dict) else each.to_dict()
+            previous_by_host[record["hostname"]] = record
+        count = 0
+        for device in self.devices:
+            record = previous_by_host.get(device.hostname)
+            if record is None:
+                continue
+            for name in COLLECTED_FIELDS:
+                setattr(device, name, record.get(name))
+            device.modules = record.get("modules") or []
+            count += 1
+        return count
+
+    def prefetch_credentials(self):
+        """Fetch the secrets of every credential profile in use, in one batch per backend."""
+        default_provider.prefetch({device.credential_profile or default_provider.profile_for(device)
+                                   for device in self.devices})
+
     def get_device_count(self):
         return len(self.devices)
     
@@ -36,4 +130,15 @@ class InventoryManager:
             print(device)
     
     def save_to_json(self):
-        save_inventory_to_json(self.devices, self.get_device_count())
\ No newline at end of file
+        save_inventory_to_json(self.devices, self.get_device_count())
+
+    def load_from_db(self, path="data/inventory.db", site=None):
+        from src.storage.sqlite_storage import InventoryDatabase
+        with InventoryDatabase(path) as database:
+            self.devices = database.load_devices(site)
+        return self.devices
+
+    def save_to_db(self, path="data/inventory.db"):
+        from src.storage.sqlite_storage import InventoryDatabase
+        with InventoryDatabase(path) as database:
+            database.save_devices(self.devices)
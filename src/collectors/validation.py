@@ -0,0 +1,53 @@
+import re
+
+# Rules from notes.md
+REQUIRED_FIELDS = ("hostname", "mgmt_ip", "site", "role")
+ALLOWED_ROLES = frozenset({"core", "access", "distribution", "firewall", "router"})
+
+_HOSTNAME = re.compile(r"[A-Za-z0-9][A-Za-z0-9._-]{0,62}")
+_IPV4 = re.compile(r"(?:(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)\.){3}(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)")
+_SITE = re.compile(r"[A-Za-z0-9_-]+")
+
+
+def validate_device(raw):
+    """
+    Check one device from the YAML inventory.
+
+    Returns:
+        list: error messages, empty when the device is valid
+    """
+    errors = []
+    values = {}
+    for name in REQUIRED_FIELDS:
+        value = raw.get(name)
+        if value is None or not str(value).strip():
+            errors.append(f"missing {name}")
+        else:
+            values[name] = str(value).strip()
+    if "hostname" in values and not _HOSTNAME.fullmatch(values["hostname"]):
+        errors.append(f"hostname {values['hostname']!r} contains characters that are not allowed")
+    if "mgmt_ip" in values and not _IPV4.fullmatch(values["mgmt_ip"]):
+        errors.append(f"mgmt_ip {values['mgmt_ip']!r} is not a valid IPv4 address")
+    if "site" in values and not _SITE.fullmatch(values["site"]):
+        errors.append(f"site {values['site']!r} must be a single word")
+    if "role" in values and values["role"] not in ALLOWED_ROLES:
+        errors.append(f"role {values['role']!r} must be one of {', '.join(sorted(ALLOWED_ROLES))}")
+    return errors
+
+
+def validate_devices(raw_devices):
+    """
+    Split raw devices in valid ones and invalid ones.
+
+    Returns:
+        tuple: (list of valid raw devices, list of (raw device, errors))
+    """
+    valid = []
+    invalid = []
+    for raw in raw_devices:
+        errors = validate_device(raw)
+        if errors:
+            invalid.append((raw, errors))
+        else:
+            valid.append(raw)
+    return valid, invalid
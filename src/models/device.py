@@ -1,8 +1,46 @@
-from dataclasses import dataclass, asdict
-from typing import Optional
+from dataclasses import dataclass, field, fields
+from typing import Any, Optional
 
-@dataclass
-class Device:
+_set_field = object.__setattr__
+
+
+class _Observable:
+    """
+    Holds the functions told about field changes, called with (device, field name,
+    old value, new value). Used by the InventoryManager indexes (add_listener/remove_listener).
+    """
+    __slots__ = ("_listeners",)
+
+    def __new__(cls, *args, **kwargs):
+        device = super().__new__(cls)
+        _set_field(device, "_listeners", ())
+        return device
+
+    def __setattr__(self, name, value):
+        listeners = self._listeners
+        if not listeners:
+            _set_field(self, name, value)
+            return
+        old = getattr(self, name, None)
+        _set_field(self, name, value)
+        if old != value:
+            for listener in listeners:
+                listener(self, name, old, value)
+
+    def __getstate__(self):
+        # Listeners belong to the process holding the indexes, they are not pickled or copied
+        slots = (name for cls in type(self).__mro__ for name in getattr(cls, "__slots__", ()))
+        return None, {name: getattr(self, name) for name in slots if name != "_listeners"}
+
+    def add_listener(self, listener):
+        _set_field(self, "_listeners", self._listeners + (listener,))
+
+    def remove_listener(self, listener):
+        _set_field(self, "_listeners", tuple(each for each in self._listeners if each != listener))
+
+
+@dataclass(slots=True)
+class Device(_Observable):
     hostname: str
     mgmt_ip: str
     site: str
@@ -16,6 +54,10 @@ class Device:
     uptime: Optional[str] = None
     last_scanned: Optional[str] = None
     scan_status: Optional[str] = None
+    # Parsed inventory command: [{"name", "description", "pid", "vid", "serial"}, ...]
+    modules: list = field(default_factory=list)
+    # CredentialProfile shared by every device using the same secrets, not part of the inventory data
+    credential_profile: Any = field(default=None, repr=False, compare=False, metadata={"serialize": False})
 
     def __str__(self):
         base = f"Device: {self.hostname} ({self.mgmt_ip}) - {self.site} - {self.role} - {self.os_type}"
@@ -45,4 +87,44 @@ class Device:
         return base
     
     def to_dict(self):
-        return asdict(self)
\ No newline at end of file
+        # Written out by hand: dataclasses.asdict deep copies every value and is much slower
+        return {
+            "hostname": self.hostname,
+            "mgmt_ip": self.mgmt_ip,
+            "site": self.site,
+            "role": self.role,
+            "os_type": self.os_type,
+            "vendor": self.vendor,
+            "os_version": self.os_version,
+            "model": self.model,
+            "serial_number": self.serial_number,
+            "collected_os_version": self.collected_os_version,
+            "uptime": self.uptime,
+            "last_scanned": self.last_scanned,
+            "scan_status": self.scan_status,
+            "modules": self.modules
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a Device from a dict made by to_dict() (unknown keys are ignored)."""
+        get = data.get
+        return cls(
+            hostname=get("hostname"),
+            mgmt_ip=get("mgmt_ip"),
+            site=get("site"),
+            role=get("role"),
+            os_type=get("os_type"),
+            vendor=get("vendor"),
+            os_version=get("os_version"),
+            model=get("model"),
+            serial_number=get("serial_number"),
+            collected_os_version=get("collected_os_version"),
+            uptime=get("uptime"),
+            last_scanned=get("last_scanned"),
+            scan_status=get("scan_status"),
+            modules=get("modules") or []
+        )
+
+# Fields written by to_dict() and stored by the storage backends
+FIELD_NAMES = tuple(each.name for each in fields(Device) if each.metadata.get("serialize", True))
\ No newline at end of file
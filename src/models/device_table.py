@@ -0,0 +1,61 @@
+from src.models.device import Device, FIELD_NAMES
+
+
+class DeviceTable:
+    """
+    Column oriented set of devices: one list per Device field instead of one object per device.
+    Cheaper to hold many snapshots in memory and to filter or export in bulk
+    (e.g. straight to pyarrow or pandas with to_columns()).
+    """
+    def __init__(self, columns=None):
+        if columns is None:
+            columns = {name: [] for name in FIELD_NAMES}
+        self.columns = columns
+
+    @classmethod
+    def from_devices(cls, devices):
+        table = cls()
+        for each in devices:
+            table.append(each)
+        return table
+
+    @classmethod
+    def from_dicts(cls, records):
+        columns = {name: [] for name in FIELD_NAMES}
+        for record in records:
+            for name in FIELD_NAMES:
+                columns[name].append(record.get(name))
+        return cls(columns)
+
+    def append(self, device):
+        for name in FIELD_NAMES:
+            self.columns[name].append(getattr(device, name))
+
+    def __len__(self):
+        return len(self.columns["hostname"])
+
+    def column(self, name):
+        return self.columns[name]
+
+    def row(self, index):
+        return Device(*(self.columns[name][index] for name in FIELD_NAMES))
+
+    def to_devices(self):
+        return [Device(*values) for values in zip(*(self.columns[name] for name in FIELD_NAMES))]
+
+    def to_dicts(self):
+        return [dict(zip(FIELD_NAMES, values)) for values in zip(*(self.columns[name] for name in FIELD_NAMES))]
+
+    def to_columns(self):
+        return self.columns
+
+    def take(self, indexes):
+        return DeviceTable({name: [values[i] for i in indexes] for name, values in self.columns.items()})
+
+    def filter(self, **conditions):
+        """Rows where every given field equals the value, e.g. filter(site="lab", role="access")."""
+        indexes = range(len(self))
+        for name, value in conditions.items():
+            values = self.columns[name]
+            indexes = [i for i in indexes if values[i] == value]
+        return self.take(list(indexes))
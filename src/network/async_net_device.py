@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import threading
+
+try:
+    import asyncssh
+except ImportError:
+    asyncssh = None
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncSSHTransport:
+    """
+    Non blocking SSH transport based on asyncssh.
+    Each command runs on its own exec channel, so no prompt handling or paging is needed.
+    """
+    def __init__(self, host, username, password, device_type, connect_timeout=30):
+        self.host = host
+        self.username = username
+        self.password = password
+        self.device_type = device_type
+        self.connect_timeout = connect_timeout
+        self.conn = None
+
+    async def connect(self):
+        self.conn = await asyncssh.connect(
+            self.host,
+            username=self.username,
+            password=self.password,
+            known_hosts=None,
+            connect_timeout=self.connect_timeout
+        )
+
+    async def send_command(self, command):
+        result = await self.conn.run(command, check=False)
+        return result.stdout
+
+    async def disconnect(self):
+        self.conn.close()
+        await self.conn.wait_closed()
+        self.conn = None
+
+
+class NetmikoThreadTransport:
+    """
+    Fallback when asyncssh is not installed: runs the blocking netmiko calls in threads.
+
+    Each device in flight holds a thread while it connects or waits for a command, so the
+    scanner gives it an executor with as many threads as devices scanned at the same time
+    (the default asyncio executor stops at a few dozen).
+
+    Args:
+        connect_timeout: netmiko conn_timeout
+        executor: concurrent.futures executor running the calls, the event loop default one when None
+    """
+    # Tells AsyncDeviceScanner to give it an executor sized to its concurrency
+    threaded = True
+
+    def __init__(self, host, username, password, device_type, connect_timeout=30, executor=None):
+        from src.network.net_device import NetDevice
+        self.device = NetDevice(host, username, password, device_type)
+        self.device.conn_timeout = connect_timeout
+        self.executor = executor
+        self._lock = threading.Lock()
+        self._abandoned = False
+        self._connected = False
+
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    def _connect_in_thread(self):
+        connected = self.device.connect()
+        with self._lock:
+            if self._abandoned:
+                # The scan gave up (timeout, cancel) while this thread was connecting
+                self.device.disconnect()
+                return False
+            self._connected = connected
+        return connected
+
+    async def connect(self):
+        try:
+            connected = await self._run(self._connect_in_thread)
+        except asyncio.CancelledError:
+            # The thread can't be stopped: the session is closed as soon as it is open
+            with self._lock:
+                self._abandoned = True
+                opened = self._connected
+            if opened:
+                asyncio.get_running_loop().run_in_executor(self.executor, self.device.disconnect)
+            raise
+        if not connected:
+            raise ConnectionError(self.device.error)
+
+    async def send_command(self, command):
+        return await self._run(self.device.send_command, command)
+
+    async def disconnect(self):
+        await self._run(self.device.disconnect)
+
+
+def default_transport():
+    if asyncssh is not None:
+        return AsyncSSHTransport
+    return NetmikoThreadTransport
+
+
+class AsyncNetDevice:
+    """
+    Same interface as NetDevice but every call is a coroutine.
+
+    Args:
+        transport: class building the SSH transport, picked by default_transport() if None
+        connect_timeout: seconds allowed to open the connection
+        executor: thread pool given to a threaded transport (see NetmikoThreadTransport)
+    """
+    def __init__(self, host, username, password, device_type, transport=None, connect_timeout=30, executor=None):
+        self.host = host
+        self.username = username
+        self.password = password
+        self.device_type = device_type
+        self.transport_class = transport or default_transport()
+        self.connect_timeout = connect_timeout
+        self.executor = executor
+        self.session = None
+        self.status = None
+        self.error = None
+
+    async def connect(self):
+        if self.session is not None:
+            return True
+        options = {"connect_timeout": self.connect_timeout}
+        if self.executor is not None:
+            options["executor"] = self.executor
+        session = self.transport_class(self.host, self.username, self.password, self.device_type, **options)
+        try:
+            await session.connect()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.status = "failed"
+            self.error = str(e) or type(e).__name__
+            logger.warning("Connection to device %s failed: %s", self.host, self.error)
+            return False
+        self.session = session
+        self.status = "success"
+        return True
+
+    async def send_command(self, command):
+        if self.session:
+            return await self.session.send_command(command)
+        return "Not connected to the device"
+
+    async def disconnect(self):
+        if self.session:
+            session = self.session
+            self.session = None
+            await session.disconnect()
@@ -0,0 +1,144 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+CLOSED = "closed"
+PROBE = "probe"
+OPEN = "open"
+
+# NetDevice.error_type values telling the device or its site is down. Other failures
+# (e.g. a wrong password) say nothing about reachability and are not counted.
+REACHABILITY_ERRORS = ("timeout", "unreachable")
+
+
+class CircuitBreaker:
+    """
+    Remember which devices and sites are down so the next runs don't wait a full
+    connection timeout on each of them again.
+
+    A device is opened (skipped) after failure_threshold failed connections in a row,
+    a site after site_failure_threshold failed devices in a row. Once the cool-down is
+    over, one probe attempt with a short timeout decides if it closes again.
+    The state, and an average connection latency per device used to size timeouts,
+    are saved in a JSON file between runs.
+
+    Args:
+        path: state file, data/circuit_state.json by default (None to keep it in memory)
+        probe_timeout: connection timeout used for a probe attempt
+        min_timeout, max_timeout: bounds of the timeout computed from latency history
+        timeout_factor: timeout = average connect latency * timeout_factor
+    """
+    def __init__(self, path="data/circuit_state.json", failure_threshold=3, cooldown=3600,
+                 site_failure_threshold=5, site_cooldown=900, probe_timeout=5,
+                 min_timeout=5, max_timeout=60, timeout_factor=3, clock=time.time):
+        if path is not None:
+            path = Path(path)
+            if not path.is_absolute():
+                path = Path(__file__).parent.parent.parent / path
+        self.path = path
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.site_failure_threshold = site_failure_threshold
+        self.site_cooldown = site_cooldown
+        self.probe_timeout = probe_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.timeout_factor = timeout_factor
+        self.clock = clock
+        self.devices = {}
+        self.sites = {}
+        self._site_probes = set()
+        self._lock = threading.Lock()
+        if self.path is not None and self.path.exists():
+            self.load()
+
+    def load(self):
+        with open(self.path) as f:
+            state = json.load(f)
+        self.devices = state.get("devices", {})
+        self.sites = state.get("sites", {})
+
+    def save(self):
+        if self.path is None:
+            return
+        with self._lock:
+            text = json.dumps({"devices": self.devices, "sites": self.sites}, indent=2)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+        os.replace(tmp_name, self.path)
+
+    def _device_state(self, device):
+        return self.devices.setdefault(device.mgmt_ip, {"failures": 0, "opened_at": None, "latency": None})
+
+    def _site_state(self, device):
+        return self.sites.setdefault(device.site, {"failures": 0, "opened_at": None})
+
+    def allow(self, device):
+        """
+        Returns:
+            str: CLOSED (scan normally), PROBE (one attempt with a short timeout) or OPEN (skip)
+        """
+        now = self.clock()
+        with self._lock:
+            site = self.sites.get(device.site)
+            if site and site["opened_at"] is not None:
+                if now - site["opened_at"] < self.site_cooldown or device.site in self._site_probes:
+                    return OPEN
+                # Cool-down over: let one device check if the site is back
+                self._site_probes.add(device.site)
+                return PROBE
+            state = self.devices.get(device.mgmt_ip)
+            if state and state["opened_at"] is not None:
+                if now - state["opened_at"] < self.cooldown:
+                    return OPEN
+                return PROBE
+            return CLOSED
+
+    def record_success(self, device, latency=None):
+        with self._lock:
+            state = self._device_state(device)
+            state["failures"] = 0
+            state["opened_at"] = None
+            if latency is not None:
+                # Moving average, recent connections count more
+                state["latency"] = latency if state["latency"] is None else 0.7 * state["latency"] + 0.3 * latency
+            site = self._site_state(device)
+            site["failures"] = 0
+            site["opened_at"] = None
+            self._site_probes.discard(device.site)
+
+    def record_failure(self, device, decision=CLOSED):
+        now = self.clock()
+        with self._lock:
+            state = self._device_state(device)
+            state["failures"] += 1
+            if decision == PROBE or state["failures"] >= self.failure_threshold:
+                state["opened_at"] = now
+            site = self._site_state(device)
+            site["failures"] += 1
+            if device.site in self._site_probes or site["failures"] >= self.site_failure_threshold:
+                site["opened_at"] = now
+                self._site_probes.discard(device.site)
+
+    def release_probe(self, device):
+        """The connection failed for a reason not counted (see REACHABILITY_ERRORS): let another device probe the site."""
+        with self._lock:
+            self._site_probes.discard(device.site)
+
+    def suggested_timeout(self, device, decision=CLOSED):
+        """Connection timeout for a device from its latency history, None when there is no history."""
+        with self._lock:
+            state = self.devices.get(device.mgmt_ip)
+            latency = state["latency"] if state else None
+        if latency is None:
+            timeout = None
+        else:
+            timeout = min(self.max_timeout, max(self.min_timeout, latency * self.timeout_factor))
+        if decision == PROBE:
+            return self.probe_timeout if timeout is None else min(timeout, self.probe_timeout)
+        return timeout
@@ -1,5 +1,10 @@
+import logging
+import re
+import time
 from netmiko import ConnectHandler, NetmikoTimeoutException, NetmikoAuthenticationException
 
+logger = logging.getLogger(__name__)
+
 class NetDevice:
     def __init__(self, host, username, password, device_type):
         self.host = host
@@ -9,38 +14,62 @@ class NetDevice:
         self.session = None
         self.status = None
         self.error = None
+        # "timeout", "unreachable", "auth" or "other" when connect() failed, timeouts are worth a retry
+        self.error_type = None
+        # Seconds to wait for the TCP connection, netmiko default when None
+        self.conn_timeout = None
     
     def connect(self):
         if self.session is None:
             try:
+                options = {}
+                if self.conn_timeout is not None:
+                    options["conn_timeout"] = self.conn_timeout
                 self.session = ConnectHandler(
                     device_type=self.device_type,
                     host=self.host,
                     username=self.username,
-                    password=self.password
+                    password=self.password,
+                    **options
                 )
                 self.status = "success"
-                print("Connection successful.")
+                self.error = None
+                self.error_type = None
+                logger.debug("Connected to %s", self.host)
                 return True
             except NetmikoTimeoutException as e:
                 self.status = "failed"
                 self.error = str(e)
-                print(f"Connection to device {self.host} timed out: {e}")
+                self.error_type = "timeout"
+                logger.warning("Connection to device %s timed out: %s", self.host, e)
                 return False
             except NetmikoAuthenticationException as e:
                 self.status = "failed"
                 self.error = str(e)
-                print(f"Authentication issue to device {self.host} failed: {e}")
+                self.error_type = "auth"
+                logger.warning("Authentication to device %s failed: %s", self.host, e)
+                return False
+            except OSError as e:
+                # Connection refused, no route to host...
+                self.status = "failed"
+                self.error = str(e)
+                self.error_type = "unreachable"
+                logger.warning("Device %s is unreachable: %s", self.host, e)
                 return False
             except Exception as e:
                 self.status = "failed"
                 self.error = str(e)
-                print(f"Connection to device {self.host} failed: {e}")
+                self.error_type = "other"
+                logger.warning("Connection to device %s failed: %s", self.host, e)
                 return False
         else:
-            print("Already connected.")
+            logger.debug("Already connected to %s", self.host)
             return True
     
+    def is_alive(self):
+        """Checks the SSH session is still usable (used by the session pool)."""
+        return self.session is not None and self.session.is_alive()
+
     def send_command(self, command):
         if self.session:
             output = self.session.send_command(command)
@@ -48,11 +77,64 @@ class NetDevice:
         else:
             return("Not connected to the device")
     
+    def stream_command(self, command, timeout=60, chunk_size=65536, poll_interval=0.05):
+        """
+        Run a command and yield its output as it arrives, in whole lines when possible,
+        without holding the full output in memory.
+
+        Args:
+            timeout: seconds allowed for the whole command, TimeoutError after that
+            chunk_size: a line longer than this is yielded in pieces
+
+        Raises:
+            ConnectionError: not connected
+            TimeoutError: the prompt did not come back in time
+        """
+        if not self.session:
+            raise ConnectionError("Not connected to the device")
+        session = self.session
+        # Same end of output test as netmiko send_command: the prompt back on the last line
+        prompt = re.compile(re.escape(session.base_prompt) + r"\S*[>#$%]\s*$")
+        session.clear_buffer()
+        session.write_channel(command + session.RETURN)
+        deadline = time.monotonic() + timeout
+        pending = ""
+        echo = True
+        while True:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"{command} on {self.host}: no prompt after {timeout} seconds")
+            data = session.read_channel()
+            if not data:
+                time.sleep(poll_interval)
+                continue
+            pending += data.replace("\r\n", "\n").replace("\r", "")
+            if echo:
+                # Drop the command echoed back by the device
+                if "\n" not in pending:
+                    continue
+                first, _, rest = pending.partition("\n")
+                if command in first:
+                    pending = rest
+                echo = False
+            end = pending.rfind("\n") + 1
+            last_line = pending[end:]
+            if prompt.match(last_line.strip()):
+                if end:
+                    yield pending[:end]
+                return
+            # Keep the last, maybe unfinished, line: it may be the prompt
+            if end:
+                yield pending[:end]
+                pending = last_line
+            elif len(pending) > chunk_size:
+                yield pending
+                pending = ""
+
     def disconnect(self):
         """Closes the connection."""
         if self.session:
             self.session.disconnect()
             self.session = None
-            print(f"Disconnected from {self.host}")
+            logger.debug("Disconnected from %s", self.host)
         else:
-            print("Not connected, nothing to disconnect.")
+            logger.debug("Not connected to %s, nothing to disconnect", self.host)
@@ -0,0 +1,175 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from src.network.net_device import NetDevice
+
+logger = logging.getLogger(__name__)
+
+
+class SessionPool:
+    """
+    Keep SSH sessions open between commands and scans instead of logging in every time.
+
+    Sessions are keyed by (host, username, password, device_type). A session is used by
+    one caller at a time: acquire() gives an idle session back when there is one, or
+    opens a new one. When max_sessions are open, the least recently used idle session is
+    closed to make room (or acquire waits for a session to be released).
+
+    Args:
+        max_sessions: maximum number of open sessions, idle or in use
+        idle_timeout: seconds after which an unused session is closed
+        health_check_interval: an idle session unused for longer than this is checked
+            with is_alive() before being handed out
+        device_factory: class used to open sessions, NetDevice by default
+    """
+    def __init__(self, max_sessions=100, idle_timeout=300, health_check_interval=30, device_factory=NetDevice):
+        self.max_sessions = max(1, max_sessions)
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.device_factory = device_factory
+        # key -> list of (device, last_used), least recently used key first
+        self._idle = OrderedDict()
+        self._in_use = 0
+        self._condition = threading.Condition()
+        self.stats = {"created": 0, "reused": 0, "evicted": 0, "expired": 0, "unhealthy": 0}
+
+    def _idle_count(self):
+        return sum(len(sessions) for sessions in self._idle.values())
+
+    def _close(self, device):
+        try:
+            device.disconnect()
+        except Exception as e:
+            logger.warning("Error while closing session to %s: %s", device.host, e)
+
+    def _pop_idle(self, key):
+        sessions = self._idle.get(key)
+        if not sessions:
+            return None
+        device, last_used = sessions.pop()
+        if not sessions:
+            del self._idle[key]
+        return device, last_used
+
+    def _expire_idle(self, now):
+        # Called with the lock held, returns the sessions to close outside of it
+        expired = []
+        for key in list(self._idle):
+            sessions = self._idle[key]
+            keep = [(device, last_used) for device, last_used in sessions if now - last_used < self.idle_timeout]
+            expired.extend(device for device, last_used in sessions if now - last_used >= self.idle_timeout)
+            if keep:
+                self._idle[key] = keep
+            else:
+                del self._idle[key]
+        self.stats["expired"] += len(expired)
+        return expired
+
+    def _evict_lru(self):
+        key = next(iter(self._idle))
+        device, _ = self._idle[key].pop(0)
+        if not self._idle[key]:
+            del self._idle[key]
+        self.stats["evicted"] += 1
+        return device
+
+    def acquire(self, host, username, password, device_type, before_connect=None, connect=None):
+        """
+        Get a connected session for a host.
+
+        Args:
+            before_connect: optional function called before opening a new connection
+                (e.g. a rate limiter), not called when an idle session is reused
+            connect: optional function opening a new connection, called with the device
+                and returning True when connected (e.g. to set a timeout or retry),
+                device.connect() when None
+
+        Returns:
+            tuple: (device, connected). When connected is False, device.status and
+            device.error tell why and the session must not be released.
+        """
+        key = (host, username, password, device_type)
+        while True:
+            to_close = []
+            full = False
+            with self._condition:
+                now = time.monotonic()
+                to_close.extend(self._expire_idle(now))
+                reused = self._pop_idle(key)
+                if reused is None and self._in_use + self._idle_count() >= self.max_sessions:
+                    if self._idle:
+                        to_close.append(self._evict_lru())
+                    else:
+                        full = True
+                if full:
+                    # Every session is in use: wait for a release, then look again
+                    self._condition.wait()
+                else:
+                    self._in_use += 1
+                    self.stats["reused" if reused is not None else "created"] += 1
+            for each in to_close:
+                self._close(each)
+            if full:
+                continue
+
+            if reused is not None:
+                device, last_used = reused
+                if now - last_used < self.health_check_interval or self._is_alive(device):
+                    device.pool_key = key
+                    return device, True
+                # Dead session: drop it and try again
+                with self._condition:
+                    self.stats["unhealthy"] += 1
+                self._close(device)
+                self._forget()
+                continue
+
+            device = self.device_factory(host, username, password, device_type)
+            if before_connect is not None:
+                before_connect()
+            connected = device.connect() if connect is None else connect(device)
+            if not connected:
+                self._forget()
+                return device, False
+            device.pool_key = key
+            return device, True
+
+    def _is_alive(self, device):
+        is_alive = getattr(device, "is_alive", None)
+        if is_alive is None:
+            return True
+        try:
+            return is_alive()
+        except Exception:
+            return False
+
+    def _forget(self):
+        with self._condition:
+            self._in_use -= 1
+            self._condition.notify()
+
+    def release(self, device, healthy=True):
+        """Give a session back. healthy=False closes it (e.g. after a command failed)."""
+        if not healthy:
+            self._close(device)
+            self._forget()
+            return
+        with self._condition:
+            self._in_use -= 1
+            self._idle.setdefault(device.pool_key, []).append((device, time.monotonic()))
+            self._idle.move_to_end(device.pool_key)
+            self._condition.notify()
+
+    def close_all(self):
+        with self._condition:
+            sessions = [device for entries in self._idle.values() for device, _ in entries]
+            self._idle.clear()
+        for each in sessions:
+            self._close(each)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close_all()
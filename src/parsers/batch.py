@@ -0,0 +1,81 @@
+import logging
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from src.parsers.registry import parse_output
+
+logger = logging.getLogger(__name__)
+
+# Below this many outputs, starting worker processes costs more than it saves
+MIN_PARALLEL_OUTPUTS = 64
+
+
+def _parse_one(platform, command, text):
+    try:
+        return parse_output(platform, command, text)
+    except Exception as e:
+        logger.warning("not able to parse this output : %s", e)
+        return None
+
+
+def parse_many(outputs, command, platform, workers=None, chunksize=None):
+    """
+    Parse many raw outputs of the same command, spread over several processes.
+    TextFSM is pure Python, so threads would all wait on the GIL.
+
+    Args:
+        outputs: iterable of raw command outputs
+        command: command the outputs come from, e.g. "show version"
+        platform: netmiko device type, e.g. "cisco_ios"
+        workers: number of processes (default: number of CPUs)
+        chunksize: number of outputs sent to a process at once (default: about 4 chunks per process)
+
+    Returns:
+        list: parsed records for each output, in the same order (None when an output can't be parsed)
+    """
+    outputs = list(outputs)
+    workers = workers or os.cpu_count() or 1
+    parse = partial(_parse_one, platform, command)
+
+    if workers == 1 or len(outputs) < MIN_PARALLEL_OUTPUTS:
+        return [parse(text) for text in outputs]
+
+    if chunksize is None:
+        chunksize = max(1, math.ceil(len(outputs) / (workers * 4)))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(parse, outputs, chunksize=chunksize))
+
+
+def parse_directory(path, command, platform, pattern="*.txt", workers=None, chunksize=None):
+    """
+    Re-parse every saved raw output matching pattern in a directory.
+
+    Returns:
+        dict: {file name: parsed records}, sorted by file name
+    """
+    files = sorted(Path(path).glob(pattern))
+    outputs = (each.read_text(errors="replace") for each in files)
+    results = parse_many(outputs, command, platform, workers=workers, chunksize=chunksize)
+    return {each.name: result for each, result in zip(files, results)}
+
+
+def parse_store(store, command, platform, hostname=None, workers=None, chunksize=None):
+    """
+    Re-parse the outputs of a command kept in a RawOutputStore, e.g. after a template fix.
+    Outputs are stored once per content, so each distinct output is loaded and parsed
+    once however many captures point to it.
+
+    Args:
+        store: RawOutputStore the scans saved their outputs in
+        hostname: only the captures of this device, every device when None
+
+    Returns:
+        list: [(capture, parsed records), ...] for store.captures(hostname, command), oldest first
+    """
+    captures = store.captures(hostname, command)
+    digests = list(dict.fromkeys(capture["digest"] for capture in captures))
+    outputs = (store.load(digest) for digest in digests)
+    parsed = dict(zip(digests, parse_many(outputs, command, platform, workers=workers, chunksize=chunksize)))
+    return [(capture, parsed[capture["digest"]]) for capture in captures]
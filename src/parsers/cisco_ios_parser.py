@@ -1,5 +1,7 @@
-import textfsm
-from pathlib import Path
+import logging
+from src.parsers.registry import parse_output
+
+logger = logging.getLogger(__name__)
 
 """
 Example output for show version on a cisco IOS Switch :
@@ -71,10 +73,6 @@ Switch Ports Model                     SW Version            SW Image
 Configuration register is 0xF
 """
 
-project_dir = Path(__file__).parent.parent.parent
-template_path = "/src/parsers/templates/"
-template_path = str(project_dir) + template_path
-
 def parse_show_version(text_to_parse):
     try:
         """
@@ -87,18 +85,14 @@ def parse_show_version(text_to_parse):
         - uptime
         """
 
-        with open(template_path +  "cisco_ios_show_version.template") as template:
-            fsm = textfsm.TextFSM(template)
-
-        parsed_output = fsm.ParseText(text_to_parse)
+        # Template is compiled once and cached by the registry
+        parsed_output = parse_output("cisco_ios", "show version", text_to_parse)
 
         if parsed_output:
-            keys = fsm.header  # Gets the column names from your template
-            parsed_output_dict = dict(zip(keys, parsed_output[0]))
-            return parsed_output_dict
+            return parsed_output[0]
         else:
             return None
 
     except Exception as e:
-        print(f"not able to parse this output : {e}")
+        logger.warning("not able to parse this output : %s", e)
         return None
\ No newline at end of file
@@ -0,0 +1,120 @@
+import csv
+import logging
+import pickle
+import re
+import threading
+from pathlib import Path
+
+try:
+    import ntc_templates
+except ImportError:
+    ntc_templates = None
+
+CACHE_DIR = Path(__file__).parent.parent.parent / "data" / "cache"
+
+logger = logging.getLogger(__name__)
+
+_COMPLETION = re.compile(r"\[\[(.+?)\]\]")
+
+
+def _expand_completion(command):
+    # Same syntax as textfsm.clitable: sh[[ow]] matches sh, sho and show
+    def expand(match):
+        chars = match.group(1)
+        return "".join(f"({re.escape(char)}" for char in chars) + ")?" * len(chars)
+    return _COMPLETION.sub(expand, command)
+
+
+def default_template_dir():
+    if ntc_templates is None:
+        return None
+    return Path(ntc_templates.__file__).parent / "templates"
+
+
+def read_index(template_dir):
+    """
+    Read the ntc-templates index file.
+
+    Returns:
+        dict: platform -> [(command regex, (template file, ...)), ...] in index order
+    """
+    entries = {}
+    with open(Path(template_dir) / "index", newline="") as f:
+        lines = (line for line in f if line.strip() and not line.startswith("#"))
+        reader = csv.reader(lines, skipinitialspace=True)
+        header = [name.strip() for name in next(reader)]
+        for row in reader:
+            record = dict(zip(header, (value.strip() for value in row)))
+            templates = tuple(record["Template"].split(":"))
+            entries.setdefault(record["Platform"], []).append((_expand_completion(record["Command"]), templates))
+    return entries
+
+
+class NtcIndex:
+    """
+    (platform, command) -> template lookup over the ntc-templates package.
+
+    The index file is read once and kept pickled in cache_dir (rebuilt when the index file
+    changes), command regexes are compiled per platform on first use and every lookup
+    result is remembered, so looking up a template costs one dict access after the first time.
+    Without ntc-templates installed the index is empty.
+    """
+    def __init__(self, template_dir=None, cache_dir=CACHE_DIR):
+        self.template_dir = Path(template_dir) if template_dir is not None else default_template_dir()
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self._entries = None
+        self._compiled = {}
+        self._lookups = {}
+        self._lock = threading.Lock()
+
+    def _load(self):
+        # Called with the lock held
+        if self._entries is not None:
+            return
+        if self.template_dir is None or not (self.template_dir / "index").exists():
+            self._entries = {}
+            return
+        stat = (self.template_dir / "index").stat()
+        key = (str(self.template_dir), stat.st_mtime_ns, stat.st_size)
+        cache_path = self.cache_dir / "ntc_index.pickle" if self.cache_dir is not None else None
+        if cache_path is not None and cache_path.exists():
+            try:
+                with open(cache_path, "rb") as f:
+                    cached = pickle.load(f)
+                if cached["key"] == key:
+                    self._entries = cached["entries"]
+                    return
+            except Exception as e:
+                logger.warning("Ignoring unreadable template index cache %s: %s", cache_path, e)
+        self._entries = read_index(self.template_dir)
+        if cache_path is not None:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(cache_path, "wb") as f:
+                pickle.dump({"key": key, "entries": self._entries}, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def platforms(self):
+        with self._lock:
+            self._load()
+            return sorted(self._entries)
+
+    def lookup(self, platform, command):
+        """
+        Returns:
+            Path: template of the first index entry matching the command, None if there is none
+        """
+        key = (platform, command.strip().lower())
+        if key in self._lookups:
+            return self._lookups[key]
+        with self._lock:
+            self._load()
+            if platform not in self._compiled:
+                self._compiled[platform] = [(re.compile(pattern), templates)
+                                            for pattern, templates in self._entries.get(platform, [])]
+            found = None
+            for pattern, templates in self._compiled[platform]:
+                if pattern.match(key[1]):
+                    # Entries merging several templates are not supported, the first one is used
+                    found = self.template_dir / templates[0]
+                    break
+            self._lookups[key] = found
+            return found
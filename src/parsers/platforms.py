@@ -0,0 +1,207 @@
+import logging
+from src.parsers.registry import parse_output
+
+logger = logging.getLogger(__name__)
+
+# Commands of a full scan for each os_type (netmiko device_type names)
+SCAN_COMMANDS = {
+    "cisco_ios": {"version": "show version", "inventory": "show inventory"},
+    "cisco_xe": {"version": "show version", "inventory": "show inventory"},
+    "cisco_nxos": {"version": "show version", "inventory": "show inventory"},
+    "arista_eos": {"version": "show version", "inventory": "show inventory"},
+    "juniper_junos": {"version": "show version", "inventory": "show chassis hardware"},
+}
+DEFAULT_OS_TYPE = "cisco_ios"
+
+# os_type whose outputs are parsed with the templates of another one
+TEMPLATE_PLATFORMS = {
+    "cisco_xe": "cisco_ios",
+}
+
+# Template Value names -> normalized field names, the first one found wins
+VERSION_FIELDS = {
+    "model": ("MODEL", "HARDWARE", "PLATFORM"),
+    "serial_number": ("SERIAL_NUMBER", "SERIAL"),
+    "os_version": ("OS_VERSION", "VERSION", "OS", "IMAGE", "JUNOS_VERSION"),
+    "uptime": ("UPTIME",),
+    "hostname": ("HOSTNAME",),
+}
+MODULE_FIELDS = {
+    "name": ("NAME", "PORT"),
+    "description": ("DESCR",),
+    "pid": ("PID",),
+    "vid": ("VID",),
+    "serial": ("SN",),
+}
+MODULE_KEYS = tuple(MODULE_FIELDS)
+
+
+def scan_commands(os_type):
+    """{"version": command, "inventory": command} of an os_type, the Cisco IOS ones if unknown."""
+    return SCAN_COMMANDS.get(os_type, SCAN_COMMANDS[DEFAULT_OS_TYPE])
+
+
+def _platform(os_type):
+    os_type = os_type if os_type in SCAN_COMMANDS else DEFAULT_OS_TYPE
+    return TEMPLATE_PLATFORMS.get(os_type, os_type)
+
+
+def _first(value):
+    # List values (e.g. HARDWARE on Cisco IOS) hold one entry per stack member
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if isinstance(value, str):
+        value = value.strip()
+    return value or None
+
+
+def _pick(record, names):
+    for name in names:
+        value = _first(record.get(name))
+        if value is not None:
+            return value
+    return None
+
+
+def parse_version(os_type, text):
+    """
+    Parse the version command output of any supported os_type.
+
+    Returns:
+        dict: model, serial_number, os_version, uptime and hostname (None when not found),
+        None when nothing could be parsed
+    """
+    try:
+        records = parse_output(_platform(os_type), scan_commands(os_type)["version"], text)
+    except Exception as e:
+        logger.warning("not able to parse this output : %s", e)
+        return None
+    if not records:
+        return None
+    return {field: _pick(records[0], names) for field, names in VERSION_FIELDS.items()}
+
+
+def _wide_modules(record):
+    # Templates like Junos "show chassis hardware" have one column group per component
+    # type (FPC_PART, FPC_SERIAL_NUMBER...) instead of one row per component
+    modules = []
+    for key in record:
+        if not key.endswith("_SERIAL_NUMBER") or not record[key]:
+            continue
+        prefix = key[:-len("_SERIAL_NUMBER")]
+        number = record.get(f"{prefix}_NUMBER")
+        modules.append({
+            "name": f"{prefix} {number}" if number else prefix,
+            "description": record.get(f"{prefix}_DESCRIPTION") or None,
+            "pid": record.get(f"{prefix}_PART") or None,
+            "vid": record.get(f"{prefix}_VERSION") or None,
+            "serial": record[key],
+        })
+    return modules
+
+
+def parse_inventory(os_type, text):
+    """
+    Parse the inventory command output of any supported os_type.
+
+    Returns:
+        list: one dict per module (name, description, pid, vid, serial), [] when nothing was parsed
+    """
+    try:
+        records = parse_output(_platform(os_type), scan_commands(os_type)["inventory"], text)
+    except Exception as e:
+        logger.warning("not able to parse this output : %s", e)
+        return []
+    modules = []
+    seen = set()
+    for record in records:
+        if "SN" in record:
+            found = [{field: _pick(record, names) for field, names in MODULE_FIELDS.items()}]
+        else:
+            found = _wide_modules(record)
+        for module in found:
+            # Filldown values repeat the same component on several records
+            key = (module["name"], module["serial"])
+            if key not in seen:
+                seen.add(key)
+                modules.append(module)
+    return modules
+
+
+# Extra commands run when the metrics history is kept (see TimeSeriesStore)
+METRIC_COMMANDS = {
+    "cisco_ios": ("show processes cpu", "show processes memory sorted", "show interfaces"),
+    "cisco_xe": ("show processes cpu", "show processes memory sorted", "show interfaces"),
+    "cisco_nxos": ("show processes cpu", "show interface"),
+    "arista_eos": ("show processes top once",),
+}
+# Interface counters summed over all the interfaces of a device
+COUNTER_FIELDS = {
+    "input_packets": "INPUT_PACKETS",
+    "output_packets": "OUTPUT_PACKETS",
+    "input_errors": "INPUT_ERRORS",
+    "output_errors": "OUTPUT_ERRORS",
+}
+
+
+def metric_commands(os_type):
+    """Commands collecting CPU, memory and interface counters, () when the os_type has none."""
+    return METRIC_COMMANDS.get(os_type, ())
+
+
+def _number(value):
+    value = _first(value)
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _cpu_percent(record):
+    for name in ("CPU_USAGE_5_MIN", "CPU_5_MIN"):
+        value = _number(record.get(name))
+        if value is not None:
+            return value
+    idle = _number(record.get("GLOBAL_CPU_PERCENT_IDLE"))
+    return None if idle is None else round(100 - idle, 2)
+
+
+def _memory_percent(record):
+    for used_name, total_name in (("MEMORY_USED", "MEMORY_TOTAL"), ("GLOBAL_MEM_USED", "GLOBAL_MEM_TOTAL")):
+        used, total = _number(record.get(used_name)), _number(record.get(total_name))
+        if used is not None and total:
+            return round(100 * used / total, 2)
+    return None
+
+
+def parse_metrics(os_type, outputs):
+    """
+    Parse the outputs of metric_commands(os_type).
+
+    Args:
+        outputs: {command: output}
+
+    Returns:
+        dict: cpu_percent, memory_percent and the COUNTER_FIELDS totals, only the ones found
+    """
+    metrics = {}
+    for command, text in outputs.items():
+        try:
+            records = parse_output(_platform(os_type), command, text)
+        except Exception as e:
+            logger.warning("not able to parse this output : %s", e)
+            continue
+        if not records:
+            continue
+        cpu = _cpu_percent(records[0])
+        if cpu is not None:
+            metrics["cpu_percent"] = cpu
+        memory = _memory_percent(records[0])
+        if memory is not None:
+            metrics["memory_percent"] = memory
+        for metric, name in COUNTER_FIELDS.items():
+            values = [_number(record.get(name)) for record in records if name in record]
+            values = [value for value in values if value is not None]
+            if values:
+                metrics[metric] = sum(values)
+    return metrics
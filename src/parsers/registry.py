@@ -0,0 +1,119 @@
+import io
+import os
+import threading
+import time
+import textfsm
+from pathlib import Path
+from src.parsers.ntc_index import NtcIndex
+
+TEMPLATE_DIR = Path(__file__).parent / "templates"
+
+# (platform, command) -> template file in TEMPLATE_DIR
+TEMPLATES = {
+    ("cisco_ios", "show version"): "cisco_ios_show_version.template",
+    ("cisco_ios", "show inventory"): "cisco_ios_show_inventory.template",
+}
+
+
+class _TemplateEntry:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.mtime = None
+        self.text = None
+        self.free = []
+        self.last_check = 0.0
+
+
+class ParserRegistry:
+    """
+    Keeps every TextFSM template compiled in memory, keyed by (platform, command).
+
+    A compiled FSM can only run one parse at a time, so parsed instances go back in a
+    free list and are reset before being reused: a template is compiled once per
+    parse running at the same time instead of once per parse.
+    Template files are reloaded when their mtime changes (checked at most every
+    reload_interval seconds).
+
+    Commands without a template of their own are looked up in fallback (the ntc-templates
+    index for the module level registry), local templates win over it.
+    """
+    def __init__(self, templates=None, template_dir=TEMPLATE_DIR, reload_interval=1.0, fallback=None):
+        self.template_dir = Path(template_dir)
+        self.reload_interval = reload_interval
+        self.fallback = fallback
+        self._entries = {}
+        self._lock = threading.Lock()
+        for (platform, command), template_file in (templates if templates is not None else TEMPLATES).items():
+            self.register(platform, command, template_file)
+
+    def register(self, platform, command, template_file):
+        path = Path(template_file)
+        if not path.is_absolute():
+            path = self.template_dir / path
+        with self._lock:
+            self._entries[(platform, command.strip().lower())] = _TemplateEntry(path)
+
+    def _entry(self, platform, command):
+        key = (platform, command.strip().lower())
+        entry = self._entries.get(key)
+        if entry is None and self.fallback is not None:
+            path = self.fallback.lookup(platform, command)
+            if path is not None:
+                with self._lock:
+                    entry = self._entries.setdefault(key, _TemplateEntry(path))
+        return entry
+
+    def has_template(self, platform, command):
+        return self._entry(platform, command) is not None
+
+    def _refresh(self, entry):
+        # Called with the lock held
+        now = time.monotonic()
+        if entry.text is not None and now - entry.last_check < self.reload_interval:
+            return
+        entry.last_check = now
+        mtime = os.stat(entry.path).st_mtime_ns
+        if mtime != entry.mtime:
+            entry.text = entry.path.read_text()
+            entry.mtime = mtime
+            entry.free = []
+
+    def _acquire(self, platform, command):
+        entry = self._entry(platform, command)
+        if entry is None:
+            raise ValueError(f"No template registered for {platform} / {command}")
+        with self._lock:
+            self._refresh(entry)
+            mtime = entry.mtime
+            if entry.free:
+                return entry, mtime, entry.free.pop()
+            text = entry.text
+        return entry, mtime, textfsm.TextFSM(io.StringIO(text))
+
+    def _release(self, entry, mtime, fsm):
+        with self._lock:
+            # Drop instances compiled from an old version of the template
+            if entry.mtime == mtime:
+                entry.free.append(fsm)
+
+    def parse(self, platform, command, text):
+        """
+        Parse text with the template of (platform, command).
+
+        Returns:
+            list: one dict per record, keys are the template Value names
+        """
+        entry, mtime, fsm = self._acquire(platform, command)
+        fsm.Reset()
+        rows = fsm.ParseText(text)
+        header = fsm.header
+        # Only put the FSM back once the parse succeeded, a failed one is just dropped
+        self._release(entry, mtime, fsm)
+        return [dict(zip(header, row)) for row in rows]
+
+
+registry = ParserRegistry(fallback=NtcIndex())
+
+
+def parse_output(platform, command, text):
+    return registry.parse(platform, command, text)
@@ -0,0 +1,137 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from src.network.async_net_device import AsyncNetDevice, default_transport
+from config.settings import get_device_credentials
+from src.utils.logger import log_context
+from src.parsers.platforms import scan_commands, parse_version, parse_inventory
+
+logger = logging.getLogger(__name__)
+
+class AsyncDeviceScanner:
+    """
+    Asyncio version of DeviceScanner, thousands of devices can be in flight on one event loop.
+
+    Args:
+        max_concurrency: maximum number of devices scanned at the same time
+        timeout: seconds allowed for one device (connect + commands), None for no limit
+        transport: transport class given to AsyncNetDevice, default_transport() by default
+        raw_store: RawOutputStore keeping the raw command outputs, None to discard them
+        connect_timeout: seconds allowed to open each connection, timeout by default
+    """
+    def __init__(self, max_concurrency=500, timeout=120, transport=None, raw_store=None, connect_timeout=None):
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout = timeout
+        self.transport = transport or default_transport()
+        self.raw_store = raw_store
+        self.connect_timeout = connect_timeout or timeout or 30
+        self._executor = None
+
+    async def _collect(self, device, target):
+        if not await target.connect():
+            return None
+        try:
+            commands = scan_commands(device.os_type)
+            version_output = await target.send_command(commands["version"])
+            inventory_output = await target.send_command(commands["inventory"])
+        finally:
+            await target.disconnect()
+        return version_output, inventory_output
+
+    async def scan_device(self, device):
+        username, password = get_device_credentials(device)
+        target = AsyncNetDevice(device.mgmt_ip, username, password, device.os_type, transport=self.transport,
+                                connect_timeout=self.connect_timeout, executor=self._executor)
+
+        try:
+            outputs = await asyncio.wait_for(self._collect(device, target), self.timeout)
+        except asyncio.TimeoutError:
+            target.status = "failed"
+            target.error = f"scan timed out after {self.timeout}s"
+            outputs = None
+        except Exception as e:
+            target.status = "failed"
+            target.error = str(e)
+            outputs = None
+
+        scan_time = datetime.now()
+        device.last_scanned = scan_time.isoformat()
+        if outputs is None:
+            logger.warning("Can't scan device %s: %s", device.hostname, target.error)
+            device.scan_status = "failed"
+            return {
+                'success': False,
+                'status': target.status,
+                'error': target.error
+            }
+
+        version_output, inventory_output = outputs
+        commands = scan_commands(device.os_type)
+        if self.raw_store is not None:
+            # Compressing and writing the files blocks, keep it off the event loop
+            await asyncio.to_thread(self.raw_store.save, device.hostname, commands["version"], version_output, scan_time)
+            await asyncio.to_thread(self.raw_store.save, device.hostname, commands["inventory"], inventory_output,
+                                    scan_time)
+        parsed_version_output = parse_version(device.os_type, version_output)
+        device.modules = parse_inventory(device.os_type, inventory_output)
+        if parsed_version_output is not None:
+            device.scan_status = "success"
+            device.model = parsed_version_output["model"]
+            device.serial_number = parsed_version_output["serial_number"]
+            device.collected_os_version = parsed_version_output["os_version"]
+            device.uptime = parsed_version_output["uptime"]
+        else:
+            device.scan_status = "partial"
+        return {
+            'success': True,
+            'version': parsed_version_output,
+            'inventory': inventory_output,
+            'modules': device.modules
+        }
+
+    async def _scan_as_completed(self, devices):
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        if getattr(self.transport, "threaded", False) and self._executor is None:
+            # One thread per device in flight, the default executor has a few dozen
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="async-scan")
+
+        async def run(index, device):
+            # Each task runs in its own copy of the context: the fields stay on this device
+            with log_context(device=device.hostname, site=device.site):
+                async with semaphore:
+                    return index, {"device": device, "output": await self.scan_device(device)}
+
+        tasks = [asyncio.ensure_future(run(index, each)) for index, each in enumerate(devices)]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield await finished
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if self._executor is not None:
+                # Threads still connecting for abandoned scans close their session on their own
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+    async def scan_all_devices(self, devices):
+        """
+        Async generator yielding {"device": device, "output": output} as soon as each scan finishes.
+        Closing the generator (or cancelling the task using it) cancels the scans still running.
+        """
+        async for _, result in self._scan_as_completed(devices):
+            yield result
+
+    async def scan_all_devices_list(self, devices, on_result=None):
+        """
+        Scan everything and return the results in the same order as devices.
+        on_result(device, output) is called as soon as each scan finishes.
+        """
+        devices = list(devices)
+        results = [None] * len(devices)
+        async for index, result in self._scan_as_completed(devices):
+            if on_result is not None:
+                on_result(result["device"], result["output"])
+            results[index] = result
+        return results
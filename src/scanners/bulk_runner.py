@@ -0,0 +1,232 @@
+import logging
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime
+from pathlib import Path
+from src.scanners.device_scanner import DeviceScanner
+from src.utils.logger import log_context
+
+logger = logging.getLogger(__name__)
+
+
+class OutputSink:
+    """
+    Where BulkRunner sends what it gets. Methods are called from the worker threads,
+    the chunks of one device always come from the same thread and in order.
+    """
+    def start_device(self, device):
+        pass
+
+    def start_command(self, device, command):
+        pass
+
+    def write(self, device, command, chunk):
+        pass
+
+    def end_command(self, device, command, result):
+        pass
+
+    def end_device(self, device, output):
+        pass
+
+    def close(self):
+        pass
+
+
+class CallbackSink(OutputSink):
+    """
+    Args:
+        on_chunk: optional function called with (device, command, chunk)
+        on_result: optional function called with (device, output) once a device is done
+    """
+    def __init__(self, on_chunk=None, on_result=None):
+        self.on_chunk = on_chunk
+        self.on_result = on_result
+
+    def write(self, device, command, chunk):
+        if self.on_chunk is not None:
+            self.on_chunk(device, command, chunk)
+
+    def end_device(self, device, output):
+        if self.on_result is not None:
+            self.on_result(device, output)
+
+
+class StdoutSink(OutputSink):
+    """Print every line as it arrives, prefixed with the hostname (lines of several devices interleave)."""
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self._lock = threading.Lock()
+
+    def _print(self, device, text):
+        prefix = f"{device.hostname} | "
+        lines = "".join(f"{prefix}{line}\n" for line in text.splitlines())
+        with self._lock:
+            self.stream.write(lines)
+            self.stream.flush()
+
+    def start_command(self, device, command):
+        self._print(device, f"### {command}")
+
+    def write(self, device, command, chunk):
+        self._print(device, chunk)
+
+    def end_command(self, device, command, result):
+        if result["status"] != "success":
+            self._print(device, f"!! {command}: {result['status']} {result.get('error') or ''}")
+
+
+class FileSink(OutputSink):
+    """
+    One text file per device, <output_dir>/<hostname>.txt, with a header line before
+    each command output.
+
+    Args:
+        output_dir: directory of the files, output/exec/<date_time> when None
+    """
+    def __init__(self, output_dir=None):
+        if output_dir is None:
+            output_dir = Path("output") / "exec" / datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self._files = {}
+        self._lock = threading.Lock()
+
+    def path(self, device):
+        return self.output_dir / f"{device.hostname}.txt"
+
+    def start_device(self, device):
+        with self._lock:
+            self._files[device.hostname] = open(self.path(device), "w", encoding="utf-8")
+
+    def start_command(self, device, command):
+        self._files[device.hostname].write(f"### {command}\n")
+
+    def write(self, device, command, chunk):
+        self._files[device.hostname].write(chunk)
+
+    def end_command(self, device, command, result):
+        f = self._files[device.hostname]
+        if result["status"] != "success":
+            f.write(f"!! {result['status']}: {result.get('error') or ''}\n")
+        f.write("\n")
+
+    def end_device(self, device, output):
+        with self._lock:
+            f = self._files.pop(device.hostname, None)
+        if f is not None:
+            f.close()
+
+    def close(self):
+        with self._lock:
+            files, self._files = list(self._files.values()), {}
+        for f in files:
+            f.close()
+
+
+class BulkRunner(DeviceScanner):
+    """
+    Run ad-hoc commands on many devices at once, e.g. "show ip int brief" on every core switch.
+
+    Connections work as for a scan (credentials, connect_rate, retries, session_pool,
+    circuit_breaker, site_limit: see DeviceScanner). Outputs are streamed to the sink
+    line by line as the devices send them, nothing is kept in memory: collect them in a
+    CallbackSink if needed.
+
+    Args:
+        command_timeout: seconds allowed for each command, the next commands of the device
+            are not run after a timeout
+        workers: number of devices worked on at the same time
+    """
+    def __init__(self, workers=10, command_timeout=60, **options):
+        super().__init__(workers=workers, **options)
+        self.command_timeout = command_timeout
+
+    def _stream(self, target, command):
+        stream_command = getattr(target, "stream_command", None)
+        if stream_command is None:
+            # Devices without streaming (e.g. test doubles) give the whole output at once
+            yield target.send_command(command)
+            return
+        yield from stream_command(command, timeout=self.command_timeout)
+
+    def run_device(self, device, commands, sink):
+        """
+        Run the commands on one device, one login, stopping at the first failed command.
+
+        Returns:
+            dict: {'success': bool, 'commands': {command: {'status', 'bytes', 'seconds', 'error'}}}
+                  or {'success': False, 'status': ..., 'error': ...} when the connection failed
+        """
+        target, status = self._open_with_breaker(device)
+        if target is None:
+            return {'success': False, 'status': "skipped", 'error': "circuit open: device or site marked down"}
+        if not status:
+            return {'success': False, 'status': target.status, 'error': target.error}
+        results = {}
+        healthy = True
+        try:
+            for command in commands:
+                result = {'status': "success", 'bytes': 0, 'seconds': None, 'error': None}
+                start = time.monotonic()
+                sink.start_command(device, command)
+                try:
+                    with self._phase(device, f"send_command:{command}"):
+                        for chunk in self._stream(target, command):
+                            result['bytes'] += len(chunk)
+                            sink.write(device, command, chunk)
+                except TimeoutError as e:
+                    result.update(status="timeout", error=str(e))
+                except Exception as e:
+                    result.update(status="failed", error=str(e))
+                result['seconds'] = round(time.monotonic() - start, 3)
+                results[command] = result
+                sink.end_command(device, command, result)
+                if result['status'] != "success":
+                    # Whatever is still coming from the device would end up in the next output
+                    healthy = False
+                    break
+        finally:
+            self._close(target, healthy)
+        return {'success': healthy, 'commands': results}
+
+    def _run_with_limits(self, device, commands, sink):
+        with log_context(device=device.hostname, site=device.site):
+            sink.start_device(device)
+            try:
+                with self._site_semaphore(device.site) if self.site_limit else nullcontext():
+                    output = self.run_device(device, commands, sink)
+            except Exception as e:
+                # One broken device must not stop the other workers
+                logger.exception("Unexpected error while running commands on %s: %s", device.hostname, e)
+                output = {'success': False, 'status': "failed", 'error': str(e)}
+            if not output['success'] and 'commands' not in output:
+                logger.warning("Can't run commands on %s: %s", device.hostname, output['error'])
+            sink.end_device(device, output)
+            return output
+
+    def run(self, devices, commands, sink=None):
+        """
+        Run commands on every device, workers devices at a time.
+
+        Args:
+            devices: Device list, e.g. InventoryManager.find(role="core")
+            commands: command list, run in order on each device
+            sink: OutputSink receiving the outputs, StdoutSink when None
+
+        Returns:
+            list: [{"device": device, "output": output}, ...] in the order of devices,
+            output as returned by run_device()
+        """
+        sink = StdoutSink() if sink is None else sink
+        devices = list(devices)
+        commands = list(commands)
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                outputs = list(executor.map(lambda device: self._run_with_limits(device, commands, sink), devices))
+        finally:
+            sink.close()
+        return [{"device": device, "output": output} for device, output in zip(devices, outputs)]
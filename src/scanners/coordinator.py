@@ -0,0 +1,344 @@
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from src.models.device import Device
+from src.scanners.sharding import SHARDERS
+from src.utils.logger import configure_logging, logging_settings, shutdown_logging
+from config.credentials import default_provider
+
+logger = logging.getLogger(__name__)
+
+
+class ShardCoordinator:
+    """
+    Hand out shards of the inventory to scanning workers through a SQLite queue, and gather
+    their results into one snapshot.
+
+    A worker claims a shard, heartbeats while it scans it and saves each device as soon as
+    it is scanned. A shard whose worker stopped heartbeating for lease_timeout seconds goes
+    back to the queue, and the next worker only scans the devices without a result yet.
+
+    Every worker process (or host sharing the file) opens its own ShardCoordinator on the
+    same database.
+
+    Args:
+        path: database file, data/coordinator.db by default
+        lease_timeout: seconds without heartbeat after which a shard is given to another worker
+    """
+    def __init__(self, path="data/coordinator.db", lease_timeout=60, clock=time.time):
+        path = Path(path)
+        if not path.is_absolute():
+            path = Path(__file__).parent.parent.parent / path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.lease_timeout = lease_timeout
+        self.clock = clock
+        self._lock = threading.Lock()
+        # Transactions are opened by hand (BEGIN IMMEDIATE) so two workers can't claim the same shard
+        self.conn = sqlite3.connect(str(path), timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self._create_schema()
+
+    def _create_schema(self):
+        with self._lock:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS shards ("
+                "run_id TEXT, shard_id INTEGER, devices TEXT, status TEXT, worker TEXT, "
+                "heartbeat_at REAL, attempts INTEGER DEFAULT 0, PRIMARY KEY (run_id, shard_id))"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "run_id TEXT, hostname TEXT, shard_id INTEGER, position INTEGER, device TEXT, "
+                "PRIMARY KEY (run_id, hostname))"
+            )
+
+    def _transaction(self, statements):
+        # statements: function running the queries, called inside one write transaction
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = statements()
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+            return result
+
+    def create_run(self, devices, shard_count, by="hash"):
+        """
+        Split devices into shard_count shards (by "hash" or "site") and queue them.
+
+        Returns:
+            str: id of the run, given to the workers
+        """
+        run_id = uuid.uuid4().hex[:12]
+        positions = {device.hostname: position for position, device in enumerate(devices)}
+        rows = []
+        for shard_id, shard in enumerate(SHARDERS[by](devices, shard_count)):
+            if not shard:
+                continue
+            entries = []
+            for device in shard:
+                profile = device.credential_profile or default_provider.profile_for(device)
+                entries.append({"position": positions[device.hostname], "device": device.to_dict(),
+                                "credentials": [profile.username_ref, profile.password_ref]})
+            rows.append((run_id, shard_id, json.dumps(entries), "pending"))
+
+        def insert():
+            self.conn.executemany("INSERT INTO shards (run_id, shard_id, devices, status) VALUES (?, ?, ?, ?)", rows)
+        self._transaction(insert)
+        return run_id
+
+    def claim(self, run_id, worker):
+        """
+        Give a pending shard, or one whose worker is gone, to worker.
+
+        Returns:
+            tuple: (shard_id, [(position, Device), ...]) of the devices still to scan,
+            None when no shard is left to claim
+        """
+        now = self.clock()
+
+        def take():
+            row = self.conn.execute(
+                "SELECT shard_id, devices FROM shards WHERE run_id = ? AND "
+                "(status = 'pending' OR (status = 'claimed' AND heartbeat_at < ?)) ORDER BY shard_id LIMIT 1",
+                (run_id, now - self.lease_timeout)
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute(
+                "UPDATE shards SET status = 'claimed', worker = ?, heartbeat_at = ?, attempts = attempts + 1 "
+                "WHERE run_id = ? AND shard_id = ?",
+                (worker, now, run_id, row["shard_id"])
+            )
+            done = {each["hostname"] for each in self.conn.execute(
+                "SELECT hostname FROM results WHERE run_id = ? AND shard_id = ?", (run_id, row["shard_id"]))}
+            return row["shard_id"], row["devices"], done
+
+        claimed = self._transaction(take)
+        if claimed is None:
+            return None
+        shard_id, entries, done = claimed
+        devices = []
+        for entry in json.loads(entries):
+            if entry["device"]["hostname"] in done:
+                continue
+            device = Device.from_dict(entry["device"])
+            device.credential_profile = default_provider.profile(*entry["credentials"])
+            devices.append((entry["position"], device))
+        return shard_id, devices
+
+    def heartbeat(self, run_id, shard_id, worker):
+        """Returns False when the shard was given to another worker in the meantime."""
+        def beat():
+            cursor = self.conn.execute(
+                "UPDATE shards SET heartbeat_at = ? WHERE run_id = ? AND shard_id = ? AND worker = ? "
+                "AND status = 'claimed'",
+                (self.clock(), run_id, shard_id, worker)
+            )
+            return cursor.rowcount == 1
+        return self._transaction(beat)
+
+    def record_result(self, run_id, shard_id, position, device, worker=None):
+        """
+        Save one scanned device. With worker, only while the shard is still claimed by it.
+
+        Returns:
+            bool: False when the result was not saved (shard given to another worker)
+        """
+        def insert():
+            if worker is not None:
+                owner = self.conn.execute(
+                    "SELECT 1 FROM shards WHERE run_id = ? AND shard_id = ? AND worker = ? AND status = 'claimed'",
+                    (run_id, shard_id, worker)
+                ).fetchone()
+                if owner is None:
+                    return False
+            self.conn.execute(
+                "INSERT OR REPLACE INTO results (run_id, hostname, shard_id, position, device) VALUES (?, ?, ?, ?, ?)",
+                (run_id, device.hostname, shard_id, position, json.dumps(device.to_dict()))
+            )
+            return True
+        return self._transaction(insert)
+
+    def complete(self, run_id, shard_id, worker):
+        def finish():
+            self.conn.execute(
+                "UPDATE shards SET status = 'done', heartbeat_at = ? WHERE run_id = ? AND shard_id = ? AND worker = ?",
+                (self.clock(), run_id, shard_id, worker)
+            )
+        self._transaction(finish)
+
+    def status(self, run_id):
+        """Number of shards per status, e.g. {"pending": 2, "claimed": 1, "done": 5}."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT status, COUNT(*) AS count FROM shards WHERE run_id = ? GROUP BY status", (run_id,)
+            ).fetchall()
+        return {row["status"]: row["count"] for row in rows}
+
+    def is_finished(self, run_id):
+        return set(self.status(run_id)) <= {"done"}
+
+    def merged_devices(self, run_id):
+        """Scanned devices of every shard, in the order they were given to create_run."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT device FROM results WHERE run_id = ? ORDER BY position", (run_id,)
+            ).fetchall()
+        return [Device.from_dict(json.loads(row["device"])) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def worker_name():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def build_scanner(options=None):
+    """
+    DeviceScanner from plain options, so they can be given to another process.
+
+    Args:
+        options: keyword arguments of DeviceScanner with plain values (workers, site_limit,
+            connect_rate, retries, incremental, max_age...), plus raw_store_dir and
+            timeseries_dir (directories of the stores, None for no store) and max_sessions
+            (size of a session pool, None for no pool)
+    """
+    # Imported here: the coordinator itself doesn't need netmiko
+    from src.scanners.device_scanner import DeviceScanner
+    options = dict(options or {})
+    raw_store_dir = options.pop("raw_store_dir", None)
+    timeseries_dir = options.pop("timeseries_dir", None)
+    max_sessions = options.pop("max_sessions", None)
+    if raw_store_dir is not None:
+        from src.storage.raw_store import RawOutputStore
+        options["raw_store"] = RawOutputStore(raw_store_dir)
+    if timeseries_dir is not None:
+        from src.storage.timeseries import TimeSeriesStore
+        options["timeseries"] = TimeSeriesStore(timeseries_dir)
+    if max_sessions:
+        from src.network.session_pool import SessionPool
+        pool_options = {"device_factory": options["device_factory"]} if "device_factory" in options else {}
+        options["session_pool"] = SessionPool(max_sessions=max_sessions, **pool_options)
+    return DeviceScanner(**options)
+
+
+def run_worker(path, run_id, scanner_options=None, lease_timeout=60, worker=None, log_settings=None):
+    """
+    Claim and scan shards of a run until none is left.
+
+    A shard whose lease was lost (no heartbeat in time, e.g. the process was paused) is
+    left to the worker now holding it: its remaining devices are not scanned here.
+
+    Args:
+        path: coordinator database shared by the workers
+        scanner_options: plain options of the scanner, see build_scanner()
+        log_settings: logging_settings() of the parent process, to log to the same file from
+            a worker process (the parent's logging thread doesn't exist in it)
+
+    Returns:
+        int: number of devices scanned by this worker
+    """
+    if log_settings is not None:
+        configure_logging(**log_settings)
+    try:
+        return _run_worker(path, run_id, scanner_options, lease_timeout, worker)
+    finally:
+        if log_settings is not None:
+            # A worker process ends with os._exit(): atexit doesn't flush the queue
+            shutdown_logging()
+
+
+def _run_worker(path, run_id, scanner_options, lease_timeout, worker):
+    worker = worker or worker_name()
+    scanner = build_scanner(scanner_options)
+    scanned = 0
+    try:
+        with ShardCoordinator(path, lease_timeout=lease_timeout) as coordinator:
+            while True:
+                claimed = coordinator.claim(run_id, worker)
+                if claimed is None:
+                    return scanned
+                shard_id, entries = claimed
+                positions = {id(device): position for position, device in entries}
+                stop = threading.Event()
+                lost = threading.Event()
+
+                def beat():
+                    while not stop.wait(max(1, lease_timeout / 3)):
+                        if not coordinator.heartbeat(run_id, shard_id, worker):
+                            lost.set()
+                            return
+
+                def on_result(device, output):
+                    if lost.is_set() or not coordinator.record_result(run_id, shard_id, positions[id(device)],
+                                                                      device, worker):
+                        lost.set()
+
+                heartbeat = threading.Thread(target=beat, daemon=True)
+                heartbeat.start()
+                try:
+                    scanner.scan_all_devices([device for _, device in entries], on_result=on_result, stop=lost)
+                finally:
+                    stop.set()
+                    heartbeat.join()
+                if lost.is_set():
+                    logger.warning("Worker %s: lost the lease of shard %s, left to its new worker", worker, shard_id)
+                    continue
+                coordinator.complete(run_id, shard_id, worker)
+                scanned += len(entries)
+                logger.info("Worker %s: shard %s done (%d devices)", worker, shard_id, len(entries))
+    finally:
+        if scanner.session_pool is not None:
+            scanner.session_pool.close_all()
+
+
+def run_sharded(devices, processes=4, shard_count=None, by="hash", path="data/coordinator.db",
+                scanner_options=None, lease_timeout=60):
+    """
+    Scan devices with several worker processes on this host and return the merged snapshot.
+
+    Other hosts can join the same run with run_worker(path, run_id) while it goes on.
+    scanner_options are sent to the worker processes: plain values only, see build_scanner().
+
+    Returns:
+        list: the scanned Device objects, in the same order as devices
+    """
+    devices = list(devices)
+    with ShardCoordinator(path, lease_timeout=lease_timeout) as coordinator:
+        # More shards than processes: a slow shard doesn't leave the other processes idle
+        run_id = coordinator.create_run(devices, shard_count or processes * 4, by=by)
+        logger.info("Run %s: %d devices, %d shards, %d workers", run_id, len(devices),
+                    coordinator.status(run_id).get("pending", 0), processes)
+        log_settings = logging_settings()
+        workers = [
+            multiprocessing.Process(target=run_worker, args=(path, run_id, scanner_options, lease_timeout),
+                                    kwargs={"log_settings": log_settings})
+            for _ in range(processes)
+        ]
+        for each in workers:
+            each.start()
+        for each in workers:
+            each.join()
+        if not coordinator.is_finished(run_id):
+            # A worker died: scan what it left in this process
+            run_worker(path, run_id, scanner_options, lease_timeout=0)
+        return coordinator.merged_devices(run_id)
@@ -1,53 +1,328 @@
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from src.network.net_device import NetDevice
+from src.utils.rate_limiter import RateLimiter
+from src.utils.logger import log_context
 from config.settings import get_device_credentials
 from datetime import datetime
-from src.parsers.cisco_ios_parser import parse_show_version
+from src.parsers.platforms import scan_commands, parse_version, parse_inventory, metric_commands, parse_metrics
+from src.utils.uptime import parse_uptime
+from src.network.circuit_breaker import OPEN, REACHABILITY_ERRORS
+from tenacity import Retrying, stop_after_attempt, wait_exponential, retry_if_result
+
+logger = logging.getLogger(__name__)
+
+# Cheap command telling if a device may have changed since the last scan
+PROBE_COMMANDS = {
+    "cisco_ios": "show version | include uptime",
+    "cisco_xe": "show version | include uptime",
+}
+_UPTIME_LINE = re.compile(r"\buptime is (.+)")
 
 class DeviceScanner:
-    def scan_device(self, device):
-        username, password = get_device_credentials(device)
+    """
+    Scan devices over SSH and update them with the collected data.
 
-        target = NetDevice(device.mgmt_ip, username, password, device.os_type)
+    Args:
+        workers: number of devices scanned at the same time (1 = one after the other)
+        site_limit: maximum number of devices scanned at the same time on one site
+        connect_rate: maximum number of new SSH connections per second, for all workers
+        device_factory: class used to open the connection, NetDevice by default
+        raw_store: RawOutputStore keeping the raw command outputs, None to discard them
+        incremental: only run the full scan when the probe command shows the device changed
+        max_age: with incremental, seconds after which a device is fully scanned anyway
+        session_pool: SessionPool to reuse SSH sessions between commands and scans,
+            None to log in and out for each scan
+        metrics: ScanMetrics timing each phase of each scan, None to skip timing
+        circuit_breaker: CircuitBreaker skipping devices and sites known to be down
+        retries: extra connection attempts after a timeout (not after an authentication failure)
+        retry_wait: seconds before the first retry, doubled at each attempt
+        timeseries: TimeSeriesStore recording uptime, CPU, memory and interface counters
+            at each scan, None to keep only the last uptime on the device
+    """
+    def __init__(self, workers=1, site_limit=None, connect_rate=None, device_factory=NetDevice, raw_store=None,
+                 incremental=False, max_age=86400, session_pool=None, metrics=None, circuit_breaker=None,
+                 retries=0, retry_wait=1.0, timeseries=None):
+        self.workers = max(1, workers)
+        self.site_limit = site_limit
+        self.rate_limiter = RateLimiter(connect_rate)
+        self.device_factory = device_factory
+        self.raw_store = raw_store
+        self.incremental = incremental
+        self.max_age = max_age
+        self.session_pool = session_pool
+        self.metrics = metrics
+        self.circuit_breaker = circuit_breaker
+        self.retries = retries
+        self.retry_wait = retry_wait
+        self.timeseries = timeseries
+        self._lock = threading.Lock()
+        self._site_semaphores = {}
 
-        status = target.connect()
-        if status:
-            version_output = target.send_command("show version")
-            inventory_output = target.send_command("show inventory")
-            parsed_version_output = parse_show_version(version_output)
+    def _phase(self, device, name):
+        if self.metrics is None:
+            return nullcontext()
+        return self.metrics.phase(device, name)
+
+    def _send(self, device, target, command):
+        with self._phase(device, f"send_command:{command}"):
+            return target.send_command(command)
+
+    def _update_device(self, device, **fields):
+        # Workers can run on the same Device object, write all fields in one go
+        with self._lock:
+            for key, value in fields.items():
+                setattr(device, key, value)
+
+    def _probe_uptime(self, device, target):
+        """Run the probe command, return the uptime string or None if it can't be read."""
+        output = self._send(device, target, PROBE_COMMANDS[device.os_type])
+        match = _UPTIME_LINE.search(output or "")
+        return match.group(1).strip() if match else None
+
+    def _needs_full_scan(self, device, probe_uptime):
+        # Nothing to compare with: the device has never been fully scanned
+        if device.scan_status != "success" or device.last_scanned is None or device.uptime is None:
+            return True
+        age = (datetime.now() - datetime.fromisoformat(device.last_scanned)).total_seconds()
+        if self.max_age is not None and age > self.max_age:
+            return True
+        previous = parse_uptime(device.uptime)
+        current = parse_uptime(probe_uptime)
+        # Uptime went down: the device rebooted, maybe on a new image
+        if previous is None or current is None or current < previous:
+            return True
+        return False
+
+    def _connect(self, target):
+        self.rate_limiter.acquire()
+        # Only the connection itself is timed: the circuit breaker sizes timeouts from it
+        start = time.monotonic()
+        connected = target.connect()
+        target.connect_seconds = time.monotonic() - start
+        return connected
+
+    def _connect_with_retry(self, target):
+        if not self.retries:
+            return self._connect(target)
+        retrying = Retrying(
+            stop=stop_after_attempt(self.retries + 1),
+            wait=wait_exponential(multiplier=self.retry_wait, max=60),
+            # Only timeouts are worth another try, a wrong password stays wrong
+            retry=retry_if_result(lambda connected: not connected and getattr(target, "error_type", None) == "timeout"),
+            retry_error_callback=lambda state: state.outcome.result()
+        )
+        return retrying(self._connect, target)
+
+    def _open(self, device, timeout=None):
+        """Returns (target, connected), from the session pool when there is one."""
+        with self._phase(device, "credentials"):
+            username, password = get_device_credentials(device)
+        def connect(target):
+            if timeout is not None:
+                target.conn_timeout = timeout
+            return self._connect_with_retry(target)
+
+        # netmiko opens TCP, negotiates SSH and authenticates in one call: it is timed as one phase
+        with self._phase(device, "connect"):
+            if self.session_pool is not None:
+                connects = []
+                target, status = self.session_pool.acquire(device.mgmt_ip, username, password, device.os_type,
+                                                           connect=lambda each: connects.append(each) or connect(each))
+                if not connects:
+                    # Idle session reused, no connection timed this time
+                    target.connect_seconds = None
+                return target, status
+            target = self.device_factory(device.mgmt_ip, username, password, device.os_type)
+            return target, connect(target)
+
+    def _close(self, target, healthy=True):
+        if self.session_pool is not None:
+            self.session_pool.release(target, healthy)
+        else:
             target.disconnect()
+
+    def run_commands(self, device, commands):
+        """
+        Run a list of commands on one login.
+
+        Returns:
+            dict: {'success': True, 'outputs': {command: output}} or
+                  {'success': False, 'status': ..., 'error': ...}
+        """
+        target, status = self._open_with_breaker(device)
+        if target is None:
+            return {'success': False, 'status': "skipped", 'error': "circuit open: device or site marked down"}
+        if not status:
+            return {'success': False, 'status': target.status, 'error': target.error}
+        outputs = {}
+        healthy = False
+        try:
+            for command in commands:
+                outputs[command] = self._send(device, target, command)
+            healthy = True
+        finally:
+            self._close(target, healthy)
+        return {'success': True, 'outputs': outputs}
+
+    def _open_with_breaker(self, device):
+        if self.circuit_breaker is None:
+            return self._open(device)
+        decision = self.circuit_breaker.allow(device)
+        if decision == OPEN:
+            return None, False
+        target, status = self._open(device, self.circuit_breaker.suggested_timeout(device, decision))
+        if status:
+            # None for a reused pool session: no connection was timed
+            self.circuit_breaker.record_success(device, getattr(target, "connect_seconds", None))
+        elif getattr(target, "error_type", None) in REACHABILITY_ERRORS:
+            self.circuit_breaker.record_failure(device, decision)
+        else:
+            # A wrong password says nothing about the device or its site being down
+            self.circuit_breaker.release_probe(device)
+        return target, status
+
+    def scan_device(self, device):
+        target, status = self._open_with_breaker(device)
+        if target is None:
+            # Known to be down: no connection attempt, last_scanned keeps the last real attempt
+            logger.info("Skipping %s, device or site %s is marked down", device.hostname, device.site)
+            self._update_device(device, scan_status="failed")
+            return {
+                'success': False,
+                'status': "skipped",
+                'error': "circuit open: device or site marked down"
+            }
+        if status and self.incremental and device.os_type in PROBE_COMMANDS:
+            try:
+                probe_uptime = self._probe_uptime(device, target)
+            except Exception:
+                self._close(target, healthy=False)
+                raise
+            if not self._needs_full_scan(device, probe_uptime):
+                self._close(target)
+                # last_scanned keeps the time of the last full scan so max_age still applies
+                self._update_device(device, uptime=probe_uptime)
+                self._record_metrics(device, {}, datetime.now())
+                return {
+                    'success': True,
+                    'skipped': True,
+                    'version': None,
+                    'inventory': None
+                }
+        if status:
+            commands = scan_commands(device.os_type)
+            try:
+                version_output = self._send(device, target, commands["version"])
+                inventory_output = self._send(device, target, commands["inventory"])
+                metric_outputs = {}
+                if self.timeseries is not None:
+                    for command in metric_commands(device.os_type):
+                        metric_outputs[command] = self._send(device, target, command)
+            except Exception:
+                self._close(target, healthy=False)
+                raise
+            self._close(target)
+            with self._phase(device, "parse"):
+                parsed_version_output = parse_version(device.os_type, version_output)
+                modules = parse_inventory(device.os_type, inventory_output)
+                metrics = parse_metrics(device.os_type, metric_outputs) if metric_outputs else {}
             scan_time = datetime.now()
-            device.last_scanned = scan_time.isoformat()
+            if self.raw_store is not None:
+                with self._phase(device, "persist_raw"):
+                    self.raw_store.save(device.hostname, commands["version"], version_output, scan_time)
+                    self.raw_store.save(device.hostname, commands["inventory"], inventory_output, scan_time)
             if parsed_version_output is not None:
-                device.scan_status = "success"
-                device.model = parsed_version_output["MODEL"]
-                device.serial_number = parsed_version_output["SERIAL_NUMBER"]
-                device.collected_os_version = parsed_version_output["OS_VERSION"]
-                device.uptime = parsed_version_output["UPTIME"]
+                self._update_device(
+                    device,
+                    last_scanned=scan_time.isoformat(),
+                    scan_status="success",
+                    model=parsed_version_output["model"],
+                    serial_number=parsed_version_output["serial_number"],
+                    collected_os_version=parsed_version_output["os_version"],
+                    uptime=parsed_version_output["uptime"],
+                    modules=modules
+                )
             if parsed_version_output is None:
-                device.scan_status = "partial"
+                self._update_device(device, last_scanned=scan_time.isoformat(), scan_status="partial",
+                                    modules=modules)
+            self._record_metrics(device, metrics, scan_time)
             return {
                 'success': True,
                 'version': parsed_version_output,
-                'inventory': inventory_output
+                'inventory': inventory_output,
+                'modules': modules,
+                'metrics': metrics
             }
         else:
-            print(f"Can't connect to device {device.hostname}")
+            logger.warning("Can't connect to device %s", device.hostname)
             scan_time = datetime.now()
-            device.last_scanned = scan_time.isoformat()
-            device.scan_status = "failed"
+            self._update_device(device, last_scanned=scan_time.isoformat(), scan_status="failed")
             return {
                 'success': False,
                 'status': target.status,
                 'error': target.error
             }
 
-    def scan_all_devices(self, devices):
-        outputs = []
-        for each in devices:
-            output = self.scan_device(each)
-            if output['success']:
-                outputs.append({"device": each, "output": output})
-            else:
-                print(f"Skipping device {each.hostname}")
-                outputs.append({"device": each, "output": output})
-        return outputs
+    def _record_metrics(self, device, metrics, scan_time):
+        if self.timeseries is None:
+            return
+        with self._phase(device, "persist_metrics"):
+            self.timeseries.append(device, {**metrics, "uptime_seconds": parse_uptime(device.uptime)}, scan_time)
+
+    def _site_semaphore(self, site):
+        with self._lock:
+            if site not in self._site_semaphores:
+                self._site_semaphores[site] = threading.BoundedSemaphore(self.site_limit)
+            return self._site_semaphores[site]
+
+    def _scan_with_limits(self, device):
+        try:
+            with log_context(device=device.hostname, site=device.site):
+                if self.site_limit:
+                    with self._site_semaphore(device.site):
+                        return self.scan_device(device)
+                return self.scan_device(device)
+        except Exception as e:
+            # One broken device must not stop the other workers
+            logger.exception("Unexpected error while scanning %s: %s", device.hostname, e)
+            self._update_device(device, last_scanned=datetime.now().isoformat(), scan_status="failed")
+            return {'success': False, 'status': "failed", 'error': str(e)}
+
+    def scan_all_devices(self, devices, on_result=None, stop=None):
+        """
+        Scan every device and return [{"device": device, "output": output}, ...]
+        in the same order as the devices list, whatever order the scans finish in.
+
+        Args:
+            on_result: optional function called with (device, output) as soon as each
+                scan finishes, from the worker thread that ran it
+            stop: optional threading.Event, devices not started yet when it is set are
+                not scanned (status "stopped")
+        """
+        def scan(device):
+            if stop is not None and stop.is_set():
+                return {'success': False, 'status': "stopped", 'error': "scan stopped"}
+            output = self._scan_with_limits(device)
+            if on_result is not None:
+                with self._phase(device, "persist"):
+                    on_result(device, output)
+            return output
+
+        devices = list(devices)
+        if self.workers == 1:
+            outputs = [scan(each) for each in devices]
+        else:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                outputs = list(executor.map(scan, devices))
+
+        results = []
+        for each, output in zip(devices, outputs):
+            if not output['success']:
+                logger.info("Skipping device %s", each.hostname)
+            results.append({"device": each, "output": output})
+        return results
@@ -0,0 +1,187 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Lower scans first when several devices are due at the same time
+ROLE_PRIORITY = {"core": 0, "router": 1, "firewall": 1, "distribution": 2, "access": 3}
+
+
+class ScanDaemon:
+    """
+    Keep scanning the inventory in a long running process instead of one run per cron job.
+
+    Every device is scanned once per interval. Scans are spread evenly over the interval
+    instead of all starting at once, in priority order: devices never scanned first, then
+    by staleness (how many whole intervals since the last scan), core before access within
+    the same staleness, the oldest scan first within the same role, and devices that keep
+    failing last.
+    A failing device also waits longer before its next attempt (interval * 2 ** failures,
+    up to max_backoff intervals).
+
+    The inventory is read again every reload_interval seconds (only new or removed devices
+    change the schedule). The process keeps the parser templates, the credentials and the
+    scanner session pool warm between scans.
+
+    Args:
+        scanner: DeviceScanner used for the scans, its workers scan the devices due together
+        manager: InventoryManager holding the devices
+        interval: seconds between two scans of the same device
+        reload_interval: seconds between two reads of the inventory file, None to never reload
+        on_result: optional function called with (device, output) after each scan
+        on_cycle: optional function called with the device list once per interval
+            (e.g. to save a snapshot)
+        clock: time source, time.monotonic by default
+    """
+    def __init__(self, scanner, manager, interval=3600, reload_interval=300, max_backoff=8,
+                 on_result=None, on_cycle=None, clock=time.monotonic):
+        self.scanner = scanner
+        self.manager = manager
+        self.interval = interval
+        self.reload_interval = reload_interval
+        self.max_backoff = max_backoff
+        self.on_result = on_result
+        self.on_cycle = on_cycle
+        self.clock = clock
+        self.failures = {}
+        self.scans = 0
+        self._devices = {}
+        self._queue = []
+        self._counter = itertools.count()
+        self._next_reload = None
+        self._next_cycle = None
+        self._stop = threading.Event()
+
+    def _priority(self, device, now):
+        if device.last_scanned is None:
+            age = float("inf")
+        else:
+            try:
+                age = (now - datetime.fromisoformat(device.last_scanned)).total_seconds()
+            except ValueError:
+                age = float("inf")
+        # Ages are grouped in whole intervals so the role decides between devices about as
+        # stale as each other, not only between devices scanned at the very same second
+        staleness = age if age == float("inf") else age // self.interval
+        role = ROLE_PRIORITY.get(device.role, len(ROLE_PRIORITY))
+        return (self.failures.get(device.hostname, 0), -staleness, role, -age)
+
+    def _push(self, due, device):
+        heapq.heappush(self._queue, (due, next(self._counter), device.hostname))
+
+    def schedule(self, devices, start=None):
+        """Spread devices over one interval from start, highest priority first."""
+        start = self.clock() if start is None else start
+        now = datetime.now()
+        devices = sorted(devices, key=lambda device: self._priority(device, now))
+        step = self.interval / len(devices) if devices else 0
+        for position, device in enumerate(devices):
+            self._devices[device.hostname] = device
+            self._push(start + position * step, device)
+
+    def start(self):
+        """Schedule the inventory already loaded in the manager."""
+        now = self.clock()
+        self._devices = {}
+        self._queue = []
+        self.schedule(self.manager.devices, now)
+        self._next_cycle = now + self.interval
+        if self.reload_interval is not None:
+            self._next_reload = now + self.reload_interval
+
+    def reload_inventory(self):
+        """
+        Read the inventory again, keep the state of known devices and schedule the new ones.
+        When the inventory can't be read (e.g. a YAML error while the file is being edited)
+        the error is logged and the daemon keeps scanning the devices it already has.
+        """
+        previous = list(self._devices.values())
+        try:
+            self.manager.load_from_yaml(use_cache=True)
+            self.manager.apply_previous_state(previous)
+            self.manager.prefetch_credentials()
+        except Exception as e:
+            logger.exception("Can't reload the inventory, keeping the %d devices already loaded: %s", len(previous), e)
+            self.manager.devices = previous
+            return
+        known = self._devices
+        self._devices = {}
+        added = []
+        for device in self.manager.devices:
+            if device.hostname in known:
+                self._devices[device.hostname] = device
+            else:
+                added.append(device)
+        # Removed devices stay in the queue and are dropped when they come out of it
+        removed = len(known) - len(self._devices)
+        if added:
+            self.schedule(added)
+        if added or removed:
+            logger.info("Inventory reloaded: %d new devices, %d removed", len(added), removed)
+
+    def _due(self, now):
+        devices = []
+        while self._queue and self._queue[0][0] <= now:
+            due, _, hostname = heapq.heappop(self._queue)
+            device = self._devices.get(hostname)
+            if device is not None:
+                devices.append((due, device))
+        return devices
+
+    def _reschedule(self, due, device, output):
+        if output.get("success"):
+            self.failures.pop(device.hostname, None)
+            delay = self.interval
+        else:
+            failures = self.failures.get(device.hostname, 0) + 1
+            self.failures[device.hostname] = failures
+            delay = self.interval * min(2 ** failures, self.max_backoff)
+        # From the planned time, not the end of the scan, so the spread doesn't drift
+        self._push(max(due + delay, self.clock()), device)
+
+    def run_pending(self):
+        """
+        Scan the devices whose time has come.
+
+        Returns:
+            list: [{"device": device, "output": output}, ...] of the devices scanned
+        """
+        now = self.clock()
+        if self._next_reload is not None and now >= self._next_reload:
+            self.reload_inventory()
+            self._next_reload = now + self.reload_interval
+        due = self._due(now)
+        results = []
+        if due:
+            results = self.scanner.scan_all_devices([device for _, device in due], on_result=self.on_result)
+            for (planned, device), result in zip(due, results):
+                self._reschedule(planned, device, result["output"])
+            self.scans += len(results)
+        if self._next_cycle is not None and now >= self._next_cycle:
+            self._next_cycle += self.interval
+            if self.on_cycle is not None:
+                self.on_cycle(list(self._devices.values()))
+        return results
+
+    def seconds_until_next(self):
+        if not self._queue:
+            return self.interval
+        return max(0.0, self._queue[0][0] - self.clock())
+
+    def run(self, max_wait=60):
+        """Scan until stop() is called (or Ctrl+C)."""
+        self.start()
+        logger.info("Scan daemon started: %d devices every %s seconds", len(self._devices), self.interval)
+        try:
+            while not self._stop.is_set():
+                self.run_pending()
+                self._stop.wait(min(self.seconds_until_next(), max_wait))
+        except KeyboardInterrupt:
+            logger.info("Scan daemon stopped")
+
+    def stop(self):
+        self._stop.set()
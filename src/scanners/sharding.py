@@ -0,0 +1,57 @@
+import bisect
+import hashlib
+
+
+def _hash(key):
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """
+    Consistent hash ring: adding or removing a shard only moves the devices of that shard,
+    the others keep the shard (and so the worker) they had.
+
+    Args:
+        shards: shard names
+        replicas: points per shard on the ring, more points spread the devices more evenly
+    """
+    def __init__(self, shards, replicas=100):
+        self._points = []
+        self._owners = []
+        points = sorted((_hash(f"{shard}#{index}"), shard) for shard in shards for index in range(replicas))
+        for point, shard in points:
+            self._points.append(point)
+            self._owners.append(shard)
+
+    def shard_for(self, key):
+        index = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[index]
+
+
+def shard_by_hash(devices, count, replicas=100):
+    """Split devices into count shards on a consistent hash of the hostname."""
+    ring = HashRing(range(count), replicas)
+    shards = [[] for _ in range(count)]
+    for device in devices:
+        shards[ring.shard_for(device.hostname)].append(device)
+    return shards
+
+
+def shard_by_site(devices, count):
+    """
+    Split devices into count shards keeping each site in a single shard (so per site limits
+    still hold), the biggest sites first, each going to the least loaded shard.
+    """
+    sites = {}
+    for device in devices:
+        sites.setdefault(device.site, []).append(device)
+    shards = [[] for _ in range(count)]
+    for site_devices in sorted(sites.values(), key=len, reverse=True):
+        min(shards, key=len).extend(site_devices)
+    return shards
+
+
+SHARDERS = {
+    "hash": shard_by_hash,
+    "site": shard_by_site,
+}
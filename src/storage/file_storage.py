@@ -1,4 +1,6 @@
 import json
+import os
+import threading
 from datetime import datetime
 from pathlib import Path
 
@@ -32,4 +34,141 @@ def save_inventory_to_json(devices, count, output_dir="output"):
         json.dump(output_data, f, indent=2)
     
     print(f"\n Inventory saved to : {filepath}")
-    return filepath
\ No newline at end of file
+    return filepath
+
+class InventoryStreamWriter:
+    """
+    Write the inventory as JSON Lines while the scan runs: one device per line,
+    then a last {"metadata": {...}} line once every device is written.
+    A crash only loses the devices still in the buffer, and resume=True carries
+    on an interrupted file instead of starting again.
+
+    Args:
+        path: file to write, output/inventory_<timestamp>.jsonl when None
+        batch_size: number of devices buffered before writing them to disk
+        resume: keep the devices already in path and append the new ones
+    """
+    def __init__(self, path=None, output_dir="output", batch_size=50, resume=False):
+        self.started_at = datetime.now()
+        if path is None:
+            project_dir = Path(__file__).parent.parent.parent
+            output_path = project_dir / output_dir
+            output_path.mkdir(parents=True, exist_ok=True)
+            path = output_path / f"inventory_{self.started_at.strftime('%Y%m%d_%H%M%S')}.jsonl"
+        self.path = Path(path)
+        self.batch_size = max(1, batch_size)
+        self.completed = set()
+        self.count = 0
+        self._buffer = []
+        self._lock = threading.Lock()
+
+        if resume and self.path.exists():
+            self._load_existing()
+            self._file = open(self.path, "a")
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "w")
+
+    def _load_existing(self):
+        # Keep complete device lines only: drop a half written last line and an old footer
+        lines = []
+        with open(self.path) as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if "metadata" in record:
+                    continue
+                lines.append(line)
+                self.completed.add(record["hostname"])
+        with open(self.path, "w") as f:
+            f.writelines(lines)
+        self.count = len(lines)
+
+    def write(self, device):
+        with self._lock:
+            self._buffer.append(json.dumps(device.to_dict()) + "\n")
+            self.completed.add(device.hostname)
+            self.count += 1
+            if len(self._buffer) >= self.batch_size:
+                self._flush()
+
+    def _flush(self):
+        if self._buffer:
+            self._file.writelines(self._buffer)
+            self._buffer = []
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            footer = {
+                "metadata": {
+                    "generated_at": datetime.now().isoformat(),
+                    "started_at": self.started_at.isoformat(),
+                    "device_count": self.count,
+                    "version": "1.0"
+                }
+            }
+            self._buffer.append(json.dumps(footer) + "\n")
+            self._flush()
+            self._file.close()
+        print(f"\n Inventory saved to : {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # Interrupted run: keep what was scanned but no footer, so it can be resumed
+            with self._lock:
+                self._flush()
+                self._file.close()
+
+
+def load_inventory_stream(path):
+    """
+    Read a file written by InventoryStreamWriter.
+
+    Returns:
+        tuple: (list of device dicts, metadata dict or None if the run didn't finish)
+    """
+    devices = []
+    metadata = None
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if "metadata" in record:
+                metadata = record["metadata"]
+            else:
+                devices.append(record)
+    return devices, metadata
+
+
+def load_inventory_file(path):
+    """
+    Read an inventory snapshot, either the indented .json written by save_inventory_to_json
+    or the .jsonl written by InventoryStreamWriter.
+
+    Returns:
+        tuple: (list of device dicts, metadata dict or None)
+    """
+    path = Path(path)
+    if path.suffix == ".jsonl":
+        return load_inventory_stream(path)
+    with open(path) as f:
+        data = json.load(f)
+    return data.get("devices", []), data.get("metadata")
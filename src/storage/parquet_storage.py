@@ -0,0 +1,132 @@
+import typing
+from datetime import datetime, date
+from pathlib import Path
+import pyarrow as pa
+import pyarrow.dataset as ds
+from src.models.device import Device, FIELD_NAMES
+from src.models.device_table import DeviceTable
+from src.storage.file_storage import load_inventory_file
+
+PARTITION_SCHEMA = pa.schema([("date", pa.string()), ("site", pa.string())])
+MODULE_TYPE = pa.struct([(name, pa.string()) for name in ("name", "description", "pid", "vid", "serial")])
+
+_ARROW_TYPES = {
+    str: pa.string(),
+    int: pa.int64(),
+    float: pa.float64(),
+    bool: pa.bool_(),
+    list: pa.list_(MODULE_TYPE),
+}
+
+
+def _arrow_type(python_type):
+    # Optional[X] is Union[X, None]
+    args = [each for each in typing.get_args(python_type) if each is not type(None)]
+    if typing.get_origin(python_type) is typing.Union and len(args) == 1:
+        python_type = args[0]
+    return _ARROW_TYPES.get(python_type, pa.string())
+
+
+def device_schema():
+    """Arrow schema of a snapshot: every Device field plus the snapshot time and date."""
+    hints = typing.get_type_hints(Device)
+    fields = [pa.field(name, _arrow_type(hints[name])) for name in FIELD_NAMES]
+    fields.append(pa.field("snapshot_time", pa.timestamp("us")))
+    fields.append(pa.field("date", pa.string()))
+    return pa.schema(fields)
+
+
+def _base_path(output_dir):
+    path = Path(output_dir)
+    if not path.is_absolute():
+        path = Path(__file__).parent.parent.parent / path
+    return path
+
+
+def save_inventory_to_parquet(devices, output_dir="output/parquet", timestamp=None):
+    """
+    Write one snapshot as Parquet, partitioned as date=YYYY-MM-DD/site=<site>/.
+
+    Args:
+        devices: DeviceTable, Device objects or device dicts
+        timestamp: snapshot time, now by default
+
+    Returns:
+        Path: base directory of the dataset
+    """
+    if timestamp is None:
+        timestamp = datetime.now()
+    schema = device_schema()
+    if not isinstance(devices, DeviceTable):
+        devices = list(devices)
+        if devices and isinstance(devices[0], dict):
+            devices = DeviceTable.from_dicts(devices)
+        else:
+            devices = DeviceTable.from_devices(devices)
+    columns = dict(devices.to_columns())
+    columns["snapshot_time"] = [timestamp] * len(devices)
+    columns["date"] = [timestamp.date().isoformat()] * len(devices)
+    table = pa.table(columns, schema=schema)
+
+    base_path = _base_path(output_dir)
+    ds.write_dataset(
+        table,
+        base_path,
+        format="parquet",
+        partitioning=ds.partitioning(PARTITION_SCHEMA, flavor="hive"),
+        basename_template=f"snapshot_{timestamp.strftime('%Y%m%d_%H%M%S_%f')}_{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore"
+    )
+    print(f"\n Parquet snapshot saved to : {base_path}")
+    return base_path
+
+
+def convert_json_snapshot(json_path, output_dir="output/parquet"):
+    """Backfill: rewrite an existing .json/.jsonl inventory snapshot as Parquet."""
+    devices, metadata = load_inventory_file(json_path)
+    timestamp = None
+    if metadata and metadata.get("generated_at"):
+        timestamp = datetime.fromisoformat(metadata["generated_at"])
+    return save_inventory_to_parquet(devices, output_dir, timestamp)
+
+
+def _as_date_string(value):
+    if isinstance(value, (datetime, date)):
+        return value.strftime("%Y-%m-%d")
+    return value
+
+
+def query_snapshots(columns=None, start=None, end=None, sites=None, output_dir="output/parquet", as_pandas=True):
+    """
+    Load only the needed columns and snapshots: partitions outside the date range
+    or the sites are not even opened.
+
+    Args:
+        columns: list of columns to load, all by default
+        start, end: first and last day to load (date, datetime or "YYYY-MM-DD"), included
+        sites: list of sites to load, all by default
+        as_pandas: return a pandas DataFrame instead of a pyarrow Table
+    """
+    base_path = _base_path(output_dir)
+    dataset = ds.dataset(
+        base_path,
+        format="parquet",
+        partitioning=ds.partitioning(PARTITION_SCHEMA, flavor="hive")
+    )
+    condition = None
+
+    def add(expression):
+        nonlocal condition
+        condition = expression if condition is None else condition & expression
+
+    if start is not None:
+        add(ds.field("date") >= _as_date_string(start))
+    if end is not None:
+        add(ds.field("date") <= _as_date_string(end))
+    if sites:
+        add(ds.field("site").isin(list(sites)))
+
+    table = dataset.to_table(columns=columns, filter=condition)
+    if as_pandas:
+        return table.to_pandas()
+    return table
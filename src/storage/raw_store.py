@@ -0,0 +1,132 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+
+
+class RawOutputStore:
+    """
+    Keep every raw command output collected during scans.
+
+    Outputs are gzip compressed and stored once under the sha256 of their content
+    (objects/<2 first chars>/<rest>.gz), so an output that doesn't change between
+    scans takes no extra space. captures.jsonl records which device/command/time
+    points to which object, it is kept in memory indexed by hostname and command.
+    """
+    def __init__(self, root_dir="data/raw"):
+        root_path = Path(root_dir)
+        if not root_path.is_absolute():
+            project_dir = Path(__file__).parent.parent.parent
+            root_path = project_dir / root_path
+        self.root = root_path
+        self.objects_dir = self.root / "objects"
+        self.index_path = self.root / "captures.jsonl"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._reset_index()
+
+    def _object_path(self, digest):
+        return self.objects_dir / digest[:2] / f"{digest[2:]}.gz"
+
+    def save(self, hostname, command, output, timestamp=None):
+        """
+        Store one output and record the capture.
+
+        Returns:
+            str: sha256 digest of the output
+        """
+        data = output.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write then rename so a crash never leaves half an object behind
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(gzip.compress(data, mtime=0))
+            os.replace(tmp_name, path)
+
+        if timestamp is None:
+            timestamp = datetime.now()
+        if isinstance(timestamp, datetime):
+            timestamp = timestamp.isoformat()
+        capture = {
+            "hostname": hostname,
+            "command": command,
+            "timestamp": timestamp,
+            "digest": digest,
+            "size": len(data)
+        }
+        with self._lock:
+            with open(self.index_path, "a") as f:
+                f.write(json.dumps(capture) + "\n")
+        return digest
+
+    def load(self, digest):
+        with open(self._object_path(digest), "rb") as f:
+            return gzip.decompress(f.read()).decode("utf-8")
+
+    def _index(self, capture):
+        self._captures.append(capture)
+        self._by_hostname.setdefault(capture["hostname"], []).append(capture)
+        self._by_command.setdefault(capture["command"], []).append(capture)
+        self._by_key.setdefault((capture["hostname"], capture["command"]), []).append(capture)
+
+    def _refresh(self):
+        # captures.jsonl is read once, then only the lines appended since (by this store
+        # or by the store of another process) are read and added to the dicts
+        if not self.index_path.exists():
+            return
+        size = self.index_path.stat().st_size
+        if size < self._read_offset:
+            # The file was replaced: start over
+            self._reset_index()
+        if size == self._read_offset:
+            return
+        with open(self.index_path, "rb") as f:
+            f.seek(self._read_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Line still being written, read it next time
+                    break
+                self._read_offset += len(line)
+                if line.strip():
+                    self._index(json.loads(line))
+
+    def _reset_index(self):
+        self._captures = []
+        self._by_hostname = {}
+        self._by_command = {}
+        self._by_key = {}
+        self._read_offset = 0
+
+    def captures(self, hostname=None, command=None):
+        """List recorded captures, oldest first, optionally filtered by hostname and/or command."""
+        with self._lock:
+            self._refresh()
+            if hostname is not None and command is not None:
+                found = self._by_key.get((hostname, command), [])
+            elif hostname is not None:
+                found = self._by_hostname.get(hostname, [])
+            elif command is not None:
+                found = self._by_command.get(command, [])
+            else:
+                found = self._captures
+            return list(found)
+
+    def latest(self, hostname, command):
+        with self._lock:
+            self._refresh()
+            captures = self._by_key.get((hostname, command))
+        if not captures:
+            return None
+        return self.load(captures[-1]["digest"])
+
+    def outputs(self, command, hostname=None):
+        """Yield (capture, output) for every capture of a command, e.g. to feed parse_many."""
+        for capture in self.captures(hostname, command):
+            yield capture, self.load(capture["digest"])
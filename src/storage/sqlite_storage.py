@@ -0,0 +1,153 @@
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from src.models.device import Device, FIELD_NAMES
+
+DEVICE_COLUMNS = list(FIELD_NAMES)
+# Stored as JSON text
+JSON_COLUMNS = {"modules"}
+HISTORY_COLUMNS = ["hostname", "mgmt_ip", "site", "scanned_at", "scan_status", "model",
+                   "serial_number", "collected_os_version", "uptime"]
+
+
+class InventoryDatabase:
+    """
+    SQLite inventory: current state of every device (one row per hostname)
+    plus the history of every scan.
+
+    Args:
+        path: database file, data/inventory.db by default (":memory:" for tests)
+        batch_size: number of rows written per transaction
+    """
+    def __init__(self, path="data/inventory.db", batch_size=500):
+        if path != ":memory:":
+            path = Path(path)
+            if not path.is_absolute():
+                path = Path(__file__).parent.parent.parent / path
+            path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+    def _create_schema(self):
+        columns = ", ".join(f"{name} TEXT" for name in DEVICE_COLUMNS if name != "hostname")
+        with self.conn:
+            self.conn.execute(f"CREATE TABLE IF NOT EXISTS devices (hostname TEXT PRIMARY KEY, {columns})")
+            # Device may have gained fields since the database was created
+            existing = {row["name"] for row in self.conn.execute("PRAGMA table_info(devices)")}
+            for name in DEVICE_COLUMNS:
+                if name not in existing:
+                    self.conn.execute(f"ALTER TABLE devices ADD COLUMN {name} TEXT")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS scan_history ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                + ", ".join(f"{name} TEXT" for name in HISTORY_COLUMNS) +
+                ", UNIQUE (hostname, scanned_at))"
+            )
+            for name in ("mgmt_ip", "site", "serial_number", "last_scanned"):
+                self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_devices_{name} ON devices ({name})")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_history_serial ON scan_history (serial_number, scanned_at)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_history_scanned_at ON scan_history (scanned_at)")
+
+    def _write_batches(self, sql, rows):
+        count = 0
+        with self._lock:
+            for start in range(0, len(rows), self.batch_size):
+                # One transaction per batch instead of one per row
+                with self.conn:
+                    self.conn.executemany(sql, rows[start:start + self.batch_size])
+                count += len(rows[start:start + self.batch_size])
+        return count
+
+    def upsert_devices(self, devices):
+        """Insert new devices and update the existing ones (matched on hostname)."""
+        placeholders = ", ".join("?" for _ in DEVICE_COLUMNS)
+        updates = ", ".join(f"{name}=excluded.{name}" for name in DEVICE_COLUMNS if name != "hostname")
+        sql = (f"INSERT INTO devices ({', '.join(DEVICE_COLUMNS)}) VALUES ({placeholders}) "
+               f"ON CONFLICT(hostname) DO UPDATE SET {updates}")
+        rows = []
+        for each in devices:
+            data = each.to_dict()
+            for name in JSON_COLUMNS:
+                data[name] = json.dumps(data[name])
+            rows.append(tuple(data.get(name) for name in DEVICE_COLUMNS))
+        return self._write_batches(sql, rows)
+
+    def record_scans(self, devices):
+        """Add a history row for each scanned device (the same scan is only recorded once)."""
+        sql = (f"INSERT OR IGNORE INTO scan_history ({', '.join(HISTORY_COLUMNS)}) "
+               f"VALUES ({', '.join('?' for _ in HISTORY_COLUMNS)})")
+        rows = []
+        for each in devices:
+            if each.last_scanned is None:
+                continue
+            rows.append((each.hostname, each.mgmt_ip, each.site, each.last_scanned, each.scan_status, each.model,
+                         each.serial_number, each.collected_os_version, each.uptime))
+        return self._write_batches(sql, rows)
+
+    def save_devices(self, devices):
+        devices = list(devices)
+        self.upsert_devices(devices)
+        self.record_scans(devices)
+
+    def _to_device(self, row):
+        values = {name: row[name] for name in DEVICE_COLUMNS}
+        for name in JSON_COLUMNS:
+            values[name] = json.loads(values[name]) if values[name] else []
+        return Device(**values)
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def load_devices(self, site=None):
+        if site is None:
+            rows = self._query("SELECT * FROM devices ORDER BY hostname")
+        else:
+            rows = self._query("SELECT * FROM devices WHERE site = ? ORDER BY hostname", (site,))
+        return [self._to_device(row) for row in rows]
+
+    def get_device(self, hostname):
+        rows = self._query("SELECT * FROM devices WHERE hostname = ?", (hostname,))
+        return self._to_device(rows[0]) if rows else None
+
+    def find_by_ip(self, mgmt_ip):
+        return [self._to_device(row) for row in self._query("SELECT * FROM devices WHERE mgmt_ip = ?", (mgmt_ip,))]
+
+    def find_by_serial(self, serial_number):
+        rows = self._query("SELECT * FROM devices WHERE serial_number = ?", (serial_number,))
+        return [self._to_device(row) for row in rows]
+
+    def scanned_since(self, timestamp):
+        rows = self._query("SELECT * FROM devices WHERE last_scanned >= ? ORDER BY last_scanned", (timestamp,))
+        return [self._to_device(row) for row in rows]
+
+    def scan_history(self, hostname):
+        rows = self._query("SELECT * FROM scan_history WHERE hostname = ? ORDER BY scanned_at", (hostname,))
+        return [dict(row) for row in rows]
+
+    def last_good_scan(self, serial_number):
+        """Most recent successful scan of a serial number, as a dict, or None."""
+        rows = self._query(
+            "SELECT * FROM scan_history WHERE serial_number = ? AND scan_status = 'success' "
+            "ORDER BY scanned_at DESC LIMIT 1",
+            (serial_number,)
+        )
+        return dict(rows[0]) if rows else None
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,310 @@
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Numeric columns of every sample, NaN when not collected
+METRICS = ("uptime_seconds", "cpu_percent", "memory_percent",
+           "input_packets", "output_packets", "input_errors", "output_errors")
+# Averaged when downsampled, the other metrics (counters, uptime) keep the last value of the bucket
+GAUGES = ("cpu_percent", "memory_percent")
+
+# (name, bucket seconds, retention seconds), finest first. "raw" keeps every sample.
+TIERS = (
+    ("raw", 0, 14 * 86400),
+    ("hour", 3600, 180 * 86400),
+    ("day", 86400, 5 * 365 * 86400),
+)
+
+RECORD_TYPE = np.dtype([("time", "<i8"), ("samples", "<u4")] + [(name, "<f8") for name in METRICS])
+AGGREGATES = {"mean", "min", "max", "sum", "count"}
+
+_UNSAFE = re.compile(r"[^\w.-]")
+
+
+def _timestamp(value):
+    if value is None:
+        return int(time.time())
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    if isinstance(value, str):
+        return int(datetime.fromisoformat(value).timestamp())
+    return int(value)
+
+
+class TimeSeriesStore:
+    """
+    Append-only history of the numeric metrics of each device (uptime, CPU, memory,
+    interface counters), next to the Device fields that only hold the last scan.
+
+    Each device has one file per tier, root/<tier>/<site>/<hostname>.bin, made of fixed
+    size records (RECORD_TYPE) in time order. Reads memory-map the file and binary search
+    the time range, so a query only touches the records it returns.
+
+    Samples go to the "raw" tier. When a device gets its first sample of a new hour (day),
+    the finished buckets of the tier below are rolled up into the "hour" ("day") tier:
+    gauges averaged, counters and uptime keep their last value. Records older than the
+    retention of their tier are dropped at the same time.
+
+    Args:
+        root_dir: directory of the files, relative paths start from the project directory
+        tiers: ((name, bucket seconds, retention seconds), ...) finest first, bucket 0 for the raw tier
+    """
+    def __init__(self, root_dir="data/timeseries", tiers=TIERS):
+        root_path = Path(root_dir)
+        if not root_path.is_absolute():
+            project_dir = Path(__file__).parent.parent.parent
+            root_path = project_dir / root_path
+        self.root = root_path
+        self.tiers = tuple(tiers)
+        self._tier_names = [name for name, _, _ in self.tiers]
+        self._paths = {}
+        self._last_times = {}
+        self._lock = threading.Lock()
+
+    def _path(self, tier, site, hostname):
+        return self.root / tier / _UNSAFE.sub("_", site or "unknown") / f"{_UNSAFE.sub('_', hostname)}.bin"
+
+    def _device_path(self, tier, hostname):
+        # Files of a device are found by name, the site is only known when writing
+        key = (tier, hostname)
+        path = self._paths.get(key)
+        if path is None:
+            found = sorted((self.root / tier).glob(f"*/{_UNSAFE.sub('_', hostname)}.bin"),
+                           key=lambda each: each.stat().st_mtime)
+            path = found[-1] if found else None
+            if path is not None:
+                self._paths[key] = path
+        return path
+
+    def _read(self, path):
+        if path is None or not path.exists() or path.stat().st_size < RECORD_TYPE.itemsize:
+            return np.empty(0, dtype=RECORD_TYPE)
+        # A record being appended by another process may be incomplete, leave it out
+        count = path.stat().st_size // RECORD_TYPE.itemsize
+        return np.memmap(path, dtype=RECORD_TYPE, mode="r", shape=(count,))
+
+    def _edge_time(self, path, last=True):
+        # Time of the first or last record, without mapping the whole file
+        if path is None or not path.exists():
+            return None
+        count = path.stat().st_size // RECORD_TYPE.itemsize
+        if not count:
+            return None
+        with open(path, "rb") as f:
+            f.seek((count - 1) * RECORD_TYPE.itemsize if last else 0)
+            record = np.frombuffer(f.read(RECORD_TYPE.itemsize), dtype=RECORD_TYPE)
+        return int(record["time"][0])
+
+    def _append_records(self, path, records):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "ab") as f:
+            f.write(records.tobytes())
+
+    def _rewrite(self, path, records):
+        # Write then rename so a reader never sees half a file
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(np.ascontiguousarray(records).tobytes())
+        os.replace(tmp_name, path)
+
+    def append(self, device, values, timestamp=None):
+        """
+        Record one sample of a device.
+
+        Args:
+            device: Device the values were collected on (hostname and site are used)
+            values: {metric: number}, metrics missing from it are stored as NaN
+            timestamp: datetime, ISO string or epoch seconds, now when None
+
+        Returns:
+            bool: False when the sample is older than the last one of the device and was dropped
+        """
+        timestamp = _timestamp(timestamp)
+        record = np.zeros(1, dtype=RECORD_TYPE)
+        record["time"] = timestamp
+        record["samples"] = 1
+        for name in METRICS:
+            value = values.get(name)
+            record[name] = np.nan if value is None else value
+        raw, bucket, _ = self.tiers[0]
+        with self._lock:
+            path = self._path(raw, device.site, device.hostname)
+            last = self._last_times.get(device.hostname)
+            if last is None:
+                last = self._edge_time(self._device_path(raw, device.hostname))
+            if last is not None and timestamp < last:
+                logger.debug("Dropping sample of %s older than the last one", device.hostname)
+                return False
+            self._append_records(path, record)
+            self._paths[(raw, device.hostname)] = path
+            self._last_times[device.hostname] = timestamp
+            if last is not None:
+                self._roll_up(device, last, timestamp)
+        return True
+
+    def _roll_up(self, device, previous, current):
+        # A coarser bucket is complete once a sample falls in the next one
+        changed = False
+        for position in range(1, len(self.tiers)):
+            name, bucket, _ = self.tiers[position]
+            if previous // bucket == current // bucket:
+                break
+            self._downsample(device, position, current // bucket * bucket)
+            changed = True
+        if changed:
+            for position in range(len(self.tiers)):
+                self._expire(device, position, current)
+
+    def _downsample(self, device, position, until):
+        source_name = self.tiers[position - 1][0]
+        name, bucket, _ = self.tiers[position]
+        done = self._edge_time(self._device_path(name, device.hostname))
+        start = None if done is None else done + bucket
+        source = self._read(self._device_path(source_name, device.hostname))
+        times = source["time"]
+        first = 0 if start is None else int(np.searchsorted(times, start))
+        last = int(np.searchsorted(times, until))
+        if first >= last:
+            return
+        rolled = downsample(source[first:last], bucket)
+        path = self._path(name, device.site, device.hostname)
+        self._append_records(path, rolled)
+        self._paths[(name, device.hostname)] = path
+
+    def _expire(self, device, position, now):
+        name, _, retention = self.tiers[position]
+        path = self._device_path(name, device.hostname)
+        first = self._edge_time(path, last=False)
+        # Rewrite only once a tenth of the retention is out of date, not on every sample
+        cutoff = now - retention
+        if first is None or first >= cutoff - retention // 10:
+            return
+        records = self._read(path)
+        keep = np.array(records[int(np.searchsorted(records["time"], cutoff)):])
+        del records
+        self._rewrite(path, keep)
+
+    def _tier_for(self, start):
+        # Finest tier whose retention still covers start, the coarsest one without start
+        if start is not None:
+            now = int(time.time())
+            for name, _, retention in self.tiers:
+                if start >= now - retention:
+                    return name
+        return self._tier_names[-1]
+
+    def query(self, hostname, metric, start=None, end=None, tier=None):
+        """
+        Values of one metric of one device between start and end (included).
+
+        Args:
+            start, end: datetime, ISO string or epoch seconds, None for no limit
+            tier: "raw", "hour" or "day", by default the finest one still covering start
+                (the whole history, so the coarsest one, when start is None)
+
+        Returns:
+            tuple: (numpy array of epoch seconds, numpy array of values)
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric {metric}, expected one of {', '.join(METRICS)}")
+        start = None if start is None else _timestamp(start)
+        end = None if end is None else _timestamp(end)
+        tier = tier or self._tier_for(start)
+        records = self._slice(self._read(self._device_path(tier, hostname)), start, end)
+        return np.array(records["time"]), np.array(records[metric])
+
+    def _slice(self, records, start, end):
+        times = records["time"]
+        first = 0 if start is None else int(np.searchsorted(times, start))
+        last = len(times) if end is None else int(np.searchsorted(times, end, side="right"))
+        return records[first:last]
+
+    def sites(self, tier="raw"):
+        directory = self.root / tier
+        if not directory.exists():
+            return []
+        return sorted(path.name for path in directory.iterdir() if path.is_dir())
+
+    def site_aggregate(self, site, metric, start=None, end=None, step=None, aggregate="mean", tier=None):
+        """
+        One metric over every device of a site, aggregated per time step.
+
+        Args:
+            step: seconds per point, the bucket of the tier by default (one hour for raw data)
+            aggregate: "mean", "min", "max", "sum" or "count" of the device values in each step
+
+        Returns:
+            tuple: (numpy array of step start times, numpy array of aggregated values)
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric {metric}, expected one of {', '.join(METRICS)}")
+        if aggregate not in AGGREGATES:
+            raise ValueError(f"Unknown aggregate {aggregate}, expected one of {', '.join(sorted(AGGREGATES))}")
+        start = None if start is None else _timestamp(start)
+        end = None if end is None else _timestamp(end)
+        tier = tier or self._tier_for(start)
+        step = step or dict((name, bucket) for name, bucket, _ in self.tiers)[tier] or 3600
+        times, values = [], []
+        for path in (self.root / tier / _UNSAFE.sub("_", site)).glob("*.bin"):
+            records = self._slice(self._read(path), start, end)
+            times.append(np.array(records["time"]))
+            values.append(np.array(records[metric]))
+        if not times:
+            return np.empty(0, dtype="<i8"), np.empty(0)
+        times, values = np.concatenate(times), np.concatenate(values)
+        kept = ~np.isnan(values)
+        return aggregate_by_step(times[kept], values[kept], step, aggregate)
+
+
+def aggregate_by_step(times, values, step, aggregate="mean"):
+    """(step start times, aggregated values) of values grouped in step second buckets."""
+    buckets = times // step * step
+    order = np.argsort(buckets, kind="stable")
+    buckets, values = buckets[order], values[order]
+    starts, first = np.unique(buckets, return_index=True)
+    if not len(starts):
+        return starts, values
+    counts = np.diff(np.append(first, len(values)))
+    if aggregate == "count":
+        return starts, counts.astype(float)
+    if aggregate == "min":
+        return starts, np.minimum.reduceat(values, first)
+    if aggregate == "max":
+        return starts, np.maximum.reduceat(values, first)
+    sums = np.add.reduceat(values, first)
+    return starts, sums if aggregate == "sum" else sums / counts
+
+
+def downsample(records, bucket):
+    """
+    Records rolled up into bucket second buckets: gauges averaged (weighted by their sample
+    count, ignoring NaN), the other metrics keep their last non NaN value.
+    """
+    buckets = records["time"] // bucket * bucket
+    starts, first = np.unique(buckets, return_index=True)
+    rolled = np.zeros(len(starts), dtype=RECORD_TYPE)
+    rolled["time"] = starts
+    rolled["samples"] = np.add.reduceat(records["samples"], first)
+    weights = records["samples"].astype(float)
+    for name in METRICS:
+        values = np.asarray(records[name])
+        present = ~np.isnan(values)
+        if name in GAUGES:
+            weighted = np.add.reduceat(np.where(present, values * weights, 0.0), first)
+            total = np.add.reduceat(np.where(present, weights, 0.0), first)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                rolled[name] = np.where(total > 0, weighted / np.where(total > 0, total, 1), np.nan)
+        else:
+            # Position of the last present value of each bucket
+            positions = np.where(present, np.arange(len(values)), -1)
+            last = np.maximum.reduceat(positions, first)
+            rolled[name] = np.where(last >= first, values[np.maximum(last, 0)], np.nan)
+    return rolled
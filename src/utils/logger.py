@@ -1,31 +1,182 @@
+import atexit
+import contextvars
+import json
 import logging
+import logging.handlers
+import queue
 import sys
+import time
+from contextlib import contextmanager
 from pathlib import Path
 
-def setup_logger(name='inventory_tool', level=None):
-    if level is None:
-        logger = logging.getLogger(name)
-        logger.setLevel(logging.INFO)
+# Loggers of this project: modules use logging.getLogger(__name__)
+APP_LOGGERS = ("src", "config", "main", "inventory_tool")
+
+_context = contextvars.ContextVar("log_context", default={})
+_run_context = {}
+_listener = None
+_queue_handler = None
+# Arguments of the last configure_logging() call, see logging_settings()
+_settings = None
+
+
+@contextmanager
+def log_context(**fields):
+    """Add fields (device=, site=...) to every record logged inside the block, in this thread."""
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Copy the run and log_context() fields onto the record, in the thread that logs it."""
+    def filter(self, record):
+        for name, value in _run_context.items():
+            setattr(record, name, value)
+        for name, value in _context.get().items():
+            setattr(record, name, value)
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, context fields and extra= fields."""
+    _RESERVED = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+    def __init__(self):
+        super().__init__()
+        self._second = None
+        self._second_text = None
+
+    def _time(self, record):
+        # strftime once per second instead of once per record
+        second = int(record.created)
+        if second != self._second:
+            self._second = second
+            self._second_text = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(second))
+        return f"{self._second_text}.{int(record.msecs):03d}"
+
+    def format(self, record):
+        data = {
+            "time": self._time(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for name in record.__dict__.keys() - self._RESERVED:
+            if not name.startswith("_"):
+                data[name] = record.__dict__[name]
+        if record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            # Already formatted by the queue handler
+            data["exception"] = record.exc_text
+        return json.dumps(data, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # The default prepare() formats the record in the calling thread, only merge the
+        # message arguments here and leave the formatting to the listener thread
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
 
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(name)s - %(message)s')
 
+def configure_logging(level="INFO", log_file="logs/inventory.log", max_bytes=10 * 1024 * 1024, backup_count=5,
+                      module_levels=None, run_id=None, console=True):
+    """
+    Send every log record through a queue to a background thread doing the writes, so
+    scanning threads never wait on a file or the terminal.
+
+    The log file gets JSON lines and rolls over at max_bytes (backup_count old files kept),
+    the console gets plain text.
+
+    Args:
+        level: level of the project loggers (src.*, config.*), third party ones stay at WARNING
+        module_levels: {"src.network": "DEBUG", ...} to change the level of some modules
+        run_id: added to every record, a new one is made when None
+        console: also print INFO and above to stdout
+
+    Returns:
+        str: run id
+    """
+    global _listener, _queue_handler, _settings
+    shutdown_logging()
+    _run_context["run_id"] = run_id or time.strftime("%Y%m%d%H%M%S")
+    _settings = {"level": level, "log_file": None if log_file is None else str(log_file), "max_bytes": max_bytes,
+                 "backup_count": backup_count, "module_levels": dict(module_levels or {}),
+                 "run_id": _run_context["run_id"], "console": console}
+
+    handlers = []
+    if log_file is not None:
+        log_path = Path(log_file)
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(log_path, maxBytes=max_bytes, backupCount=backup_count)
+        file_handler.setFormatter(JsonFormatter())
+        handlers.append(file_handler)
+    if console:
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setLevel(logging.INFO)
-        console_handler.setFormatter(formatter)
+        console_handler.setFormatter(logging.Formatter("%(message)s"))
+        handlers.append(console_handler)
+
+    log_queue = queue.SimpleQueue()
+    _queue_handler = _QueueHandler(log_queue)
+    _queue_handler.addFilter(ContextFilter())
+    root = logging.getLogger()
+    root.addHandler(_queue_handler)
+    root.setLevel(logging.WARNING)
+    for name in APP_LOGGERS:
+        logging.getLogger(name).setLevel(level)
+    for name, module_level in (module_levels or {}).items():
+        logging.getLogger(name).setLevel(module_level)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _run_context["run_id"]
+
 
-        # Create log directory if it doesn't exist
-        log_dir = Path("logs")
-        log_dir.mkdir(exist_ok=True)
+def logging_settings():
+    """
+    Arguments of the current configure_logging() call, None when logging isn't configured.
 
-        file_handler = logging.FileHandler(filename="logs/inventory.log",mode='a')
-        file_handler.setLevel(logging.DEBUG)
-        file_handler.setFormatter(formatter)
+    The background thread doesn't exist in a child process: a worker process calls
+    configure_logging(**settings) with them so its records reach the same file.
+    """
+    if _listener is None:
+        return None
+    return dict(_settings)
 
-        if not logger.handlers:
-            logger.addHandler(console_handler)
-            logger.addHandler(file_handler)
 
-        return logger
-    else:
-        # for futur use to have a specific log level for a specific run of the app or module
-        return None
\ No newline at end of file
+def shutdown_logging():
+    """Write what is still in the queue and stop the background thread."""
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+def setup_logger(name='inventory_tool', level=None):
+    """Logger named name, logging through the queue (set up with the defaults if needed)."""
+    if _listener is None:
+        configure_logging()
+    logger = logging.getLogger(name)
+    if level is not None:
+        # Specific log level for a specific run of the app or module
+        logger.setLevel(level)
+    elif logger.level == logging.NOTSET:
+        logger.setLevel(logging.INFO)
+    return logger
@@ -0,0 +1,133 @@
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def percentile(sorted_values, quantile):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(quantile * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _summary(values):
+    values = sorted(values)
+    summary = {"count": len(values), "sum": sum(values), "max": values[-1]}
+    for quantile in QUANTILES:
+        summary[f"p{int(quantile * 100)}"] = percentile(values, quantile)
+    return summary
+
+
+class ScanMetrics:
+    """
+    Time each phase of each device scan (credentials, connect, commands, parse, persist).
+
+    Samples keep a reference to their device, so they are grouped by site/role/model
+    when the report is built: the model is only known once the device has been scanned.
+
+    Args:
+        group_by: Device fields the report is broken down by
+    """
+    def __init__(self, group_by=("site", "role", "model")):
+        self.group_by = group_by
+        self.started_at = datetime.now()
+        self._samples = []
+        self._lock = threading.Lock()
+
+    def record(self, device, phase, seconds):
+        with self._lock:
+            self._samples.append((phase, device, seconds))
+
+    @contextmanager
+    def phase(self, device, phase):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(device, phase, time.perf_counter() - start)
+
+    def report(self):
+        """
+        Returns:
+            dict: run information and one summary (count, sum, max, p50, p95, p99) per
+            phase, for all devices and for each value of the group_by fields
+        """
+        with self._lock:
+            samples = list(self._samples)
+        groups = {}
+        for phase, device, seconds in samples:
+            groups.setdefault((phase, "all", "all"), []).append(seconds)
+            for name in self.group_by:
+                value = getattr(device, name, None) or "unknown"
+                groups.setdefault((phase, name, value), []).append(seconds)
+
+        phases = []
+        for (phase, group, value), values in sorted(groups.items()):
+            phases.append({"phase": phase, "group": group, "value": value, **_summary(values)})
+        return {
+            "run": {
+                "started_at": self.started_at.isoformat(),
+                "generated_at": datetime.now().isoformat(),
+                "devices": len({id(device) for _, device, _ in samples}),
+                "samples": len(samples)
+            },
+            "phases": phases
+        }
+
+    def slowest(self, phase, group, count=10):
+        """Values of a group (e.g. sites) with the highest p95 for a phase."""
+        rows = [row for row in self.report()["phases"] if row["phase"] == phase and row["group"] == group]
+        return sorted(rows, key=lambda row: row["p95"], reverse=True)[:count]
+
+    def write_report(self, path):
+        _write_atomic(path, json.dumps(self.report(), indent=2))
+        print(f"\n Scan profile saved to : {path}")
+
+    def write_prometheus(self, path):
+        """
+        Prometheus text format, for the node_exporter textfile collector.
+
+        Every scan is counted once per metric: inventory_scan_phase_seconds covers all the
+        devices, inventory_scan_phase_seconds_by_<field> splits them by a group_by field.
+        """
+        metrics = {}
+        for row in self.report()["phases"]:
+            metrics.setdefault(row["group"], []).append(row)
+        lines = []
+        for group in ["all"] + [name for name in self.group_by if name in metrics]:
+            name = "inventory_scan_phase_seconds" if group == "all" else f"inventory_scan_phase_seconds_by_{group}"
+            per = "" if group == "all" else f", by {group}"
+            lines.append(f"# HELP {name} Time spent in each phase of a device scan{per}.")
+            lines.append(f"# TYPE {name} summary")
+            for row in metrics.get(group, []):
+                labels = f'phase="{_escape(row["phase"])}"'
+                if group != "all":
+                    labels += f',{group}="{_escape(row["value"])}"'
+                for quantile in QUANTILES:
+                    value = row[f"p{int(quantile * 100)}"]
+                    lines.append(f'{name}{{{labels},quantile="{quantile}"}} {value:.6f}')
+                lines.append(f"{name}_sum{{{labels}}} {row['sum']:.6f}")
+                lines.append(f"{name}_count{{{labels}}} {row['count']}")
+        _write_atomic(path, "\n".join(lines) + "\n")
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _write_atomic(path, text):
+    # Readers (like node_exporter) never see a half written file
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        f.write(text)
+    os.replace(tmp_name, path)
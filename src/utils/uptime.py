@@ -0,0 +1,24 @@
+import re
+
+_UNIT_SECONDS = {
+    "year": 365 * 86400,
+    "week": 7 * 86400,
+    "day": 86400,
+    "hour": 3600,
+    "minute": 60,
+    "second": 1,
+}
+_UPTIME_PART = re.compile(r"(\d+)\s+(year|week|day|hour|minute|second)s?")
+
+
+def parse_uptime(uptime):
+    """
+    Convert a Cisco uptime string ("8 weeks, 1 day, 5 hours, 56 minutes") to seconds.
+    Returns None when nothing can be read from it.
+    """
+    if not uptime:
+        return None
+    parts = _UPTIME_PART.findall(uptime)
+    if not parts:
+        return None
+    return sum(int(value) * _UNIT_SECONDS[unit] for value, unit in parts)
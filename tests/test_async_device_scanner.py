@@ -0,0 +1,160 @@
+import asyncio
+import time
+from src.models.device import Device
+from src.scanners.async_device_scanner import AsyncDeviceScanner
+from src.scanners.device_scanner import DeviceScanner
+from tests.test_device_scanner import VERSION_OUTPUT
+
+LATENCY = 0.05
+
+class StubTransport:
+    def __init__(self, host, username, password, device_type, connect_timeout=30):
+        self.host = host
+
+    async def connect(self):
+        if self.host == "10.1.0.99":
+            raise ConnectionError("connection refused")
+        if self.host == "10.1.0.98":
+            await asyncio.sleep(10)
+        await asyncio.sleep(LATENCY)
+
+    async def send_command(self, command):
+        await asyncio.sleep(LATENCY)
+        return VERSION_OUTPUT if command == "show version" else "inventory"
+
+    async def disconnect(self):
+        pass
+
+class BlockingStubDevice:
+    def __init__(self, host, username, password, device_type):
+        self.status = None
+        self.error = None
+
+    def connect(self):
+        time.sleep(LATENCY)
+        return True
+
+    def send_command(self, command):
+        time.sleep(LATENCY)
+        return VERSION_OUTPUT if command == "show version" else "inventory"
+
+    def disconnect(self):
+        pass
+
+def make_devices(count):
+    return [
+        Device(hostname=f"SW-{i}", mgmt_ip=f"10.0.{i // 250}.{i % 250}", site="lab", role="access", os_type="cisco_ios")
+        for i in range(count)
+    ]
+
+def test_async_scan_keeps_order_and_handles_failures():
+    devices = make_devices(5)
+    devices.append(Device(hostname="REFUSED", mgmt_ip="10.1.0.99", site="lab", role="access", os_type="cisco_ios"))
+    devices.append(Device(hostname="HANGING", mgmt_ip="10.1.0.98", site="lab", role="access", os_type="cisco_ios"))
+    scanner = AsyncDeviceScanner(timeout=0.5, transport=StubTransport)
+
+    results = asyncio.run(scanner.scan_all_devices_list(devices))
+
+    assert [result["device"] for result in results] == devices
+    assert all(result["output"]["success"] for result in results[:5])
+    assert devices[0].serial_number == "FOC2323Y11S"
+    assert results[5]["output"]["error"] == "connection refused"
+    assert "timed out" in results[6]["output"]["error"]
+    assert devices[6].scan_status == "failed"
+
+def test_async_scan_yields_results_as_they_finish():
+    devices = make_devices(3)
+    devices.insert(0, Device(hostname="HANGING", mgmt_ip="10.1.0.98", site="lab", role="access", os_type="cisco_ios"))
+    scanner = AsyncDeviceScanner(timeout=0.5, transport=StubTransport)
+
+    async def collect():
+        return [result["device"].hostname async for result in scanner.scan_all_devices(devices)]
+
+    assert asyncio.run(collect())[-1] == "HANGING"
+
+def test_async_scan_is_faster_than_sequential_scan():
+    devices = make_devices(200)
+
+    start = time.perf_counter()
+    asyncio.run(AsyncDeviceScanner(max_concurrency=200, transport=StubTransport).scan_all_devices_list(devices))
+    async_duration = time.perf_counter() - start
+
+    start = time.perf_counter()
+    DeviceScanner(device_factory=BlockingStubDevice).scan_all_devices(devices[:10])
+    sequential_duration = (time.perf_counter() - start) * 20
+
+    assert async_duration < sequential_duration / 10
+
+def test_async_scan_saves_raw_outputs_off_the_event_loop():
+    import threading
+    class RecordingStore:
+        def __init__(self):
+            self.saved = []
+
+        def save(self, hostname, command, output, timestamp=None):
+            self.saved.append((hostname, command, threading.current_thread() is threading.main_thread()))
+
+    store = RecordingStore()
+    scanner = AsyncDeviceScanner(timeout=0.5, transport=StubTransport, raw_store=store)
+
+    asyncio.run(scanner.scan_all_devices_list(make_devices(2)))
+
+    assert sorted(store.saved) == [("SW-0", "show inventory", False), ("SW-0", "show version", False),
+                                   ("SW-1", "show inventory", False), ("SW-1", "show version", False)]
+
+class SlowNetDevice:
+    lock = None
+    active = 0
+    peak = 0
+    created = []
+
+    def __init__(self, host, username, password, device_type):
+        self.conn_timeout = None
+        self.error = None
+        self.disconnected = False
+        SlowNetDevice.created.append(self)
+
+    def connect(self):
+        with SlowNetDevice.lock:
+            SlowNetDevice.active += 1
+            SlowNetDevice.peak = max(SlowNetDevice.peak, SlowNetDevice.active)
+        time.sleep(0.3)
+        with SlowNetDevice.lock:
+            SlowNetDevice.active -= 1
+        return True
+
+    def send_command(self, command):
+        return VERSION_OUTPUT if command == "show version" else "inventory"
+
+    def disconnect(self):
+        self.disconnected = True
+
+def use_slow_net_device(monkeypatch):
+    import threading
+    import src.network.net_device as net_device
+    monkeypatch.setattr(net_device, "NetDevice", SlowNetDevice)
+    monkeypatch.setattr(SlowNetDevice, "lock", threading.Lock())
+    monkeypatch.setattr(SlowNetDevice, "created", [])
+
+def test_thread_fallback_connects_up_to_the_concurrency_limit(monkeypatch):
+    from src.network.async_net_device import NetmikoThreadTransport
+    use_slow_net_device(monkeypatch)
+    scanner = AsyncDeviceScanner(max_concurrency=64, timeout=5, transport=NetmikoThreadTransport)
+
+    results = asyncio.run(scanner.scan_all_devices_list(make_devices(64)))
+
+    assert all(result["output"]["success"] for result in results)
+    # The default asyncio executor would cap this at min(32, CPUs + 4)
+    assert SlowNetDevice.peak > 32
+    assert all(each.conn_timeout == 5 and each.disconnected for each in SlowNetDevice.created)
+
+def test_thread_fallback_closes_sessions_of_timed_out_scans(monkeypatch):
+    from src.network.async_net_device import NetmikoThreadTransport
+    use_slow_net_device(monkeypatch)
+    scanner = AsyncDeviceScanner(timeout=0.1, transport=NetmikoThreadTransport)
+
+    results = asyncio.run(scanner.scan_all_devices_list(make_devices(3)))
+    time.sleep(0.5)
+
+    assert not any(result["output"]["success"] for result in results)
+    assert all(each.disconnected for each in SlowNetDevice.created)
@@ -0,0 +1,31 @@
+from benchmarks.fake_device import make_fake_device, fake_serial
+from benchmarks.run_benchmarks import compare, run
+
+def test_fake_device_answers_canned_outputs():
+    device_class = make_fake_device()
+    device = device_class("10.0.0.1", "admin", "secret", "cisco_ios")
+
+    assert device.connect()
+    assert fake_serial("10.0.0.1") in device.send_command("show version")
+    assert "Invalid input" in device.send_command("show clock")
+
+def test_fake_device_failure_rate_is_stable():
+    device_class = make_fake_device(failure_rate=0.5)
+    hosts = [f"10.0.0.{i}" for i in range(100)]
+
+    first = [device_class(host, None, None, "cisco_ios").connect() for host in hosts]
+    second = [device_class(host, None, None, "cisco_ios").connect() for host in hosts]
+
+    assert first == second
+    assert 20 < first.count(False) < 80
+
+def test_compare_reports_regressions():
+    results = run([10], workers=2, latency=0, jitter=0, failure_rate=0, warmup=10)
+    assert set(results) == {"scanner_devices_per_sec", "parser_parses_per_sec",
+                            "storage_stream_devices_per_sec", "storage_json_devices_per_sec",
+                            "logging_lines_per_sec"}
+
+    baselines = {"parser_parses_per_sec": {"10": results["parser_parses_per_sec"]["10"] * 10}}
+    regressions = compare(results, baselines, tolerance=0.3)
+    assert len(regressions) == 1
+    assert "parser_parses_per_sec" in regressions[0]
@@ -0,0 +1,122 @@
+import io
+import pytest
+from src.models.device import Device
+from src.network.net_device import NetDevice
+from src.scanners.bulk_runner import BulkRunner, CallbackSink, FileSink, StdoutSink
+
+
+class FakeNetDevice:
+    def __init__(self, host, username, password, device_type):
+        self.host = host
+        self.status = None
+        self.error = None
+        self.disconnected = False
+
+    def connect(self):
+        if self.host.endswith(".99"):
+            self.status = "failed"
+            self.error = "timed out"
+            return False
+        return True
+
+    def stream_command(self, command, timeout=60):
+        if command == "show hang":
+            yield "first line\n"
+            raise TimeoutError(f"{command} on {self.host}: no prompt after {timeout} seconds")
+        for number in range(3):
+            yield f"{self.host} {command} line {number}\n"
+
+    def disconnect(self):
+        self.disconnected = True
+
+
+def make_devices(count):
+    return [Device(hostname=f"SW-{i}", mgmt_ip=f"10.0.0.{i}", site="lab", role="core", os_type="cisco_ios")
+            for i in range(count)]
+
+
+def test_bulk_runner_streams_to_callback():
+    chunks = []
+    finished = []
+    devices = make_devices(5) + [Device(hostname="DEAD", mgmt_ip="10.0.0.99", site="lab", role="core",
+                                        os_type="cisco_ios")]
+    runner = BulkRunner(workers=3, device_factory=FakeNetDevice)
+
+    results = runner.run(devices, ["show clock", "show ip int brief"],
+                         CallbackSink(on_chunk=lambda device, command, chunk: chunks.append((device.hostname, chunk)),
+                                      on_result=lambda device, output: finished.append(device.hostname)))
+
+    assert [each["device"] for each in results] == devices
+    clock = results[0]["output"]["commands"]["show clock"]
+    assert (clock["status"], clock["bytes"], clock["error"]) == ("success", 3 * len("10.0.0.0 show clock line 0\n"), None)
+    assert results[-1]["output"] == {"success": False, "status": "failed", "error": "timed out"}
+    assert len(chunks) == 5 * 2 * 3
+    assert [chunk for host, chunk in chunks if host == "SW-2"][3] == "10.0.0.2 show ip int brief line 0\n"
+    assert sorted(finished) == sorted(each.hostname for each in devices)
+
+
+def test_bulk_runner_stops_device_after_timeout(tmp_path):
+    devices = make_devices(2)
+    sink = FileSink(tmp_path)
+    runner = BulkRunner(device_factory=FakeNetDevice, command_timeout=5)
+
+    results = runner.run(devices, ["show clock", "show hang", "show version"], sink)
+
+    output = results[1]["output"]
+    assert output["success"] is False
+    assert output["commands"]["show hang"]["status"] == "timeout"
+    assert "show version" not in output["commands"]
+    text = (tmp_path / "SW-1.txt").read_text()
+    assert text.startswith("### show clock\n10.0.0.1 show clock line 0\n")
+    assert "### show hang\nfirst line\n!! timeout: show hang on 10.0.0.1: no prompt after 5 seconds\n" in text
+
+
+def test_stdout_sink_prefixes_lines():
+    stream = io.StringIO()
+    sink = StdoutSink(stream)
+    device = make_devices(1)[0]
+
+    sink.start_command(device, "show clock")
+    sink.write(device, "show clock", "10:00:00\nUTC\n")
+
+    assert stream.getvalue() == "SW-0 | ### show clock\nSW-0 | 10:00:00\nSW-0 | UTC\n"
+
+
+class FakeSession:
+    RETURN = "\n"
+    base_prompt = "SW-0"
+
+    def __init__(self, reads):
+        self.reads = list(reads)
+        self.written = []
+
+    def clear_buffer(self):
+        pass
+
+    def write_channel(self, data):
+        self.written.append(data)
+
+    def read_channel(self):
+        return self.reads.pop(0) if self.reads else ""
+
+
+def test_net_device_stream_command():
+    device = NetDevice("10.0.0.1", "admin", "secret", "cisco_ios")
+    device.session = FakeSession(["show ip int", " brief\r\nInterface  IP-Address\r\nGi0/1  10.0.0",
+                                  ".1\r\nGi0/2  unassigned\r\nSW-0#"])
+
+    chunks = list(device.stream_command("show ip int brief", poll_interval=0))
+
+    assert device.session.written == ["show ip int brief\n"]
+    assert chunks == ["Interface  IP-Address\n", "Gi0/1  10.0.0.1\nGi0/2  unassigned\n"]
+
+
+def test_net_device_stream_command_timeout():
+    device = NetDevice("10.0.0.1", "admin", "secret", "cisco_ios")
+    device.session = FakeSession(["show tech\r\n", "part of the output\r\n"])
+
+    stream = device.stream_command("show tech", timeout=0.05, poll_interval=0.01)
+
+    assert next(stream) == "part of the output\n"
+    with pytest.raises(TimeoutError):
+        next(stream)
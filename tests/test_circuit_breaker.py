@@ -0,0 +1,140 @@
+from src.models.device import Device
+from src.network.circuit_breaker import CircuitBreaker, CLOSED, OPEN, PROBE
+from src.scanners.device_scanner import DeviceScanner
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class FlakyNetDevice:
+    attempts = {}
+    fail_first = 0
+    error_type = "timeout"
+
+    def __init__(self, host, username, password, device_type):
+        self.host = host
+        self.status = None
+        self.error = None
+        self.error_type = None
+        self.conn_timeout = None
+
+    def connect(self):
+        FlakyNetDevice.attempts[self.host] = FlakyNetDevice.attempts.get(self.host, 0) + 1
+        if FlakyNetDevice.attempts[self.host] <= FlakyNetDevice.fail_first:
+            self.status = "failed"
+            self.error = "failed"
+            self.error_type = FlakyNetDevice.error_type
+            return False
+        return True
+
+    def send_command(self, command):
+        return ""
+
+    def disconnect(self):
+        pass
+
+def make_device(hostname, ip, site="lab"):
+    return Device(hostname=hostname, mgmt_ip=ip, site=site, role="access", os_type="cisco_ios")
+
+def test_device_circuit_opens_then_probes(tmp_path):
+    clock = Clock()
+    breaker = CircuitBreaker(tmp_path / "state.json", failure_threshold=2, cooldown=60, clock=clock)
+    device = make_device("SW1", "10.0.0.1")
+
+    breaker.record_failure(device)
+    assert breaker.allow(device) == CLOSED
+    breaker.record_failure(device)
+    assert breaker.allow(device) == OPEN
+
+    clock.now += 61
+    assert breaker.allow(device) == PROBE
+    assert breaker.suggested_timeout(device, PROBE) == breaker.probe_timeout
+    breaker.record_success(device, latency=4.0)
+    assert breaker.allow(device) == CLOSED
+    assert breaker.suggested_timeout(device) == 12.0
+
+def test_site_circuit_and_persistence(tmp_path):
+    clock = Clock()
+    path = tmp_path / "state.json"
+    breaker = CircuitBreaker(path, site_failure_threshold=2, site_cooldown=60, clock=clock)
+    for i in range(2):
+        breaker.record_failure(make_device(f"SW{i}", f"10.0.0.{i}"))
+    breaker.save()
+
+    breaker = CircuitBreaker(path, site_failure_threshold=2, site_cooldown=60, clock=clock)
+    other = make_device("SW9", "10.0.0.9")
+    assert breaker.allow(other) == OPEN
+    assert breaker.allow(make_device("SW9", "10.0.0.9", site="dc2")) == CLOSED
+
+    clock.now += 61
+    assert breaker.allow(other) == PROBE
+    # Only one probe per site at a time
+    assert breaker.allow(make_device("SW8", "10.0.0.8")) == OPEN
+
+def test_scanner_retries_timeouts_and_skips_open_circuits(tmp_path):
+    FlakyNetDevice.attempts = {}
+    FlakyNetDevice.fail_first = 2
+    FlakyNetDevice.error_type = "timeout"
+    breaker = CircuitBreaker(None, failure_threshold=1)
+    scanner = DeviceScanner(device_factory=FlakyNetDevice, retries=2, retry_wait=0, circuit_breaker=breaker)
+
+    assert scanner.scan_device(make_device("SW1", "10.0.0.1"))["success"]
+    assert FlakyNetDevice.attempts["10.0.0.1"] == 3
+
+    FlakyNetDevice.attempts = {}
+    FlakyNetDevice.fail_first = 5
+    FlakyNetDevice.error_type = "timeout"
+    device = make_device("SW2", "10.0.0.2")
+    assert not scanner.scan_device(device)["success"]
+    assert FlakyNetDevice.attempts["10.0.0.2"] == 3
+
+    output = scanner.scan_device(device)
+    assert output["status"] == "skipped"
+    assert FlakyNetDevice.attempts["10.0.0.2"] == 3
+
+def test_auth_failures_do_not_open_circuits():
+    FlakyNetDevice.attempts = {}
+    FlakyNetDevice.fail_first = 5
+    FlakyNetDevice.error_type = "auth"
+    breaker = CircuitBreaker(None, failure_threshold=1, site_failure_threshold=2)
+    scanner = DeviceScanner(device_factory=FlakyNetDevice, retries=2, retry_wait=0, circuit_breaker=breaker)
+    devices = [make_device(f"SW{i}", f"10.0.1.{i}") for i in range(4)]
+
+    for device in devices + devices:
+        assert scanner.scan_device(device)["status"] == "failed"
+
+    # No retry for a wrong password, and nothing marked down
+    assert FlakyNetDevice.attempts["10.0.1.0"] == 2
+    assert breaker.allow(make_device("OK", "10.0.1.9")) == CLOSED
+
+def test_breaker_latency_only_times_the_connection():
+    FlakyNetDevice.attempts = {}
+    FlakyNetDevice.fail_first = 1
+    FlakyNetDevice.error_type = "timeout"
+    breaker = CircuitBreaker(None)
+    scanner = DeviceScanner(device_factory=FlakyNetDevice, retries=1, retry_wait=0.3, circuit_breaker=breaker)
+    device = make_device("SW1", "10.0.0.1")
+
+    assert scanner.scan_device(device)["success"]
+
+    # The retry wait is not part of the latency
+    assert breaker.devices["10.0.0.1"]["latency"] < 0.1
+
+def test_session_pool_gets_breaker_timeout_and_retries():
+    from src.network.session_pool import SessionPool
+    FlakyNetDevice.attempts = {}
+    FlakyNetDevice.fail_first = 1
+    FlakyNetDevice.error_type = "timeout"
+    breaker = CircuitBreaker(None)
+    breaker.record_success(make_device("SW1", "10.0.0.1"), latency=4.0)
+    pool = SessionPool(device_factory=FlakyNetDevice)
+    scanner = DeviceScanner(retries=1, retry_wait=0, circuit_breaker=breaker, session_pool=pool)
+
+    target, connected = scanner._open_with_breaker(make_device("SW1", "10.0.0.1"))
+
+    assert connected
+    assert target.conn_timeout == 12.0
+    assert FlakyNetDevice.attempts["10.0.0.1"] == 2
@@ -0,0 +1,144 @@
+from src.models.device import Device
+from src.scanners.coordinator import ShardCoordinator, run_sharded
+from src.scanners.sharding import HashRing, shard_by_hash, shard_by_site
+
+VERSION_OUTPUT = """
+Cisco IOS Software, C3560CX Software (C3560CX-UNIVERSALK9-M), Version 15.2(7)E10, RELEASE SOFTWARE (fc3)
+{host} uptime is 8 weeks, 1 day, 5 hours, 56 minutes
+Model number                    : WS-C3560CX-12PC-S
+System serial number            : FOC2323Y11S
+"""
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class FakeNetDevice:
+    def __init__(self, host, username, password, device_type):
+        self.host = host
+        self.status = None
+        self.error = None
+
+    def connect(self):
+        return True
+
+    def send_command(self, command):
+        return VERSION_OUTPUT.format(host=self.host)
+
+    def disconnect(self):
+        pass
+
+def make_devices(count, sites=4):
+    return [Device(hostname=f"SW{i}", mgmt_ip=f"10.0.0.{i}", site=f"site{i % sites}", role="access",
+                   os_type="cisco_ios") for i in range(count)]
+
+def test_consistent_hash_only_moves_devices_of_the_new_shard():
+    before = HashRing(["a", "b", "c"])
+    after = HashRing(["a", "b", "c", "d"])
+    keys = [f"SW{i}" for i in range(1000)]
+    moved = [key for key in keys if before.shard_for(key) != after.shard_for(key)]
+    assert all(after.shard_for(key) == "d" for key in moved)
+    assert 100 < len(moved) < 400
+
+    shards = shard_by_hash(make_devices(1000), 4)
+    assert sum(len(each) for each in shards) == 1000
+    assert min(len(each) for each in shards) > 150
+
+def test_shard_by_site_keeps_sites_together():
+    shards = shard_by_site(make_devices(40, sites=8), 3)
+    for shard in shards:
+        for other in shards:
+            if shard is not other:
+                assert not {d.site for d in shard} & {d.site for d in other}
+    assert sorted(len(each) for each in shards) == [10, 15, 15]
+
+def test_dead_worker_shard_is_reclaimed(tmp_path):
+    clock = Clock()
+    coordinator = ShardCoordinator(tmp_path / "queue.db", lease_timeout=60, clock=clock)
+    devices = make_devices(10)
+    run_id = coordinator.create_run(devices, 1)
+
+    shard_id, entries = coordinator.claim(run_id, "worker-1")
+    assert len(entries) == 10
+    position, device = entries[0]
+    device.scan_status = "success"
+    coordinator.record_result(run_id, shard_id, position, device)
+    # Still leased to worker-1
+    assert coordinator.claim(run_id, "worker-2") is None
+
+    clock.now += 61
+    shard_id, entries = coordinator.claim(run_id, "worker-2")
+    assert len(entries) == 9
+    assert not coordinator.heartbeat(run_id, shard_id, "worker-1")
+    for position, device in entries:
+        device.scan_status = "failed"
+        coordinator.record_result(run_id, shard_id, position, device)
+    coordinator.complete(run_id, shard_id, "worker-2")
+
+    assert coordinator.is_finished(run_id)
+    merged = coordinator.merged_devices(run_id)
+    assert [d.hostname for d in merged] == [d.hostname for d in devices]
+    assert merged[0].scan_status == "success"
+    coordinator.close()
+
+def test_run_sharded_merges_results_in_order(tmp_path):
+    devices = make_devices(30)
+    merged = run_sharded(devices, processes=3, by="site", path=tmp_path / "queue.db",
+                         scanner_options={"device_factory": FakeNetDevice})
+    assert [d.hostname for d in merged] == [d.hostname for d in devices]
+    assert all(d.scan_status == "success" and d.serial_number == "FOC2323Y11S" for d in merged)
+
+def test_run_sharded_with_spawned_workers_and_stores(tmp_path, monkeypatch):
+    import multiprocessing
+    import src.scanners.coordinator as coordinator_module
+    # spawn pickles the worker arguments, as on macOS, Windows and Python 3.14
+    monkeypatch.setattr(coordinator_module, "multiprocessing", multiprocessing.get_context("spawn"))
+    devices = make_devices(6)
+    merged = run_sharded(devices, processes=2, path=tmp_path / "queue.db",
+                         scanner_options={"device_factory": FakeNetDevice, "raw_store_dir": str(tmp_path / "raw"),
+                                          "timeseries_dir": str(tmp_path / "timeseries"), "max_sessions": 4})
+    assert all(d.scan_status == "success" for d in merged)
+    assert (tmp_path / "raw" / "captures.jsonl").exists()
+    assert list((tmp_path / "timeseries" / "raw").glob("*/SW0.bin"))
+
+def test_lost_lease_stops_recording(tmp_path):
+    clock = Clock()
+    coordinator = ShardCoordinator(tmp_path / "queue.db", lease_timeout=60, clock=clock)
+    run_id = coordinator.create_run(make_devices(4), 1)
+    shard_id, entries = coordinator.claim(run_id, "worker-1")
+    clock.now += 61
+    coordinator.claim(run_id, "worker-2")
+
+    position, device = entries[0]
+    assert not coordinator.record_result(run_id, shard_id, position, device, "worker-1")
+    assert coordinator.record_result(run_id, shard_id, position, device, "worker-2")
+    coordinator.close()
+
+def test_scan_all_devices_stops_when_asked():
+    import threading
+    from src.scanners.device_scanner import DeviceScanner
+    stop = threading.Event()
+    scanner = DeviceScanner(device_factory=FakeNetDevice)
+
+    results = scanner.scan_all_devices(make_devices(3), on_result=lambda device, output: stop.set(), stop=stop)
+
+    assert [each["output"].get("status") for each in results] == [None, "stopped", "stopped"]
+
+def test_worker_processes_log_to_the_same_file(tmp_path):
+    import json
+    from src.utils.logger import configure_logging, shutdown_logging
+    log_file = tmp_path / "inventory.log"
+    configure_logging(log_file=log_file, run_id="run-1", console=False)
+    try:
+        run_sharded(make_devices(8), processes=2, path=tmp_path / "queue.db",
+                    scanner_options={"device_factory": FakeNetDevice})
+    finally:
+        shutdown_logging()
+
+    records = [json.loads(line) for line in log_file.read_text().splitlines()]
+    done = [each for each in records if "done" in each["message"]]
+    assert done and all(each["run_id"] == "run-1" for each in done)
+    assert sum(int(each["message"].split("(")[1].split()[0]) for each in done) == 8
@@ -0,0 +1,47 @@
+import json
+from config.credentials import CredentialProvider, EnvBackend, FileBackend, LocalVaultBackend
+from config.settings import get_device_credentials
+from src.collectors.inventory_manager import InventoryManager
+
+def test_devices_share_profiles_by_reference():
+    manager = InventoryManager()
+    devices = manager._convert_to_devices([
+        {"hostname": "SW1", "mgmt_ip": "10.0.0.1", "site": "lab", "role": "access"},
+        {"hostname": "SW2", "mgmt_ip": "10.0.0.2", "site": "lab", "role": "access"},
+        {"hostname": "FW1", "mgmt_ip": "10.0.0.3", "site": "lab", "role": "firewall",
+         "username": "FW_USER", "password": "FW_PASS"},
+    ])
+
+    assert devices[0].credential_profile is devices[1].credential_profile
+    assert devices[2].credential_profile.username_ref == "FW_USER"
+
+def test_provider_fetches_in_bulk_and_caches(tmp_path):
+    vault_path = tmp_path / "vault.json"
+    vault_path.write_text(json.dumps({"secrets": {"FW_USER": "admin", "FW_PASS": "secret"}}))
+    vault = LocalVaultBackend(vault_path)
+    provider = CredentialProvider([vault])
+    profiles = [provider.profile("FW_USER", "FW_PASS"), provider.profile()]
+
+    provider.prefetch(profiles)
+    for _ in range(100):
+        credentials = provider.resolve(profiles[0])
+
+    assert credentials == ("admin", "secret")
+    assert provider.resolve(profiles[1]) == (None, None)
+    assert vault.requests == 1
+
+def test_backends_are_asked_in_order(tmp_path, monkeypatch):
+    secrets_path = tmp_path / "secrets.yaml"
+    secrets_path.write_text("DEFAULT_USERNAME: from-file\n")
+    monkeypatch.setenv("DEFAULT_USERNAME", "from-env")
+    monkeypatch.setenv("DEFAULT_PASSWORD", "env-password")
+    provider = CredentialProvider([FileBackend(secrets_path), EnvBackend()])
+
+    assert provider.resolve(provider.profile()) == ("from-file", "env-password")
+
+def test_get_device_credentials_with_dict(monkeypatch):
+    monkeypatch.setenv("TEST_CRED_USER", "user1")
+    monkeypatch.setenv("TEST_CRED_PASS", "pass1")
+
+    assert get_device_credentials({"hostname": "SW1", "username": "TEST_CRED_USER",
+                                   "password": "TEST_CRED_PASS"}) == ("user1", "pass1")
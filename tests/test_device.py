@@ -1,4 +1,5 @@
-from src.models.device import Device
+from src.models.device import Device, FIELD_NAMES
+from src.models.device_table import DeviceTable
 
 def test_device_creation():
     test_device = Device(
@@ -89,5 +90,45 @@ def test_device_to_dict():
         'collected_os_version': None,
         'uptime': None,
         'last_scanned': None,
-        'scan_status': None
-    }
\ No newline at end of file
+        'scan_status': None,
+        'modules': []
+    }
+
+def test_device_is_slotted():
+    test_device = Device(
+        hostname = "TEST_SW",
+        mgmt_ip = "10.0.0.1",
+        site = "LAB",
+        role = "access",
+        os_type = "cisco_ios"
+    )
+    assert not hasattr(test_device, "__dict__")
+
+def test_device_from_dict_round_trip():
+    test_device = Device(
+        hostname = "TEST_SW",
+        mgmt_ip = "10.0.0.1",
+        site = "LAB",
+        role = "access",
+        os_type = "cisco_ios",
+        serial_number = "FOC123",
+        scan_status = "success"
+    )
+    assert tuple(test_device.to_dict()) == FIELD_NAMES
+    assert Device.from_dict(test_device.to_dict()) == test_device
+
+def test_device_table():
+    devices = [
+        Device(hostname="SW1", mgmt_ip="10.0.0.1", site="lab", role="access", os_type="cisco_ios"),
+        Device(hostname="SW2", mgmt_ip="10.0.0.2", site="dc2", role="core", os_type="cisco_ios"),
+        Device(hostname="SW3", mgmt_ip="10.0.0.3", site="lab", role="core", os_type="cisco_ios"),
+    ]
+
+    table = DeviceTable.from_devices(devices)
+
+    assert len(table) == 3
+    assert table.column("hostname") == ["SW1", "SW2", "SW3"]
+    assert table.to_devices() == devices
+    assert table.row(1) == devices[1]
+    assert table.filter(site="lab", role="core").to_dicts() == [devices[2].to_dict()]
+    assert DeviceTable.from_dicts(table.to_dicts()).to_devices() == devices
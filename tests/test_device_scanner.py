@@ -0,0 +1,126 @@
+import threading
+import time
+from src.models.device import Device
+from src.scanners.device_scanner import DeviceScanner
+
+VERSION_OUTPUT = """
+Cisco IOS Software, C3560CX Software (C3560CX-UNIVERSALK9-M), Version 15.2(7)E10, RELEASE SOFTWARE (fc3)
+HOM-SWA-001 uptime is 8 weeks, 1 day, 5 hours, 56 minutes
+Model number                    : WS-C3560CX-12PC-S
+System serial number            : FOC2323Y11S
+"""
+
+class FakeNetDevice:
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def __init__(self, host, username, password, device_type):
+        self.host = host
+        self.status = None
+        self.error = None
+
+    def connect(self):
+        if self.host.endswith(".99"):
+            self.status = "failed"
+            self.error = "timed out"
+            return False
+        with FakeNetDevice.lock:
+            FakeNetDevice.active += 1
+            FakeNetDevice.max_active = max(FakeNetDevice.max_active, FakeNetDevice.active)
+        return True
+
+    def send_command(self, command):
+        time.sleep(0.01)
+        if command == "show version":
+            return VERSION_OUTPUT
+        return "NAME: \"1\", DESCR: \"WS-C3560CX-12PC-S\""
+
+    def disconnect(self):
+        with FakeNetDevice.lock:
+            FakeNetDevice.active -= 1
+
+def make_devices(count, site="lab"):
+    return [
+        Device(hostname=f"SW-{i}", mgmt_ip=f"10.0.0.{i}", site=site, role="access", os_type="cisco_ios")
+        for i in range(count)
+    ]
+
+def test_scan_all_devices_keeps_input_order():
+    devices = make_devices(10)
+    devices.append(Device(hostname="DEAD", mgmt_ip="10.0.0.99", site="lab", role="access", os_type="cisco_ios"))
+    scanner = DeviceScanner(workers=4, device_factory=FakeNetDevice)
+
+    results = scanner.scan_all_devices(devices)
+
+    assert [result["device"] for result in results] == devices
+    assert all(result["output"]["success"] for result in results[:-1])
+    assert results[-1]["output"]["success"] is False
+    assert devices[0].scan_status == "success"
+    assert devices[0].serial_number == "FOC2323Y11S"
+    assert devices[-1].scan_status == "failed"
+    assert devices[-1].last_scanned is not None
+
+def test_scan_all_devices_respects_site_limit():
+    FakeNetDevice.max_active = 0
+    devices = make_devices(8)
+    scanner = DeviceScanner(workers=8, site_limit=2, device_factory=FakeNetDevice)
+
+    scanner.scan_all_devices(devices)
+
+    assert FakeNetDevice.max_active <= 2
+
+class ProbeNetDevice(FakeNetDevice):
+    commands = []
+
+    def send_command(self, command):
+        ProbeNetDevice.commands.append(command)
+        if command == "show version | include uptime":
+            return "HOM-SWA-001 uptime is 8 weeks, 2 days, 5 hours, 56 minutes"
+        return super().send_command(command)
+
+def test_incremental_scan_skips_unchanged_device():
+    from datetime import datetime, timedelta
+    recent = (datetime.now() - timedelta(hours=1)).isoformat()
+    old = (datetime.now() - timedelta(days=3)).isoformat()
+    unchanged, rebooted, stale, never = make_devices(4)
+    for device, last_scanned, uptime in ((unchanged, recent, "8 weeks, 1 day"),
+                                         (rebooted, recent, "9 weeks"),
+                                         (stale, old, "8 weeks, 1 day")):
+        device.scan_status = "success"
+        device.last_scanned = last_scanned
+        device.uptime = uptime
+    ProbeNetDevice.commands = []
+    scanner = DeviceScanner(device_factory=ProbeNetDevice, incremental=True, max_age=86400)
+
+    results = scanner.scan_all_devices([unchanged, rebooted, stale, never])
+
+    assert [result["output"].get("skipped", False) for result in results] == [True, False, False, False]
+    assert unchanged.uptime == "8 weeks, 2 days, 5 hours, 56 minutes"
+    assert unchanged.last_scanned == recent
+    assert rebooted.last_scanned != recent
+    assert ProbeNetDevice.commands.count("show version") == 3
+
+
+def test_scan_records_metrics_history(tmp_path):
+    from src.storage.timeseries import TimeSeriesStore
+
+    class MetricsNetDevice(FakeNetDevice):
+        def send_command(self, command):
+            if command == "show processes cpu":
+                return ("CPU utilization for five seconds: 5%/1%; one minute: 7%; five minutes: 6%\n"
+                        "   1          12         345         34  0.00%  0.00%  0.00%   0 Chunk Manager\n")
+            return super().send_command(command)
+
+    store = TimeSeriesStore(tmp_path)
+    devices = make_devices(2)
+    scanner = DeviceScanner(device_factory=MetricsNetDevice, timeseries=store)
+
+    results = scanner.scan_all_devices(devices)
+
+    times, cpu = store.query("SW-1", "cpu_percent", tier="raw")
+    _, uptime = store.query("SW-1", "uptime_seconds", tier="raw")
+    assert results[1]["output"]["metrics"]["cpu_percent"] == 6
+    assert len(times) == 1
+    assert cpu[0] == 6
+    assert uptime[0] == 8 * 7 * 86400 + 86400 + 5 * 3600 + 56 * 60
@@ -0,0 +1,41 @@
+import json
+from src.models.device import Device
+from src.storage.file_storage import InventoryStreamWriter, load_inventory_stream
+
+def make_device(hostname):
+    return Device(hostname=hostname, mgmt_ip="10.0.0.1", site="lab", role="access", os_type="cisco_ios")
+
+def test_stream_writer_writes_devices_and_footer(tmp_path):
+    path = tmp_path / "inventory.jsonl"
+
+    with InventoryStreamWriter(path, batch_size=2) as writer:
+        for i in range(5):
+            writer.write(make_device(f"SW-{i}"))
+
+    devices, metadata = load_inventory_stream(path)
+    assert [each["hostname"] for each in devices] == ["SW-0", "SW-1", "SW-2", "SW-3", "SW-4"]
+    assert metadata["device_count"] == 5
+
+def test_stream_writer_flushes_in_batches(tmp_path):
+    path = tmp_path / "inventory.jsonl"
+    writer = InventoryStreamWriter(path, batch_size=2)
+
+    writer.write(make_device("SW-0"))
+    assert path.read_text() == ""
+    writer.write(make_device("SW-1"))
+    assert len(path.read_text().splitlines()) == 2
+    writer.close()
+
+def test_stream_writer_resumes_interrupted_run(tmp_path):
+    path = tmp_path / "inventory.jsonl"
+    lines = [json.dumps(make_device(f"SW-{i}").to_dict()) + "\n" for i in range(2)]
+    # Crash in the middle of the third line
+    path.write_text("".join(lines) + '{"hostname": "SW-')
+
+    with InventoryStreamWriter(path, resume=True) as writer:
+        assert writer.completed == {"SW-0", "SW-1"}
+        writer.write(make_device("SW-2"))
+
+    devices, metadata = load_inventory_stream(path)
+    assert [each["hostname"] for each in devices] == ["SW-0", "SW-1", "SW-2"]
+    assert metadata["device_count"] == 3
@@ -0,0 +1,76 @@
+from src.collectors.inventory_diff import diff_inventories, fingerprint
+from src.models.device import Device
+from src.utils.uptime import parse_uptime
+
+def make_device(hostname, **fields):
+    values = dict(mgmt_ip="10.0.0.1", site="lab", role="access", os_type="cisco_ios",
+                  serial_number=f"FOC-{hostname}", collected_os_version="15.2", uptime="2 weeks, 1 day",
+                  scan_status="success")
+    values.update(fields)
+    return Device(hostname=hostname, **values)
+
+def test_parse_uptime():
+    assert parse_uptime("8 weeks, 1 day, 5 hours, 56 minutes") == 8 * 604800 + 86400 + 5 * 3600 + 56 * 60
+    assert parse_uptime("1 year, 2 minutes") == 365 * 86400 + 120
+    assert parse_uptime(None) is None
+    assert parse_uptime("unknown") is None
+
+def test_fingerprint_ignores_uptime():
+    assert fingerprint(make_device("SW1").to_dict()) == fingerprint(make_device("SW1", uptime="3 weeks").to_dict())
+    assert fingerprint(make_device("SW1").to_dict()) != fingerprint(make_device("SW1", model="X").to_dict())
+
+def test_diff_inventories():
+    old = [
+        make_device("SW1"),
+        make_device("SW2"),
+        make_device("SW3"),
+        make_device("SW4"),
+        make_device("OLD-NAME", serial_number="FOC-MOVED"),
+        make_device("GONE"),
+    ]
+    new = [
+        make_device("SW1", uptime="2 weeks, 2 days"),
+        make_device("SW2", collected_os_version="17.3", uptime="5 minutes"),
+        make_device("SW3", scan_status="failed"),
+        make_device("SW4", serial_number="FOC-NEW"),
+        make_device("NEW-NAME", serial_number="FOC-MOVED"),
+        make_device("ADDED"),
+    ]
+
+    changeset = diff_inventories(old, new)
+
+    assert changeset.added == ["ADDED"]
+    assert changeset.removed == ["GONE"]
+    assert changeset.unchanged_count == 1
+    changes = {each.hostname: each for each in changeset.changed}
+    assert changes["SW2"].events == ["os_changed", "rebooted"]
+    assert changes["SW2"].changes["collected_os_version"] == ["15.2", "17.3"]
+    assert changes["SW3"].events == ["status_changed"]
+    assert changes["SW4"].events == ["serial_changed"]
+    assert changes["NEW-NAME"].events == ["renamed"]
+    assert changes["NEW-NAME"].previous_hostname == "OLD-NAME"
+
+def test_diff_fingerprints_each_record_once(monkeypatch):
+    from src.collectors import inventory_diff
+    calls = []
+    monkeypatch.setattr(inventory_diff, "fingerprint", lambda record: calls.append(record["hostname"]) or fingerprint(record))
+    old = [make_device("SW1"), make_device("OLD-NAME", serial_number="FOC-R")]
+    new = [make_device("SW1", model="X"), make_device("NEW-NAME", serial_number="FOC-R")]
+
+    changeset = diff_inventories(old, new)
+
+    assert sorted(calls) == ["NEW-NAME", "OLD-NAME", "SW1", "SW1"]
+    assert [each.hostname for each in changeset.changed] == ["SW1", "NEW-NAME"]
+
+def test_diff_reports_module_changes():
+    sfp = {"name": "Gi1/0/1", "pid": "GLC-SX-MMD", "serial": "AGM1"}
+    chassis = {"name": "1", "pid": "WS-C3560CX", "serial": "FOC1"}
+    old = [make_device("SW1", modules=[chassis, sfp]), make_device("SW2", modules=[chassis, sfp])]
+    new = [make_device("SW1", modules=[dict(reversed(list(sfp.items()))), chassis]),
+           make_device("SW2", modules=[chassis, {**sfp, "serial": "AGM2"}])]
+
+    changeset = diff_inventories(old, new)
+
+    assert changeset.unchanged_count == 1
+    assert [(each.hostname, each.events) for each in changeset.changed] == [("SW2", ["modules_changed"])]
+    assert changeset.changed[0].changes["modules"][1][1]["serial"] == "AGM2"
@@ -1,4 +1,7 @@
+import logging
+import pytest
 from src.collectors.inventory_manager import InventoryManager
+from src.models.device import Device
 
 def test_inventory_manager_load_from_yaml():
     # Arrange
@@ -14,4 +17,163 @@ def test_inventory_manager_load_from_yaml():
     assert manager.devices[0].site == "TEST-LAB"
     assert manager.devices[0].role == "access"
     assert manager.devices[0].os_type == "cisco_ios"
-    assert manager.devices[0].vendor == "Cisco"
\ No newline at end of file
+    assert manager.devices[0].vendor == "Cisco"
+
+def test_inventory_manager_apply_previous_state():
+    manager = InventoryManager()
+    manager.load_from_yaml("tests/test_devices.yaml")
+
+    count = manager.apply_previous_state([
+        {"hostname": "TEST-SW-001", "serial_number": "FOC123", "uptime": "1 day", "scan_status": "success"},
+        {"hostname": "OTHER", "serial_number": "FOC999"},
+    ])
+
+    assert count == 1
+    assert manager.devices[0].serial_number == "FOC123"
+    assert manager.devices[0].scan_status == "success"
+
+INVALID_INVENTORY = """
+meta:
+  version: 1
+devices:
+  - hostname: GOOD-SW-001
+    mgmt_ip: 10.0.0.1
+    site: lab
+    role: access
+    os_type: cisco_ios
+    os_version: 15.2
+  - hostname: BAD SW
+    mgmt_ip: 10.0.999.5
+    site: two words
+    role: printer
+  - hostname: NO-IP
+    site: lab
+    role: core
+"""
+
+def test_inventory_manager_skips_invalid_devices(tmp_path, caplog):
+    path = tmp_path / "inventory.yaml"
+    path.write_text(INVALID_INVENTORY)
+    manager = InventoryManager()
+
+    with caplog.at_level(logging.WARNING, logger="src.collectors.inventory_manager"):
+        manager.load_from_yaml(path)
+
+    assert [device.hostname for device in manager.devices] == ["GOOD-SW-001"]
+    errors = {raw["hostname"]: errors for raw, errors in manager.invalid_devices}
+    assert len(errors["BAD SW"]) == 4
+    assert errors["NO-IP"] == ["missing mgmt_ip"]
+    assert "Skipping invalid device NO-IP: missing mgmt_ip" in caplog.messages
+
+def test_inventory_manager_streaming_load_matches_full_load(tmp_path):
+    path = tmp_path / "inventory.yaml"
+    path.write_text(INVALID_INVENTORY)
+
+    streamed = list(InventoryManager().iter_from_yaml(path))
+    loaded = InventoryManager().load_from_yaml(path)
+
+    assert streamed == loaded
+    assert streamed[0].os_version == 15.2
+
+def test_load_yaml_inventory_cache(tmp_path):
+    from config.settings import load_yaml_inventory
+    path = tmp_path / "inventory.yaml"
+    path.write_text(INVALID_INVENTORY)
+
+    first = load_yaml_inventory(path, use_cache=True, cache_dir=tmp_path / "cache")
+    assert len(list((tmp_path / "cache").iterdir())) == 1
+    second = load_yaml_inventory(path, use_cache=True, cache_dir=tmp_path / "cache")
+    assert first == second
+
+    path.write_text(INVALID_INVENTORY.replace("GOOD-SW-001", "RENAMED-001"))
+    third = load_yaml_inventory(path, use_cache=True, cache_dir=tmp_path / "cache")
+    assert third[0]["hostname"] == "RENAMED-001"
+
+
+def make_indexed_manager():
+    manager = InventoryManager()
+    manager.devices = [
+        Device(hostname=f"SW-{number:03d}", mgmt_ip=f"10.0.0.{number}", site="PAR-01" if number % 2 else "LYO-01",
+               role="core" if number < 3 else "access", os_type="cisco_ios", serial_number=f"FOC{number:04d}")
+        for number in range(1, 11)
+    ]
+    return manager
+
+
+def test_inventory_manager_find():
+    manager = make_indexed_manager()
+
+    assert [each.hostname for each in manager.find(site="PAR-01", role="core")] == ["SW-001"]
+    assert [each.hostname for each in manager.find(mgmt_ip="10.0.0.7")] == ["SW-007"]
+    assert len(manager.find(role=["core", "access"], site="LYO-01")) == 5
+    assert [each.hostname for each in manager.find(serial_prefix="FOC000")] == [f"SW-00{n}" for n in range(1, 10)]
+    assert manager.find(site="PAR-01", scan_status="success") == []
+    assert manager.get_device("SW-010").mgmt_ip == "10.0.0.10"
+    assert manager.get_device("MISSING") is None
+
+
+def test_inventory_manager_find_follows_changes():
+    manager = make_indexed_manager()
+    device = manager.get_device("SW-004")
+
+    device.site = "PAR-01"
+    device.serial_number = "JAE0001"
+    manager.apply_previous_state([{"hostname": "SW-005", "model": "C9300-48P"}])
+
+    assert device in manager.find(site="PAR-01")
+    assert device not in manager.find(site="LYO-01")
+    assert manager.find(serial_prefix="JAE") == [device]
+    assert [each.hostname for each in manager.find(model="C9300-48P")] == ["SW-005"]
+
+
+def test_inventory_manager_add_remove_device():
+    manager = make_indexed_manager()
+    added = Device(hostname="RT-001", mgmt_ip="10.0.1.1", site="PAR-01", role="router", os_type="cisco_ios")
+
+    manager.add_device(added)
+    removed = manager.get_device("SW-001")
+    manager.remove_device(removed)
+    removed.site = "LYO-01"
+
+    assert manager.find(role="router") == [added]
+    assert removed not in manager.find(site="LYO-01")
+    assert type(removed) is Device
+    assert manager.get_device("SW-002") == Device.from_dict(manager.get_device("SW-002").to_dict())
+
+
+def test_inventory_manager_remove_device_by_identity():
+    first = Device(hostname="SW-001", mgmt_ip="10.0.0.1", site="PAR-01", role="access", os_type="cisco_ios")
+    twin = Device(hostname="SW-001", mgmt_ip="10.0.0.1", site="PAR-01", role="access", os_type="cisco_ios")
+    manager = InventoryManager()
+    manager.devices = [first, twin]
+    other = InventoryManager()
+    other.devices = [twin]
+
+    manager.remove_device(twin)
+    twin.site = "LYO-01"
+
+    assert len(manager.devices) == 1 and manager.devices[0] is first
+    assert manager.find(site="PAR-01") == [first]
+    assert other.find(site="LYO-01")[0] is twin
+    with pytest.raises(ValueError):
+        manager.remove_device(twin)
+
+
+def test_inventory_manager_devices_list_keeps_the_index_in_step():
+    import pickle
+    manager = make_indexed_manager()
+    added = Device(hostname="RT-001", mgmt_ip="10.0.1.1", site="PAR-01", role="router", os_type="cisco_ios")
+
+    manager.devices.append(added)
+    manager.devices.remove(manager.get_device("SW-001"))
+    del manager.devices[0]
+    manager.devices.insert(0, manager.devices.pop())
+    manager.devices += [Device(hostname="RT-002", mgmt_ip="10.0.1.2", site="LYO-01", role="router",
+                               os_type="cisco_ios")]
+
+    assert manager.get_device("SW-001") is None and manager.get_device("SW-002") is None
+    assert [each.hostname for each in manager.find(role="router")] == ["RT-001", "RT-002"]
+    added.role = "firewall"
+    assert [each.hostname for each in manager.find(role="router")] == ["RT-002"]
+    assert isinstance(manager.devices, list) and len(manager.devices) == 10
+    assert type(pickle.loads(pickle.dumps(manager.devices))) is list
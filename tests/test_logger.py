@@ -0,0 +1,56 @@
+import json
+import logging
+import threading
+import time
+from src.utils.logger import configure_logging, shutdown_logging, log_context
+
+def read_records(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+def test_json_records_with_context(tmp_path):
+    log_file = tmp_path / "inventory.log"
+    configure_logging(log_file=log_file, run_id="run-1", console=False,
+                      module_levels={"src.test_quiet": "ERROR"})
+    logger = logging.getLogger("src.test_logger")
+
+    def work(index):
+        with log_context(device=f"SW{index}", site="lab"):
+            logger.info("scanned %s", index, extra={"seconds": 1.5})
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(4)]
+    for each in threads:
+        each.start()
+    for each in threads:
+        each.join()
+    logger.debug("not logged at INFO")
+    logging.getLogger("src.test_quiet").warning("below the module level")
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("failed")
+    shutdown_logging()
+
+    records = read_records(log_file)
+    scans = sorted((each for each in records if each["message"].startswith("scanned")), key=lambda r: r["device"])
+    assert [each["message"] for each in scans] == [f"scanned {i}" for i in range(4)]
+    assert all(each["device"] == f"SW{i}" and each["site"] == "lab" for i, each in enumerate(scans))
+    assert scans[0]["run_id"] == "run-1"
+    assert scans[0]["seconds"] == 1.5
+    assert scans[0]["logger"] == "src.test_logger"
+    assert records[-1]["level"] == "ERROR" and "ValueError: boom" in records[-1]["exception"]
+    assert len(records) == 5
+
+def test_rotation_and_throughput(tmp_path):
+    log_file = tmp_path / "inventory.log"
+    configure_logging(log_file=log_file, max_bytes=200_000, backup_count=3, console=False)
+    logger = logging.getLogger("src.test_logger")
+    start = time.perf_counter()
+    for i in range(10000):
+        logger.info("line %d", i)
+    # Only the time to queue the records, the writes happen in the background
+    elapsed = time.perf_counter() - start
+    shutdown_logging()
+
+    # 10k lines/s must stay far from the budget of the scanning threads
+    assert elapsed < 3.0
+    assert (tmp_path / "inventory.log.1").exists()
+    assert not (tmp_path / "inventory.log.4").exists()
@@ -0,0 +1,85 @@
+import pytest
+from benchmarks.startup import measure
+from main import parse_args
+
+def test_no_command_means_scan():
+    args = parse_args(["--workers", "20", "--incremental"])
+    assert args.command == "scan"
+    assert args.workers == 20 and args.incremental
+
+    args = parse_args(["diff", "old.json", "new.jsonl", "--save"])
+    assert (args.command, args.old, args.new, args.save) == ("diff", "old.json", "new.jsonl", True)
+
+def test_logging_options_before_the_command():
+    args = parse_args(["--log-level", "DEBUG", "--log-module=src.network=DEBUG", "list", "--site", "PAR-01"])
+    assert (args.command, args.log_level, args.log_module, args.site) == ("list", "DEBUG", ["src.network=DEBUG"],
+                                                                           "PAR-01")
+
+    args = parse_args(["--log-level", "DEBUG", "--workers", "5"])
+    assert (args.command, args.log_level, args.workers) == ("scan", "DEBUG", 5)
+
+@pytest.mark.parametrize("command", ["--help", "scan --help", "diff --help"])
+def test_help_does_not_import_heavy_modules(command):
+    seconds, modules = measure(command, repeat=1)
+    assert modules == []
+
+def test_exec_command_arguments():
+    args = parse_args(["exec", "show ip int brief", "show clock", "--role", "core", "--role", "distribution",
+                       "--timeout", "30"])
+    assert args.command == "exec"
+    assert args.commands == ["show ip int brief", "show clock"]
+    assert (args.role, args.site, args.timeout) == (["core", "distribution"], None, 30)
+
+@pytest.mark.parametrize("flag", ["--circuit-breaker", "--resume=out.jsonl", "--profile=p.json", "--async"])
+def test_processes_rejects_options_it_cannot_apply(flag, capsys):
+    with pytest.raises(SystemExit):
+        parse_args(["scan", "--processes", "2", flag])
+    assert "can't be used with --processes" in capsys.readouterr().err
+
+@pytest.mark.parametrize("flag", ["--incremental", "--circuit-breaker", "--max-sessions=4", "--profile=p.json",
+                                  "--prometheus=m.prom", "--history"])
+def test_async_rejects_options_it_cannot_apply(flag, capsys):
+    with pytest.raises(SystemExit):
+        parse_args(["scan", "--async", flag])
+    assert "can't be used with --async" in capsys.readouterr().err
+
+def test_resumed_scan_exports_the_devices_scanned_before(tmp_path, monkeypatch):
+    from main import run_scan
+    from src.collectors.inventory_manager import InventoryManager
+    from src.models.device import Device
+    from src.scanners.device_scanner import DeviceScanner
+    from src.storage.file_storage import InventoryStreamWriter
+    from src.storage.sqlite_storage import InventoryDatabase
+
+    def make(hostname, **fields):
+        return Device(hostname=hostname, mgmt_ip="10.0.0.1", site="lab", role="access", os_type="cisco_ios", **fields)
+
+    snapshot = tmp_path / "run.jsonl"
+    with InventoryStreamWriter(path=snapshot) as writer:
+        writer.write(make("SW1", model="C9300", scan_status="success", last_scanned="2025-12-18T10:00:00"))
+
+    def load_from_yaml(self, path=None, validate=True, use_cache=False):
+        self.devices = [make("SW1"), make("SW2")]
+
+    def scan_device(self, device):
+        self._update_device(device, model="C9200", scan_status="success", last_scanned="2025-12-19T10:00:00")
+        return {'success': True, 'version': None, 'modules': []}
+
+    monkeypatch.setattr(InventoryManager, "load_from_yaml", load_from_yaml)
+    monkeypatch.setattr(InventoryManager, "prefetch_credentials", lambda self: None)
+    monkeypatch.setattr(DeviceScanner, "scan_device", scan_device)
+    database_path = tmp_path / "inventory.db"
+
+    run_scan(parse_args(["scan", "--resume", str(snapshot), "--db", str(database_path), "--no-raw-store"]))
+
+    with InventoryDatabase(database_path) as database:
+        models = {device.hostname: device.model for device in database.load_devices()}
+    assert models == {"SW1": "C9300", "SW2": "C9200"}
+
+@pytest.mark.parametrize("flag", ["--profile=p.json", "--prometheus=m.prom", "--resume=out.jsonl", "--parquet",
+                                  "--batch-size=10"])
+def test_daemon_rejects_options_it_cannot_apply(flag, capsys):
+    with pytest.raises(SystemExit):
+        parse_args(["scan", "--daemon", flag])
+    assert "can't be used with --daemon" in capsys.readouterr().err
+    assert parse_args(["scan", "--daemon", "--db"]).daemon
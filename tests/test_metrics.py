@@ -0,0 +1,47 @@
+from src.models.device import Device
+from src.scanners.device_scanner import DeviceScanner
+from src.utils.metrics import ScanMetrics, percentile
+from tests.test_device_scanner import FakeNetDevice
+
+def make_device(hostname, site):
+    return Device(hostname=hostname, mgmt_ip="10.0.0.1", site=site, role="access", os_type="cisco_ios")
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.95) == 95
+    assert percentile(values, 0.99) == 99
+    assert percentile([], 0.5) is None
+
+def test_report_groups_by_device_fields():
+    metrics = ScanMetrics()
+    lab, dc = make_device("SW1", "lab"), make_device("SW2", "dc2")
+    metrics.record(lab, "connect", 1.0)
+    metrics.record(dc, "connect", 3.0)
+    dc.model = "C9300"
+
+    rows = {(row["phase"], row["group"], row["value"]): row for row in metrics.report()["phases"]}
+
+    assert rows[("connect", "all", "all")]["count"] == 2
+    assert rows[("connect", "site", "dc2")]["p95"] == 3.0
+    assert rows[("connect", "model", "C9300")]["count"] == 1
+    assert rows[("connect", "model", "unknown")]["count"] == 1
+    assert metrics.slowest("connect", "site")[0]["value"] == "dc2"
+
+def test_scanner_records_each_phase(tmp_path):
+    metrics = ScanMetrics()
+    scanner = DeviceScanner(device_factory=FakeNetDevice, metrics=metrics)
+
+    scanner.scan_all_devices([make_device("SW1", "lab")], on_result=lambda device, output: None)
+
+    phases = {row["phase"] for row in metrics.report()["phases"]}
+    assert phases == {"credentials", "connect", "send_command:show version", "send_command:show inventory",
+                      "parse", "persist"}
+
+    metrics.write_prometheus(tmp_path / "scan.prom")
+    text = (tmp_path / "scan.prom").read_text()
+    assert 'inventory_scan_phase_seconds{phase="parse",quantile="0.95"}' in text
+    assert 'inventory_scan_phase_seconds_by_site_count{phase="parse",site="lab"} 1' in text
+    # One metric per grouping: a sum() over a metric counts each scan once
+    assert 'inventory_scan_phase_seconds_count{phase="parse",site=' not in text
+    assert text.count("# TYPE inventory_scan_phase_seconds summary") == 1
@@ -0,0 +1,43 @@
+import json
+from datetime import datetime
+from src.models.device import Device
+from src.storage.parquet_storage import save_inventory_to_parquet, query_snapshots, convert_json_snapshot, device_schema
+
+def make_device(hostname, site, os_version):
+    return Device(hostname=hostname, mgmt_ip="10.0.0.1", site=site, role="access",
+                  os_type="cisco_ios", collected_os_version=os_version)
+
+def test_schema_follows_device_fields():
+    schema = device_schema()
+    assert "serial_number" in schema.names
+    assert "snapshot_time" in schema.names
+    assert str(schema.field("hostname").type) == "string"
+
+def test_save_and_query_snapshots(tmp_path):
+    save_inventory_to_parquet([make_device("SW1", "lab", "15.2"), make_device("SW2", "dc2", "17.3")],
+                              tmp_path, datetime(2025, 12, 1, 10, 0))
+    save_inventory_to_parquet([make_device("SW1", "lab", "17.3"), make_device("SW2", "dc2", "17.3")],
+                              tmp_path, datetime(2025, 12, 2, 10, 0))
+
+    assert (tmp_path / "date=2025-12-01" / "site=lab").is_dir()
+
+    result = query_snapshots(columns=["hostname", "collected_os_version", "date"], sites=["lab"], output_dir=tmp_path)
+    assert sorted(result["collected_os_version"]) == ["15.2", "17.3"]
+    assert list(result.columns) == ["hostname", "collected_os_version", "date"]
+
+    result = query_snapshots(start="2025-12-02", output_dir=tmp_path)
+    assert len(result) == 2
+    assert set(result["site"]) == {"lab", "dc2"}
+
+def test_convert_json_snapshot(tmp_path):
+    json_path = tmp_path / "inventory_20251201_100000.json"
+    json_path.write_text(json.dumps({
+        "metadata": {"generated_at": "2025-12-01T10:00:00", "device_count": 1, "version": "1.0"},
+        "devices": [make_device("SW1", "lab", "15.2").to_dict()]
+    }))
+
+    convert_json_snapshot(json_path, tmp_path / "parquet")
+
+    result = query_snapshots(output_dir=tmp_path / "parquet")
+    assert list(result["hostname"]) == ["SW1"]
+    assert list(result["date"]) == ["2025-12-01"]
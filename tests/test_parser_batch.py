@@ -0,0 +1,56 @@
+from src.parsers.batch import parse_many, parse_directory, parse_store
+from src.storage.raw_store import RawOutputStore
+from tests.test_device_scanner import VERSION_OUTPUT
+
+INVENTORY_OUTPUT = """
+NAME: "1", DESCR: "WS-C3560CX-12PC-S"
+PID: WS-C3560CX-12PC-S , VID: V03  , SN: FOC2323Y11S
+
+NAME: "GigabitEthernet1/0/15", DESCR: "1000BaseSX SFP"
+PID: GLC-SX-MMD        , VID: V01  , SN: AGM1234567
+"""
+
+def test_parse_many_keeps_order_across_processes():
+    outputs = [VERSION_OUTPUT.replace("HOM-SWA-001", f"SW-{i}") for i in range(100)]
+    outputs[50] = "Invalid command"
+
+    results = parse_many(outputs, "show version", "cisco_ios", workers=2, chunksize=10)
+
+    assert len(results) == 100
+    assert results[0][0]["HOSTNAME"] == "SW-0"
+    assert results[99][0]["HOSTNAME"] == "SW-99"
+    assert results[50] == []
+
+def test_parse_show_inventory():
+    results = parse_many([INVENTORY_OUTPUT], "show inventory", "cisco_ios")
+
+    assert results[0] == [
+        {"NAME": "1", "DESCR": "WS-C3560CX-12PC-S", "PID": "WS-C3560CX-12PC-S", "VID": "V03", "SN": "FOC2323Y11S"},
+        {"NAME": "GigabitEthernet1/0/15", "DESCR": "1000BaseSX SFP", "PID": "GLC-SX-MMD", "VID": "V01", "SN": "AGM1234567"},
+    ]
+
+def test_parse_directory(tmp_path):
+    (tmp_path / "sw1_show_version.txt").write_text(VERSION_OUTPUT)
+    (tmp_path / "sw2_show_version.txt").write_text(VERSION_OUTPUT.replace("HOM-SWA-001", "SW2"))
+    (tmp_path / "notes.md").write_text("not an output")
+
+    results = parse_directory(tmp_path, "show version", "cisco_ios")
+
+    assert list(results) == ["sw1_show_version.txt", "sw2_show_version.txt"]
+    assert results["sw2_show_version.txt"][0]["HOSTNAME"] == "SW2"
+
+def test_parse_store(tmp_path):
+    store = RawOutputStore(tmp_path)
+    store.save("SW1", "show version", VERSION_OUTPUT, "2025-12-18T10:00:00")
+    store.save("SW1", "show version", VERSION_OUTPUT, "2025-12-19T10:00:00")
+    store.save("SW2", "show version", VERSION_OUTPUT.replace("HOM-SWA-001", "SW2"), "2025-12-19T10:00:00")
+    store.save("SW2", "show inventory", INVENTORY_OUTPUT, "2025-12-19T10:00:00")
+
+    results = parse_store(store, "show version", "cisco_ios")
+
+    assert [(capture["hostname"], records[0]["HOSTNAME"]) for capture, records in results] == [
+        ("SW1", "HOM-SWA-001"), ("SW1", "HOM-SWA-001"), ("SW2", "SW2")
+    ]
+    assert [capture["timestamp"] for capture, _ in parse_store(store, "show version", "cisco_ios", hostname="SW1")] == [
+        "2025-12-18T10:00:00", "2025-12-19T10:00:00"
+    ]
@@ -0,0 +1,49 @@
+import os
+import pytest
+import textfsm
+from src.parsers.registry import ParserRegistry
+
+TEMPLATE = """Value HOSTNAME (\\S+)
+
+Start
+  ^${HOSTNAME}\\s+uptime -> Record
+"""
+
+def write_template(path, text, mtime):
+    path.write_text(text)
+    os.utime(path, ns=(mtime, mtime))
+
+def test_template_is_compiled_once(tmp_path, monkeypatch):
+    write_template(tmp_path / "test.template", TEMPLATE, 1_000_000_000)
+    registry = ParserRegistry(templates={("test_os", "show version"): "test.template"}, template_dir=tmp_path)
+    compiled = []
+    original = textfsm.TextFSM
+
+    def counting_textfsm(template):
+        compiled.append(template)
+        return original(template)
+
+    monkeypatch.setattr(textfsm, "TextFSM", counting_textfsm)
+
+    for _ in range(5):
+        result = registry.parse("test_os", "show version", "SW1 uptime is 1 day\n")
+
+    assert result == [{"HOSTNAME": "SW1"}]
+    assert len(compiled) == 1
+
+def test_template_is_reloaded_when_file_changes(tmp_path):
+    template = tmp_path / "test.template"
+    write_template(template, TEMPLATE, 1_000_000_000)
+    registry = ParserRegistry(templates={("test_os", "show version"): "test.template"},
+                              template_dir=tmp_path, reload_interval=0)
+
+    assert registry.parse("test_os", "show version", "SW1 uptime is 1 day\n") == [{"HOSTNAME": "SW1"}]
+
+    write_template(template, TEMPLATE.replace("HOSTNAME", "NAME"), 2_000_000_000)
+
+    assert registry.parse("test_os", "show version", "SW1 uptime is 1 day\n") == [{"NAME": "SW1"}]
+
+def test_unknown_template_raises():
+    registry = ParserRegistry(templates={})
+    with pytest.raises(ValueError, match="junos"):
+        registry.parse("junos", "show version", "")
@@ -0,0 +1,205 @@
+import pytest
+from src.models.device import Device
+from src.parsers.ntc_index import NtcIndex
+from src.parsers.platforms import parse_version, parse_inventory, parse_metrics, scan_commands
+from src.parsers.registry import ParserRegistry
+from src.scanners.device_scanner import DeviceScanner
+from src.storage.sqlite_storage import InventoryDatabase
+
+NXOS_VERSION = """Cisco Nexus Operating System (NX-OS) Software
+TAC support: http://www.cisco.com/tac
+Copyright (C) 2002-2019, Cisco and/or its affiliates.
+
+Software
+  BIOS: version 07.66
+  NXOS: version 9.3(3)
+  BIOS compile time:  06/12/2019
+  NXOS image file is: bootflash:///nxos.9.3.3.bin
+  NXOS compile time:  12/22/2019 2:00:00 [12/22/2019 14:00:37]
+
+
+Hardware
+  cisco Nexus9000 C93180YC-EX chassis
+  Intel(R) Xeon(R) CPU  @ 1.80GHz with 24632252 kB of memory.
+  Processor Board ID FDO21120U5D
+
+  Device name: NX-LEAF-01
+  bootflash:   53298520 kB
+Kernel uptime is 12 day(s), 3 hour(s), 41 minute(s), 15 second(s)
+
+Last reset at 151214 usecs after Fri Jan 10 09:43:25 2020
+  Reason: Reset Requested by CLI command reload
+  System version: 9.3(3)
+  Service:
+
+plugin
+  Core Plugin, Ethernet Plugin
+"""
+
+NXOS_INVENTORY = """NAME: "Chassis",  DESCR: "Nexus9000 C93180YC-EX chassis"
+PID: N9K-C93180YC-EX     ,  VID: V03 ,  SN: FDO21120U5D
+
+NAME: "Slot 1",  DESCR: "48x10/25G + 6x40/100G Ethernet Module"
+PID: N9K-C93180YC-EX     ,  VID: V03 ,  SN: FDO21120U5D
+
+NAME: "Power Supply 1",  DESCR: "Nexus9000 C93180YC-EX chassis Power Supply"
+PID: NXA-PAC-650W-PE     ,  VID: V01 ,  SN: ART2118F2NA
+"""
+
+EOS_VERSION = """Arista DCS-7050TX-64-R
+Hardware version:    01.11
+Serial number:       JPE16121464
+System MAC address:  444c.a8a5.9b51
+
+Software image version: 4.21.1F
+Architecture:           i386
+Internal build version: 4.21.1F-9887494.4211F
+Internal build ID:      1497e24b-a79b-48e7-a876-43061e109b92
+
+Uptime:                 5 weeks, 1 day, 2 hours and 3 minutes
+Total memory:           3818208 kB
+Free memory:            2428324 kB
+"""
+
+JUNOS_VERSION = """Hostname: JUNOS-MX-01
+Model: mx480
+Junos: 18.2R3-S2.9
+JUNOS OS Kernel 64-bit  [20190814.1ef5acd_builder_stable_11]
+"""
+
+IOS_INVENTORY = """NAME: "1", DESCR: "WS-C3560CX-12PC-S"
+PID: WS-C3560CX-12PC-S , VID: V03  , SN: FOC2323Y11S
+
+NAME: "GigabitEthernet0/13", DESCR: "1000BaseSX SFP"
+PID: GLC-SX-MMD          , VID: V01  , SN: FNS12345678
+"""
+
+IOS_VERSION = """
+Cisco IOS Software, C3560CX Software (C3560CX-UNIVERSALK9-M), Version 15.2(7)E10, RELEASE SOFTWARE (fc3)
+HOM-SWA-001 uptime is 8 weeks, 1 day, 5 hours, 56 minutes
+Model number                    : WS-C3560CX-12PC-S
+System serial number            : FOC2323Y11S
+"""
+
+TEMPLATE = """Value NAME (\\S+)
+
+Start
+  ^${NAME} -> Record
+"""
+
+INDEX = """# comment
+Template, Hostname, Platform, Command
+
+test_show_interfaces_status.template, .*, test_os, sh[[ow]] int[[erfaces]] st[[atus]]
+test_show_interfaces.template, .*, test_os, sh[[ow]] int[[erfaces]]
+"""
+
+def test_nxos_version_and_inventory():
+    assert parse_version("cisco_nxos", NXOS_VERSION) == {
+        "model": "C93180YC-EX",
+        "serial_number": "FDO21120U5D",
+        "os_version": "9.3(3)",
+        "uptime": "12 day(s), 3 hour(s), 41 minute(s), 15 second(s)",
+        "hostname": "NX-LEAF-01",
+    }
+    modules = parse_inventory("cisco_nxos", NXOS_INVENTORY)
+    assert [module["serial"] for module in modules] == ["FDO21120U5D", "FDO21120U5D", "ART2118F2NA"]
+    assert modules[2]["pid"] == "NXA-PAC-650W-PE"
+
+def test_eos_and_junos_version():
+    eos = parse_version("arista_eos", EOS_VERSION)
+    assert (eos["model"], eos["serial_number"], eos["os_version"]) == ("DCS-7050TX-64-R", "JPE16121464", "4.21.1F")
+    junos = parse_version("juniper_junos", JUNOS_VERSION)
+    assert (junos["model"], junos["os_version"], junos["hostname"]) == ("mx480", "18.2R3-S2.9", "JUNOS-MX-01")
+    assert scan_commands("juniper_junos")["inventory"] == "show chassis hardware"
+
+def test_ios_xe_uses_ios_templates():
+    modules = parse_inventory("cisco_xe", IOS_INVENTORY)
+    assert modules == [
+        {"name": "1", "description": "WS-C3560CX-12PC-S", "pid": "WS-C3560CX-12PC-S", "vid": "V03",
+         "serial": "FOC2323Y11S"},
+        {"name": "GigabitEthernet0/13", "description": "1000BaseSX SFP", "pid": "GLC-SX-MMD", "vid": "V01",
+         "serial": "FNS12345678"},
+    ]
+    assert parse_version("cisco_xe", IOS_VERSION)["model"] == "WS-C3560CX-12PC-S"
+
+def test_ntc_index_lookup_and_cache(tmp_path):
+    template_dir = tmp_path / "templates"
+    template_dir.mkdir()
+    (template_dir / "index").write_text(INDEX)
+    (template_dir / "test_show_interfaces.template").write_text(TEMPLATE)
+    cache_dir = tmp_path / "cache"
+
+    index = NtcIndex(template_dir, cache_dir)
+    assert index.lookup("test_os", "sh int status").name == "test_show_interfaces_status.template"
+    assert index.lookup("test_os", "show interfaces").name == "test_show_interfaces.template"
+    assert index.lookup("test_os", "show version") is None
+    assert index.lookup("other_os", "show interfaces") is None
+    assert (cache_dir / "ntc_index.pickle").exists()
+
+    # Local templates first, then the index
+    registry = ParserRegistry(templates={}, fallback=NtcIndex(template_dir, cache_dir))
+    assert registry.has_template("test_os", "sh int")
+    assert registry.parse("test_os", "show interfaces", "Gi0/1\nGi0/2\n") == [{"NAME": "Gi0/1"}, {"NAME": "Gi0/2"}]
+    with pytest.raises(ValueError):
+        registry.parse("test_os", "show version", "")
+
+class NxosNetDevice:
+    def __init__(self, host, username, password, device_type):
+        self.status = None
+        self.error = None
+
+    def connect(self):
+        return True
+
+    def send_command(self, command):
+        return NXOS_VERSION if command == "show version" else NXOS_INVENTORY
+
+    def disconnect(self):
+        pass
+
+def test_scanner_keeps_modules():
+    device = Device(hostname="NX-LEAF-01", mgmt_ip="10.0.0.1", site="dc1", role="core", os_type="cisco_nxos")
+    output = DeviceScanner(device_factory=NxosNetDevice).scan_device(device)
+
+    assert output["success"]
+    assert device.model == "C93180YC-EX"
+    assert len(device.modules) == 3
+    with InventoryDatabase(":memory:") as database:
+        database.save_devices([device])
+        assert database.get_device("NX-LEAF-01").modules == device.modules
+
+
+IOS_CPU = """CPU utilization for five seconds: 5%/1%; one minute: 7%; five minutes: 6%
+ PID Runtime(ms)     Invoked      uSecs   5Sec   1Min   5Min TTY Process
+   1          12         345         34  0.00%  0.00%  0.00%   0 Chunk Manager
+"""
+IOS_MEMORY = """Processor Pool Total:  400000 Used:  100000 Free:  300000
+ lsmpi_io Pool Total:    6295128 Used:    6294296 Free:        832
+"""
+IOS_INTERFACES = """GigabitEthernet0/1 is up, line protocol is up (connected)
+  Hardware is Gigabit Ethernet, address is 0011.2233.4455 (bia 0011.2233.4455)
+  MTU 1500 bytes, BW 1000000 Kbit/sec, DLY 10 usec,
+     1500 packets input, 200000 bytes, 0 no buffer
+     3 input errors, 0 CRC, 0 frame, 0 overrun, 0 ignored
+     2500 packets output, 300000 bytes, 0 underruns
+     1 output errors, 0 collisions, 1 interface resets
+GigabitEthernet0/2 is up, line protocol is up (connected)
+  Hardware is Gigabit Ethernet, address is 0011.2233.4456 (bia 0011.2233.4456)
+  MTU 1500 bytes, BW 1000000 Kbit/sec, DLY 10 usec,
+     500 packets input, 200000 bytes, 0 no buffer
+     0 input errors, 0 CRC, 0 frame, 0 overrun, 0 ignored
+     500 packets output, 300000 bytes, 0 underruns
+     0 output errors, 0 collisions, 1 interface resets
+"""
+
+
+def test_parse_metrics_cisco_ios():
+    metrics = parse_metrics("cisco_xe", {
+        "show processes cpu": IOS_CPU,
+        "show processes memory sorted": IOS_MEMORY,
+        "show interfaces": IOS_INTERFACES,
+    })
+
+    assert metrics == {"cpu_percent": 6, "memory_percent": 25, "input_packets": 2000,
+                       "output_packets": 3000, "input_errors": 3, "output_errors": 1}
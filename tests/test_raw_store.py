@@ -0,0 +1,42 @@
+from src.storage.raw_store import RawOutputStore
+
+def test_identical_outputs_are_stored_once(tmp_path):
+    store = RawOutputStore(tmp_path)
+
+    first = store.save("SW1", "show inventory", "NAME: \"1\"", "2025-12-18T10:00:00")
+    second = store.save("SW1", "show inventory", "NAME: \"1\"", "2025-12-19T10:00:00")
+    third = store.save("SW1", "show inventory", "NAME: \"2\"", "2025-12-20T10:00:00")
+
+    assert first == second
+    assert first != third
+    assert len(list((tmp_path / "objects").rglob("*.gz"))) == 2
+    assert [capture["timestamp"] for capture in store.captures("SW1")] == [
+        "2025-12-18T10:00:00", "2025-12-19T10:00:00", "2025-12-20T10:00:00"
+    ]
+    assert store.load(first) == "NAME: \"1\""
+    assert store.latest("SW1", "show inventory") == "NAME: \"2\""
+
+def test_captures_filters(tmp_path):
+    store = RawOutputStore(tmp_path)
+    store.save("SW1", "show version", "v1")
+    store.save("SW2", "show version", "v2")
+    store.save("SW1", "show inventory", "i1")
+
+    assert [output for _, output in store.outputs("show version")] == ["v1", "v2"]
+    assert store.latest("SW3", "show version") is None
+
+def test_captures_index_follows_other_writers(tmp_path):
+    store = RawOutputStore(tmp_path)
+    other = RawOutputStore(tmp_path)
+    store.save("SW1", "show version", "v1", "2025-12-18T10:00:00")
+    assert store.latest("SW1", "show version") == "v1"
+
+    other.save("SW1", "show version", "v2", "2025-12-19T10:00:00")
+    with open(tmp_path / "captures.jsonl", "a") as f:
+        f.write('{"hostname": "SW1", "command": "show ver')
+
+    assert store.latest("SW1", "show version") == "v2"
+    assert [capture["timestamp"] for capture in store.captures("SW1", "show version")] == [
+        "2025-12-18T10:00:00", "2025-12-19T10:00:00"
+    ]
+    assert store.captures(command="show inventory") == []
@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta
+from src.models.device import Device
+from src.scanners.scan_daemon import ScanDaemon
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class FakeScanner:
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.scanned = []
+
+    def scan_all_devices(self, devices, on_result=None):
+        results = []
+        for device in devices:
+            self.scanned.append(device.hostname)
+            output = {'success': device.hostname not in self.failing}
+            if on_result is not None:
+                on_result(device, output)
+            results.append({"device": device, "output": output})
+        return results
+
+class FakeManager:
+    def __init__(self, devices):
+        self.devices = devices
+
+def make_device(hostname, role="access", last_scanned=None):
+    return Device(hostname=hostname, mgmt_ip="10.0.0.1", site="lab", role=role, os_type="cisco_ios",
+                  last_scanned=last_scanned)
+
+def test_priority_order_and_spread():
+    recent = (datetime.now() - timedelta(minutes=5)).isoformat()
+    old = (datetime.now() - timedelta(days=2)).isoformat()
+    devices = [
+        make_device("ACCESS-RECENT", last_scanned=recent),
+        make_device("CORE-RECENT", role="core", last_scanned=recent),
+        make_device("ACCESS-OLD", last_scanned=old),
+        make_device("ACCESS-NEW"),
+    ]
+    clock = Clock()
+    scanner = FakeScanner()
+    daemon = ScanDaemon(scanner, FakeManager(devices), interval=100, reload_interval=None, clock=clock)
+    daemon.start()
+
+    for clock.now in (0, 25, 50, 75):
+        daemon.run_pending()
+    # One device every interval / 4 seconds, never scanned and stalest first
+    assert scanner.scanned == ["ACCESS-NEW", "ACCESS-OLD", "CORE-RECENT", "ACCESS-RECENT"]
+
+    clock.now = 99
+    daemon.run_pending()
+    assert len(scanner.scanned) == 4
+    clock.now = 100
+    daemon.run_pending()
+    assert scanner.scanned[-1] == "ACCESS-NEW"
+
+def test_failing_devices_back_off_and_cycle_callback():
+    devices = [make_device("OK"), make_device("DOWN")]
+    cycles = []
+    clock = Clock()
+    scanner = FakeScanner(failing={"DOWN"})
+    daemon = ScanDaemon(scanner, FakeManager(devices), interval=10, reload_interval=None, max_backoff=4,
+                        on_cycle=cycles.append, clock=clock)
+    daemon.start()
+
+    for second in range(41):
+        clock.now = second
+        daemon.run_pending()
+
+    assert scanner.scanned.count("OK") == 5
+    # Scanned at 5, then 2 intervals later (25), the next try waits 4 intervals (65)
+    assert scanner.scanned.count("DOWN") == 2
+    assert daemon.failures == {"DOWN": 2}
+    assert len(cycles) == 4
+
+def test_role_wins_within_the_same_staleness():
+    now = datetime.now()
+    devices = [
+        make_device("ACCESS-40MIN", last_scanned=(now - timedelta(minutes=40)).isoformat()),
+        make_device("CORE-30MIN", role="core", last_scanned=(now - timedelta(minutes=30)).isoformat()),
+        make_device("ACCESS-3H", last_scanned=(now - timedelta(hours=3)).isoformat()),
+    ]
+    daemon = ScanDaemon(FakeScanner(), FakeManager(devices), interval=3600, reload_interval=None, clock=Clock())
+
+    ordered = sorted(devices, key=lambda device: daemon._priority(device, now))
+
+    assert [device.hostname for device in ordered] == ["ACCESS-3H", "CORE-30MIN", "ACCESS-40MIN"]
+
+class BrokenManager(FakeManager):
+    def load_from_yaml(self, use_cache=False):
+        self.devices = []
+        raise ValueError("mapping values are not allowed here")
+
+def test_reload_error_keeps_the_old_inventory():
+    devices = [make_device("SW1"), make_device("SW2")]
+    clock = Clock()
+    scanner = FakeScanner()
+    daemon = ScanDaemon(scanner, BrokenManager(devices), interval=10, reload_interval=5, clock=clock)
+    daemon.start()
+
+    for second in range(16):
+        clock.now = second
+        daemon.run_pending()
+
+    assert daemon.manager.devices == devices
+    assert scanner.scanned.count("SW1") == 2 and scanner.scanned.count("SW2") == 2
@@ -0,0 +1,91 @@
+import threading
+from src.models.device import Device
+from src.network.session_pool import SessionPool
+from src.scanners.device_scanner import DeviceScanner
+
+class CountingNetDevice:
+    connections = 0
+
+    def __init__(self, host, username, password, device_type):
+        self.host = host
+        self.alive = True
+        self.connected = False
+        self.status = None
+        self.error = None
+
+    def connect(self):
+        CountingNetDevice.connections += 1
+        self.connected = True
+        return True
+
+    def is_alive(self):
+        return self.alive
+
+    def send_command(self, command):
+        return f"{self.host}: {command}"
+
+    def disconnect(self):
+        self.connected = False
+
+def test_sessions_are_reused():
+    CountingNetDevice.connections = 0
+    pool = SessionPool(device_factory=CountingNetDevice)
+
+    for _ in range(3):
+        device, connected = pool.acquire("10.0.0.1", "admin", "secret", "cisco_ios")
+        assert connected
+        pool.release(device)
+
+    assert CountingNetDevice.connections == 1
+    assert pool.stats["reused"] == 2
+
+def test_lru_session_is_evicted_when_full():
+    pool = SessionPool(max_sessions=2, device_factory=CountingNetDevice)
+    first, _ = pool.acquire("10.0.0.1", "admin", "secret", "cisco_ios")
+    second, _ = pool.acquire("10.0.0.2", "admin", "secret", "cisco_ios")
+    pool.release(first)
+    pool.release(second)
+
+    pool.acquire("10.0.0.3", "admin", "secret", "cisco_ios")
+
+    assert not first.connected
+    assert second.connected
+    assert pool.stats["evicted"] == 1
+
+def test_idle_and_dead_sessions_are_replaced():
+    pool = SessionPool(idle_timeout=0, device_factory=CountingNetDevice)
+    device, _ = pool.acquire("10.0.0.1", "admin", "secret", "cisco_ios")
+    pool.release(device)
+    assert pool.acquire("10.0.0.1", "admin", "secret", "cisco_ios")[0] is not device
+    assert pool.stats["expired"] == 1
+
+    pool = SessionPool(health_check_interval=0, device_factory=CountingNetDevice)
+    device, _ = pool.acquire("10.0.0.1", "admin", "secret", "cisco_ios")
+    device.alive = False
+    pool.release(device)
+    assert pool.acquire("10.0.0.1", "admin", "secret", "cisco_ios")[0] is not device
+    assert pool.stats["unhealthy"] == 1
+
+def test_acquire_waits_when_every_session_is_in_use():
+    pool = SessionPool(max_sessions=1, device_factory=CountingNetDevice)
+    device, _ = pool.acquire("10.0.0.1", "admin", "secret", "cisco_ios")
+    acquired = []
+    waiter = threading.Thread(target=lambda: acquired.append(pool.acquire("10.0.0.2", "admin", "secret", "cisco_ios")))
+    waiter.start()
+    waiter.join(0.1)
+    assert acquired == []
+
+    pool.release(device)
+    waiter.join(1)
+    assert acquired and acquired[0][1]
+
+def test_scanner_runs_commands_on_pooled_sessions():
+    CountingNetDevice.connections = 0
+    device = Device(hostname="SW1", mgmt_ip="10.0.0.1", site="lab", role="access", os_type="cisco_ios")
+    scanner = DeviceScanner(session_pool=SessionPool(device_factory=CountingNetDevice))
+
+    first = scanner.run_commands(device, ["show clock", "show ip int brief"])
+    scanner.scan_device(device)
+
+    assert first["outputs"]["show clock"] == "10.0.0.1: show clock"
+    assert CountingNetDevice.connections == 1
@@ -0,0 +1,38 @@
+from src.collectors.inventory_manager import InventoryManager
+from src.models.device import Device
+from src.storage.sqlite_storage import InventoryDatabase
+
+def make_device(hostname, site="lab", serial=None, status=None, scanned=None):
+    return Device(hostname=hostname, mgmt_ip=f"10.0.0.{len(hostname)}", site=site, role="access",
+                  os_type="cisco_ios", serial_number=serial, scan_status=status, last_scanned=scanned)
+
+def test_upsert_and_lookups():
+    database = InventoryDatabase(":memory:", batch_size=2)
+    database.save_devices([
+        make_device("SW1", serial="FOC1", status="success", scanned="2025-12-01T10:00:00"),
+        make_device("SW2", site="dc2"),
+        make_device("SW3", site="dc2"),
+    ])
+    database.save_devices([make_device("SW1", serial="FOC1", status="failed", scanned="2025-12-02T10:00:00")])
+
+    assert len(database.load_devices()) == 3
+    assert [each.hostname for each in database.load_devices(site="dc2")] == ["SW2", "SW3"]
+    assert database.get_device("SW1").scan_status == "failed"
+    assert database.find_by_serial("FOC1")[0].hostname == "SW1"
+    assert len(database.scan_history("SW1")) == 2
+    assert database.last_good_scan("FOC1")["scanned_at"] == "2025-12-01T10:00:00"
+    assert database.get_device("missing") is None
+
+def test_indexes_are_used():
+    database = InventoryDatabase(":memory:")
+    plan = database.conn.execute("EXPLAIN QUERY PLAN SELECT * FROM devices WHERE serial_number = 'X'").fetchall()
+    assert "idx_devices_serial_number" in str([tuple(row) for row in plan])
+
+def test_inventory_manager_db_round_trip(tmp_path):
+    manager = InventoryManager()
+    manager.load_from_yaml("tests/test_devices.yaml")
+    manager.save_to_db(tmp_path / "inventory.db")
+
+    other = InventoryManager()
+    other.load_from_db(tmp_path / "inventory.db")
+    assert other.devices == manager.devices
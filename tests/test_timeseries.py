@@ -0,0 +1,80 @@
+import numpy as np
+from src.models.device import Device
+from src.storage.timeseries import TimeSeriesStore, downsample, RECORD_TYPE
+
+HOUR = 3600
+DAY = 86400
+# Small retentions so the tests cross them
+TEST_TIERS = (("raw", 0, 2 * DAY), ("hour", HOUR, 10 * DAY), ("day", DAY, 100 * DAY))
+
+
+def make_device(hostname="SW-001", site="PAR-01"):
+    return Device(hostname=hostname, mgmt_ip="10.0.0.1", site=site, role="access", os_type="cisco_ios")
+
+
+def test_timeseries_append_and_query(tmp_path):
+    store = TimeSeriesStore(tmp_path, tiers=TEST_TIERS)
+    device = make_device()
+    for minute in range(10):
+        store.append(device, {"cpu_percent": minute, "uptime_seconds": 60 * minute}, 1_000_000 + 60 * minute)
+
+    times, values = store.query("SW-001", "cpu_percent", 1_000_000 + 120, 1_000_000 + 300, tier="raw")
+
+    assert list(times) == [1_000_120, 1_000_180, 1_000_240, 1_000_300]
+    assert list(values) == [2, 3, 4, 5]
+    assert np.isnan(store.query("SW-001", "memory_percent", tier="raw")[1]).all()
+    assert store.append(device, {"cpu_percent": 1}, 1_000_000) is False
+    assert store.query("OTHER", "cpu_percent", tier="raw")[0].size == 0
+
+
+def test_timeseries_downsample_keeps_last_counter_and_averages_gauges():
+    records = np.zeros(4, dtype=RECORD_TYPE)
+    records["time"] = [0, 1800, 3600, 5400]
+    records["samples"] = 1
+    records["cpu_percent"] = [10, 20, 30, np.nan]
+    records["input_packets"] = [100, 200, 300, np.nan]
+    records["memory_percent"] = np.nan
+
+    rolled = downsample(records, HOUR)
+
+    assert list(rolled["time"]) == [0, 3600]
+    assert list(rolled["samples"]) == [2, 2]
+    assert list(rolled["cpu_percent"]) == [15, 30]
+    assert list(rolled["input_packets"]) == [200, 300]
+    assert np.isnan(rolled["memory_percent"]).all()
+
+
+def test_timeseries_rolls_up_and_expires(tmp_path):
+    store = TimeSeriesStore(tmp_path, tiers=TEST_TIERS)
+    device = make_device()
+    start = 100 * DAY
+    for step in range(20 * 24 * 4):
+        store.append(device, {"cpu_percent": step % 4 * 10, "input_packets": step}, start + step * 900)
+    end = start + (20 * 24 * 4 - 1) * 900
+
+    raw_times, _ = store.query("SW-001", "cpu_percent", tier="raw")
+    hour_times, hour_values = store.query("SW-001", "cpu_percent", tier="hour")
+    day_times, day_packets = store.query("SW-001", "input_packets", tier="day")
+
+    # Old records dropped, with up to a tenth of the retention of slack
+    assert raw_times[0] >= end - 2 * DAY - 2 * DAY // 10
+    assert hour_times[0] >= end - 10 * DAY - DAY
+    assert set(hour_values) == {15}
+    assert list(day_times) == [start + day * DAY for day in range(19)]
+    assert day_packets[0] == 95
+
+
+def test_timeseries_site_aggregate(tmp_path):
+    store = TimeSeriesStore(tmp_path, tiers=TEST_TIERS)
+    for number, site in ((1, "PAR-01"), (2, "PAR-01"), (3, "LYO-01")):
+        device = make_device(f"SW-{number}", site)
+        for hour in range(3):
+            store.append(device, {"cpu_percent": number * 10 + hour}, 1_080_000 + hour * HOUR)
+
+    times, means = store.site_aggregate("PAR-01", "cpu_percent", tier="raw")
+    _, peaks = store.site_aggregate("PAR-01", "cpu_percent", tier="raw", aggregate="max", step=3 * HOUR)
+
+    assert list(times) == [1_080_000 + hour * HOUR for hour in range(3)]
+    assert list(means) == [15, 16, 17]
+    assert list(peaks) == [22]
+    assert store.sites() == ["LYO-01", "PAR-01"]